@@ -0,0 +1,112 @@
+"""
+异步结果缓存
+带 TTL 和 LRU 上限的内存缓存，支持：
+- 合并并发请求（singleflight）：同一个 key 同时只有一次上游调用，其余请求等待同一结果
+- 过期后仍可短时间返回旧值（stale-while-revalidate），同时在后台刷新
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_key(text: str) -> str:
+    """规范化缓存键：去掉首尾空白、合并连续空白、忽略大小写"""
+    return " ".join(text.split()).casefold()
+
+
+class AsyncTTLCache:
+    """
+    异步 TTL + LRU 缓存
+
+    Args:
+        name: 缓存名称，用于日志和统计
+        max_size: 最多缓存条目数，超出后淘汰最久未使用的
+        ttl: 新鲜期（秒），期内直接返回
+        stale_ttl: 过期后仍可返回旧值的时长（秒），期间触发后台刷新；0 表示不返回旧值
+    """
+
+    def __init__(self, name: str, max_size: int, ttl: float, stale_ttl: float = 0):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """只读内存，返回未过期的值（不触发加载）"""
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+            return entry[1]
+        return None
+
+    def set(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = lambda value: value is not None,
+    ) -> Any:
+        """
+        获取缓存值，未命中时调用 loader 加载
+
+        Args:
+            key: 缓存键（调用方负责规范化）
+            loader: 无参协程工厂，返回要缓存的值
+            cacheable: 判断结果是否写入缓存，默认不缓存 None（上游失败）
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if age <= self.ttl:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+            if age <= self.ttl + self.stale_ttl:
+                # 先返回旧值，后台刷新（已有刷新在进行时不重复发起）
+                self._entries.move_to_end(key)
+                self.stats["stale_hits"] += 1
+                self._start_load(key, loader, cacheable)
+                return entry[1]
+
+        self.stats["misses"] += 1
+        if key in self._inflight:
+            self.stats["coalesced"] += 1
+        task = self._start_load(key, loader, cacheable)
+        # shield：单个请求被取消时不影响其他等待同一结果的请求
+        return await asyncio.shield(task)
+
+    def _start_load(self, key, loader, cacheable) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, loader, cacheable))
+            # 后台刷新没有等待者，这里取走异常，避免 "exception was never retrieved" 警告
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return task
+
+    async def _load(self, key, loader, cacheable):
+        try:
+            value = await loader()
+            if cacheable(value):
+                self.set(key, value)
+            return value
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"[{self.name}] 加载 {key} 失败: {e}")
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,19 @@
+"""
+管理接口鉴权
+刷新快照、预热缓存、查看上游状态等管理接口要求请求头 X-Admin-Token 与 ADMIN_TOKEN 一致，
+未配置 ADMIN_TOKEN 时这些接口一律拒绝
+"""
+import secrets
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from backend import config
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """FastAPI 依赖：校验管理令牌"""
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="管理接口未启用")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, config.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="管理令牌无效")
@@ -12,6 +12,23 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL", "")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY", "")
 
+# Supabase 连接池配置（进程内共享一个长连接客户端）
+SUPABASE_POOL_MAX_CONNECTIONS = int(os.getenv("SUPABASE_POOL_MAX_CONNECTIONS", "20"))
+SUPABASE_POOL_MAX_KEEPALIVE = int(os.getenv("SUPABASE_POOL_MAX_KEEPALIVE", "10"))
+SUPABASE_POOL_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_POOL_KEEPALIVE_EXPIRY", "60"))
+SUPABASE_HTTP_TIMEOUT = float(os.getenv("SUPABASE_HTTP_TIMEOUT", "15"))
+
+# 数据库查询执行器配置（同步 SDK 查询放到线程池执行，避免阻塞事件循环）
+DB_EXECUTOR_MAX_WORKERS = int(os.getenv("DB_EXECUTOR_MAX_WORKERS", "16"))
+# 单表并发上限，可用 DB_TABLE_CONCURRENCY_LIMITS="events:8,user_reminders:16" 按表覆盖
+DB_TABLE_CONCURRENCY = int(os.getenv("DB_TABLE_CONCURRENCY", "8"))
+DB_TABLE_CONCURRENCY_LIMITS = {
+    name.strip(): int(limit)
+    for name, _, limit in (
+        item.partition(":") for item in os.getenv("DB_TABLE_CONCURRENCY_LIMITS", "").split(",") if item.strip()
+    )
+}
+
 # Gemini API配置
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 
@@ -21,6 +38,130 @@ ZHIPU_API_KEY = os.getenv("ZHIPU_API_KEY") or os.getenv("ZHIPUAI_API_KEY") or "9
 # 博查 AI 配置
 BOCHA_API_KEY = os.getenv("BOCHA_API_KEY", "sk-f372b5355bc74034a46ecb1f227089ee")
 
+# 赛事内存快照刷新周期（秒）
+EVENT_STORE_TTL = float(os.getenv("EVENT_STORE_TTL", "300"))
+
+# 精选赛事排序权重
+FEATURED_CHINA_WEIGHT = float(os.getenv("FEATURED_CHINA_WEIGHT", "100"))
+FEATURED_FINAL_WEIGHT = float(os.getenv("FEATURED_FINAL_WEIGHT", "60"))
+FEATURED_PROXIMITY_WEIGHT = float(os.getenv("FEATURED_PROXIMITY_WEIGHT", "30"))
+FEATURED_PROXIMITY_HALF_LIFE_HOURS = float(os.getenv("FEATURED_PROXIMITY_HALF_LIFE_HOURS", "24"))
+
+# 奖牌榜内存快照从数据库刷新的周期（秒），用于多进程部署下的非同步进程
+MEDAL_TABLE_TTL = float(os.getenv("MEDAL_TABLE_TTL", "60"))
+
+# 奖牌榜自适应抓取（秒）：奖牌赛窗口内高频、其余时间低频，最小间隔用于限流，抖动为比例
+MEDAL_POLL_FAST_INTERVAL = float(os.getenv("MEDAL_POLL_FAST_INTERVAL", "120"))
+MEDAL_POLL_SLOW_INTERVAL = float(os.getenv("MEDAL_POLL_SLOW_INTERVAL", "1800"))
+MEDAL_POLL_MIN_INTERVAL = float(os.getenv("MEDAL_POLL_MIN_INTERVAL", "60"))
+MEDAL_POLL_JITTER = float(os.getenv("MEDAL_POLL_JITTER", "0.1"))
+# 奖牌赛从开始到出结果的预计时长，以及高频窗口在预计结束前后的延伸时间
+MEDAL_EVENT_DURATION = float(os.getenv("MEDAL_EVENT_DURATION", "7200"))
+MEDAL_POLL_WINDOW_LEAD = float(os.getenv("MEDAL_POLL_WINDOW_LEAD", "1800"))
+MEDAL_POLL_WINDOW_TRAIL = float(os.getenv("MEDAL_POLL_WINDOW_TRAIL", "2700"))
+
+# 奖牌榜页面解析引擎顺序（json/lxml/stream/bs4），前面的引擎解析失败时依次回退
+MEDAL_EXTRACTORS = [
+    name.strip() for name in os.getenv("MEDAL_EXTRACTORS", "json,lxml,stream,bs4").split(",") if name.strip()
+]
+
+# 用户提醒缓存：最多缓存的用户数和过期时间（秒）
+REMINDER_CACHE_MAX_USERS = int(os.getenv("REMINDER_CACHE_MAX_USERS", "10000"))
+REMINDER_CACHE_TTL = float(os.getenv("REMINDER_CACHE_TTL", "60"))
+# 单次批量设置/取消提醒的赛事数上限
+REMINDER_BATCH_MAX = int(os.getenv("REMINDER_BATCH_MAX", "500"))
+
+# 读接口 Cache-Control 策略
+# 奖牌榜最多每 30 分钟同步一次，边缘节点短缓存并允许过期后后台刷新
+CACHE_CONTROL_MEDALS = os.getenv("CACHE_CONTROL_MEDALS", "public, max-age=30, s-maxage=60, stale-while-revalidate=300")
+# 赛程响应带有用户提醒状态，只允许浏览器缓存，每次用 ETag 校验
+CACHE_CONTROL_EVENTS = os.getenv("CACHE_CONTROL_EVENTS", "private, no-cache")
+# 历届数据基本不会变化
+CACHE_CONTROL_HISTORY = os.getenv("CACHE_CONTROL_HISTORY", "public, max-age=86400, s-maxage=86400, stale-while-revalidate=604800")
+
+# 历届冬奥会静态数据文件（由 scripts/export_history.py 生成）
+HISTORY_ARTIFACT_PATH = os.getenv(
+    "HISTORY_ARTIFACT_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "history.json.gz"),
+)
+# 检查数据文件是否出现或被重新导出的间隔（秒）
+HISTORY_RECHECK_INTERVAL = float(os.getenv("HISTORY_RECHECK_INTERVAL", "60"))
+
+# AI 助手结果缓存：条目上限、新鲜期和过期后可返回旧值的时长（秒）
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "2000"))
+AI_CACHE_TTL = float(os.getenv("AI_CACHE_TTL", "21600"))
+AI_CACHE_STALE_TTL = float(os.getenv("AI_CACHE_STALE_TTL", "86400"))
+
+# AI 上游（博查/智谱）共享连接池配置
+AI_HTTP_MAX_CONNECTIONS = int(os.getenv("AI_HTTP_MAX_CONNECTIONS", "50"))
+AI_HTTP_MAX_KEEPALIVE = int(os.getenv("AI_HTTP_MAX_KEEPALIVE", "20"))
+AI_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("AI_HTTP_KEEPALIVE_EXPIRY", "120"))
+AI_HTTP_CONNECT_TIMEOUT = float(os.getenv("AI_HTTP_CONNECT_TIMEOUT", "5"))
+# 启动时预热上游连接
+AI_HTTP_PREWARM = os.getenv("AI_HTTP_PREWARM", "true").lower() in ("1", "true", "yes")
+AI_HTTP_PREWARM_TIMEOUT = float(os.getenv("AI_HTTP_PREWARM_TIMEOUT", "5"))
+
+# 博查搜索结果缓存：条目上限、新鲜期和过期后可返回旧值的时长（秒）
+AI_SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("AI_SEARCH_CACHE_MAX_ENTRIES", "5000"))
+AI_SEARCH_CACHE_TTL = float(os.getenv("AI_SEARCH_CACHE_TTL", "21600"))
+AI_SEARCH_CACHE_STALE_TTL = float(os.getenv("AI_SEARCH_CACHE_STALE_TTL", "86400"))
+# 启动时预热搜索缓存（会为每个赛事和运动员调用一次博查 API）及其并发数
+AI_SEARCH_PREWARM = os.getenv("AI_SEARCH_PREWARM", "false").lower() in ("1", "true", "yes")
+AI_SEARCH_PREWARM_CONCURRENCY = int(os.getenv("AI_SEARCH_PREWARM_CONCURRENCY", "4"))
+# 预热的中国运动员名单，逗号分隔
+AI_PREWARM_ATHLETES = [
+    name.strip()
+    for name in os.getenv(
+        "AI_PREWARM_ATHLETES",
+        "苏翊鸣,谷爱凌,武大靖,任子威,高亭宇,徐梦桃,齐广璞,宁忠岩,林孝埈,张嘉豪,刘佳宇,韩聪,隋文静",
+    ).split(",")
+    if name.strip()
+]
+
+# AI 请求端到端截止时间（秒）、联网搜索可占用的比例，以及是否在搜索同时推测性地先做无上下文生成
+AI_DEADLINE = float(os.getenv("AI_DEADLINE", "40"))
+AI_SEARCH_BUDGET_RATIO = float(os.getenv("AI_SEARCH_BUDGET_RATIO", "0.25"))
+AI_SPECULATIVE_GENERATION = os.getenv("AI_SPECULATIVE_GENERATION", "false").lower() in ("1", "true", "yes")
+
+# 定时任务选主：file（本机文件锁）/ supabase（job_leases 表租约，SUPABASE_KEY 需为 service_role key）/ none（不选主）
+JOB_LEASE_BACKEND = os.getenv("JOB_LEASE_BACKEND", "file").lower()
+# 租约有效期（秒），leader 进程退出后最多经过这么久由其他进程接管
+JOB_LEASE_TTL = float(os.getenv("JOB_LEASE_TTL", "60"))
+# 文件锁所在目录，默认系统临时目录
+JOB_LEASE_DIR = os.getenv("JOB_LEASE_DIR", "")
+
+# 奖牌榜推送（/api/medals/stream）
+# 每个连接最多积压的消息数，超出后丢弃积压并通知客户端整表重新拉取
+MEDAL_PUSH_QUEUE_SIZE = int(os.getenv("MEDAL_PUSH_QUEUE_SIZE", "8"))
+# 心跳间隔（秒），同时用于检查奖牌榜快照是否过期
+MEDAL_PUSH_HEARTBEAT = float(os.getenv("MEDAL_PUSH_HEARTBEAT", "15"))
+# 单进程最大订阅连接数
+MEDAL_PUSH_MAX_CLIENTS = int(os.getenv("MEDAL_PUSH_MAX_CLIENTS", "10000"))
+
+# 赛事提醒投递（默认关闭；开启后需使用 service_role key，reminder_deliveries 只对 service_role 开放）
+REMINDER_DISPATCH_ENABLED = os.getenv("REMINDER_DISPATCH_ENABLED", "false").lower() in ("1", "true", "yes")
+# 提前多少分钟提醒，可配置多个（如 "30,5" 表示开赛前 30 分钟和 5 分钟各提醒一次）
+REMINDER_LEAD_MINUTES = sorted(
+    {int(m) for m in os.getenv("REMINDER_LEAD_MINUTES", "30,5").split(",") if m.strip()}, reverse=True
+)
+# 每批投递的提醒数
+REMINDER_DISPATCH_BATCH = int(os.getenv("REMINDER_DISPATCH_BATCH", "500"))
+# 增量加载其他进程新建提醒的间隔（秒）
+REMINDER_DISPATCH_RELOAD = float(os.getenv("REMINDER_DISPATCH_RELOAD", "60"))
+# 投递通道出错后重试的间隔（秒）
+REMINDER_RETRY_DELAY = float(os.getenv("REMINDER_RETRY_DELAY", "30"))
+# 投递通道：log（仅写日志）/ file（写入本地 JSON Lines 文件，便于测试）/ "模块路径:类名"
+REMINDER_SINK = os.getenv("REMINDER_SINK", "log")
+REMINDER_SINK_PATH = os.getenv(
+    "REMINDER_SINK_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "reminder_notifications.jsonl"),
+)
+
+# 管理接口令牌（请求头 X-Admin-Token），为空时管理接口全部拒绝
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+# 脚本通知 API 服务时使用的地址，如 http://localhost:8000
+API_BASE_URL = os.getenv("API_BASE_URL", "")
+
 # 服务器配置
 API_HOST = os.getenv("API_HOST", "0.0.0.0")
 API_PORT = int(os.getenv("API_PORT", "8000"))
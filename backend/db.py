@@ -0,0 +1,120 @@
+"""
+Supabase 共享客户端
+进程内只创建一个带连接池的 Supabase 客户端，由 main.py 在启动时初始化，
+各路由通过 FastAPI 依赖注入获取，避免每个请求重新建连和 TLS 握手
+
+supabase-py 的 execute() 是同步阻塞调用，异步路由中统一通过 execute_async
+放到有界线程池执行，并按表限制并发，避免慢查询卡住整个事件循环
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import httpx
+from supabase import create_client, Client, ClientOptions
+
+from backend import config
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[Client] = None
+_http_client: Optional[httpx.Client] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_table_semaphores: Dict[str, asyncio.Semaphore] = {}
+_lock = threading.Lock()
+
+
+def _build_http_client() -> httpx.Client:
+    """创建带 keep-alive 连接池的 httpx 客户端"""
+    limits = httpx.Limits(
+        max_connections=config.SUPABASE_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=config.SUPABASE_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=config.SUPABASE_POOL_KEEPALIVE_EXPIRY,
+    )
+    return httpx.Client(
+        limits=limits,
+        timeout=config.SUPABASE_HTTP_TIMEOUT,
+        follow_redirects=True,
+        http2=True,
+    )
+
+
+def init_supabase() -> Client:
+    """初始化进程级 Supabase 客户端（重复调用直接返回已有实例）"""
+    global _client, _http_client
+    with _lock:
+        if _client is None:
+            _http_client = _build_http_client()
+            _client = create_client(
+                config.SUPABASE_URL,
+                config.SUPABASE_KEY,
+                options=ClientOptions(httpx_client=_http_client),
+            )
+            logger.info(
+                "Supabase 连接池已创建 (max_connections=%s, max_keepalive=%s)",
+                config.SUPABASE_POOL_MAX_CONNECTIONS,
+                config.SUPABASE_POOL_MAX_KEEPALIVE,
+            )
+        return _client
+
+
+def close_supabase() -> None:
+    """关闭连接池和查询线程池，释放所有长连接"""
+    global _client, _http_client, _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        if _http_client is not None:
+            _http_client.close()
+            logger.info("Supabase 连接池已关闭")
+        _client = None
+        _http_client = None
+        _executor = None
+        _table_semaphores.clear()
+
+
+async def get_supabase() -> Client:
+    """
+    获取共享的 Supabase 客户端
+    可直接作为 FastAPI 依赖使用（异步依赖在事件循环中直接返回，不占用线程池）；
+    未经过 startup（如脚本、Serverless 冷启动）时惰性初始化
+    """
+    if _client is None:
+        return init_supabase()
+    return _client
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """获取数据库查询线程池（惰性创建）"""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=config.DB_EXECUTOR_MAX_WORKERS,
+                thread_name_prefix="supabase",
+            )
+        return _executor
+
+
+def _get_table_semaphore(table: str) -> asyncio.Semaphore:
+    """获取指定表的并发信号量"""
+    semaphore = _table_semaphores.get(table)
+    if semaphore is None:
+        limit = config.DB_TABLE_CONCURRENCY_LIMITS.get(table, config.DB_TABLE_CONCURRENCY)
+        semaphore = _table_semaphores[table] = asyncio.Semaphore(limit)
+    return semaphore
+
+
+async def execute_async(query: Any, table: str) -> Any:
+    """
+    在线程池中执行 Supabase 查询，不阻塞事件循环
+
+    Args:
+        query: 已构建好的查询（任何带 execute() 的 supabase 请求构造器）
+        table: 查询涉及的表名，用于按表限制并发
+    """
+    async with _get_table_semaphore(table):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), query.execute)
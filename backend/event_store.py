@@ -0,0 +1,254 @@
+"""
+赛事内存快照
+events 表只有几百行，且只在 scrape_schedule.py / insert_events.py 运行时变化，
+因此启动时整表加载到内存，按 event_time 排序并建立二级索引，
+赛程和精选赛事查询直接在内存中完成，不再访问 PostgREST
+"""
+import asyncio
+import bisect
+import logging
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from fastapi import Depends
+from supabase import Client
+
+from backend import config
+from backend.db import get_supabase, execute_async
+from backend.http_cache import fingerprint
+
+logger = logging.getLogger(__name__)
+
+# 赛程按北京时间分日：与原查询保持一致，北京时间 D 日对应 event_time 的 (D日 00:00 - 7h) 到 (D+1日 00:00 - 7h)
+BEIJING_DAY_OFFSET = timedelta(hours=7)
+# 决赛/奖牌赛判定
+FINAL_TYPES = ("final", "medal")
+FINAL_KEYWORDS = ("决赛", "金牌")
+# 分页加载，避免触发 PostgREST 单次返回行数上限
+LOAD_PAGE_SIZE = 1000
+
+
+def parse_event_time(value) -> Optional[datetime]:
+    """将数据库中的 event_time 解析为 naive UTC 时间，与 PostgREST 的比较语义一致"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def beijing_day(event_time: datetime) -> date:
+    """event_time 所属的北京时间日期"""
+    return (event_time + BEIJING_DAY_OFFSET).date()
+
+
+def is_final_event(event: dict) -> bool:
+    """是否为决赛/奖牌赛"""
+    title = event.get("title") or ""
+    return event.get("type") in FINAL_TYPES or any(k in title for k in FINAL_KEYWORDS)
+
+
+class _SortedIndex:
+    """按 event_time 有序的赛事列表，支持二分查找时间区间"""
+
+    def __init__(self):
+        self.times: List[datetime] = []
+        self.events: List[dict] = []
+
+    def append(self, event_time: datetime, event: dict):
+        # 调用方保证按时间顺序追加
+        self.times.append(event_time)
+        self.events.append(event)
+
+    def between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[dict]:
+        """返回 start <= event_time < end 的赛事"""
+        lo = bisect.bisect_left(self.times, start) if start else 0
+        hi = bisect.bisect_left(self.times, end) if end else len(self.times)
+        return self.events[lo:hi]
+
+    def __len__(self):
+        return len(self.events)
+
+
+class EventStore:
+    """
+    events 表的内存快照
+
+    - 主索引：按 event_time 排序的全部赛事
+    - 二级索引：北京时间日期、is_team_china、type、决赛状态
+    - 刷新：TTL 过期后后台刷新（期间继续返回旧快照），或调用 refresh()/invalidate() 立即刷新
+    """
+
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self.version = 0
+        # 快照内容摘要，跨进程一致，用于生成 ETag
+        self.fingerprint = ""
+        self.loaded_at: Optional[float] = None
+        self._all = _SortedIndex()
+        self._untimed: List[dict] = []
+        self._by_day: Dict[date, _SortedIndex] = {}
+        self._china = _SortedIndex()
+        self._finals = _SortedIndex()
+        self._by_type: Dict[str, _SortedIndex] = {}
+        self._by_id: Dict[str, dict] = {}
+        self._refresh_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    # ---------- 加载与刷新 ----------
+
+    def load(self, rows: Iterable[dict]):
+        """用一批赛事行重建快照和全部索引"""
+        timed = []
+        untimed = []
+        for row in rows:
+            event_time = parse_event_time(row.get("event_time"))
+            if event_time is None:
+                untimed.append(row)
+            else:
+                timed.append((event_time, row))
+        timed.sort(key=lambda item: (item[0], str(item[1].get("id"))))
+
+        all_index = _SortedIndex()
+        by_day: Dict[date, _SortedIndex] = {}
+        china = _SortedIndex()
+        finals = _SortedIndex()
+        by_type: Dict[str, _SortedIndex] = {}
+        for event_time, row in timed:
+            all_index.append(event_time, row)
+            by_day.setdefault(beijing_day(event_time), _SortedIndex()).append(event_time, row)
+            by_type.setdefault(row.get("type") or "", _SortedIndex()).append(event_time, row)
+            if row.get("is_team_china"):
+                china.append(event_time, row)
+            if is_final_event(row):
+                finals.append(event_time, row)
+
+        # 一次性替换引用，读者不会看到半成品索引
+        self._all, self._untimed, self._by_day = all_index, untimed, by_day
+        self._china, self._finals, self._by_type = china, finals, by_type
+        self._by_id = {str(row["id"]): row for _, row in timed}
+        self._by_id.update({str(row["id"]): row for row in untimed})
+        self.fingerprint = fingerprint([row for _, row in timed] + untimed)
+        self.loaded_at = time.monotonic()
+        self.version += 1
+        logger.info("赛事快照已加载: %s 条 (version=%s)", len(self._by_id), self.version)
+
+    async def refresh(self, supabase: Client):
+        """从数据库重新加载 events 表"""
+        async with self._refresh_lock:
+            rows: List[dict] = []
+            offset = 0
+            while True:
+                query = supabase.table("events").select("*").order("event_time").range(
+                    offset, offset + LOAD_PAGE_SIZE - 1
+                )
+                result = await execute_async(query, "events")
+                rows.extend(result.data)
+                if len(result.data) < LOAD_PAGE_SIZE:
+                    break
+                offset += LOAD_PAGE_SIZE
+            self.load(rows)
+
+    def invalidate(self):
+        """标记快照过期，下一次访问时刷新"""
+        self.loaded_at = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.version > 0
+
+    @property
+    def is_stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > self.ttl
+
+    async def ensure_fresh(self, supabase: Client):
+        """
+        保证快照可用
+        首次访问同步加载；之后过期时在后台刷新，当前请求继续使用旧快照
+        """
+        if not self.is_loaded:
+            await self.refresh(supabase)
+        elif self.is_stale and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._background_refresh(supabase))
+
+    async def _background_refresh(self, supabase: Client):
+        try:
+            await self.refresh(supabase)
+        except Exception as e:
+            logger.error(f"后台刷新赛事快照失败: {e}")
+
+    # ---------- 查询 ----------
+
+    def get(self, event_id: str) -> Optional[dict]:
+        return self._by_id.get(str(event_id))
+
+    def query(
+        self,
+        day: Optional[date] = None,
+        team_china_only: bool = False,
+        finals_only: bool = False,
+        event_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        按条件查询赛事，结果按 event_time 升序
+
+        Args:
+            day: 北京时间日期
+            team_china_only: 仅中国队参赛
+            finals_only: 仅决赛/奖牌赛
+            event_type: 按 type 字段筛选
+            since: 仅返回 event_time >= since 的赛事（naive UTC）
+            limit: 最多返回数量
+        """
+        # 选取最窄的索引作为候选集，其余条件逐条过滤
+        if day is not None:
+            index = self._by_day.get(day)
+            if index is None:
+                return []
+        elif event_type is not None:
+            index = self._by_type.get(event_type)
+            if index is None:
+                return []
+        elif team_china_only:
+            index = self._china
+        elif finals_only:
+            index = self._finals
+        else:
+            index = self._all
+
+        candidates = index.between(start=since)
+        if day is None and since is None and self._untimed:
+            # 没有时间的赛事排在最后（与数据库 NULLS LAST 排序一致）
+            candidates = candidates + self._untimed
+        results = []
+        for event in candidates:
+            if team_china_only and not event.get("is_team_china"):
+                continue
+            if finals_only and not is_final_event(event):
+                continue
+            if event_type is not None and event.get("type") != event_type:
+                continue
+            results.append(event)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def __len__(self):
+        return len(self._by_id)
+
+
+# 进程级赛事快照
+event_store = EventStore(ttl=config.EVENT_STORE_TTL)
+
+
+async def get_event_store(supabase: Client = Depends(get_supabase)) -> EventStore:
+    """FastAPI 依赖：返回已加载的赛事快照"""
+    await event_store.ensure_fresh(supabase)
+    return event_store
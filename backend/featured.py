@@ -0,0 +1,84 @@
+"""
+精选赛事排序
+对候选赛事一次遍历打分（中国队参赛、决赛/奖牌赛、时间临近度），
+用堆保留前 N 个，替代原先"中国队 → 决赛 → 补位"的多轮查询与去重
+"""
+import heapq
+from datetime import date, datetime, timezone
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from backend import config
+from backend.event_store import EventStore, is_final_event, parse_event_time
+
+
+class FeaturedPolicy(BaseModel):
+    """精选赛事打分策略"""
+    china_weight: float = config.FEATURED_CHINA_WEIGHT
+    final_weight: float = config.FEATURED_FINAL_WEIGHT
+    proximity_weight: float = config.FEATURED_PROXIMITY_WEIGHT
+    # 距离当前时间每过一个半衰期，临近度得分减半
+    proximity_half_life_hours: float = config.FEATURED_PROXIMITY_HALF_LIFE_HOURS
+    # 指定日期时只展示当天重点赛事，当天没有重点赛事才用普通赛事补位
+    date_highlights_only: bool = True
+
+
+class FeaturedRanker:
+    """精选赛事排序器"""
+
+    def __init__(self, policy: Optional[FeaturedPolicy] = None):
+        self.policy = policy or FeaturedPolicy()
+
+    def highlight_score(self, event: dict) -> float:
+        """与时间无关的重点赛事得分（中国队 + 决赛）"""
+        score = 0.0
+        if event.get("is_team_china"):
+            score += self.policy.china_weight
+        if is_final_event(event):
+            score += self.policy.final_weight
+        return score
+
+    def proximity_score(self, event_time: datetime, now: datetime) -> float:
+        """时间临近度得分，离当前时间越近越高"""
+        hours = abs((event_time - now).total_seconds()) / 3600
+        return self.policy.proximity_weight * 0.5 ** (hours / self.policy.proximity_half_life_hours)
+
+    def rank(
+        self,
+        store: EventStore,
+        limit: int,
+        day: Optional[date] = None,
+        now: Optional[datetime] = None,
+    ) -> List[dict]:
+        """
+        返回精选赛事，按 event_time 升序
+
+        Args:
+            store: 赛事快照
+            limit: 返回数量；候选足够时恰好返回 limit 条
+            day: 北京时间日期；为空时取 now 之后的未来赛事
+            now: 当前时间（naive UTC，与 event_time 比较语义一致），默认为当前 UTC 时间
+        """
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+        candidates = store.query(day=day) if day else store.query(since=now)
+
+        scored = []
+        has_highlight = False
+        for event in candidates:
+            highlight = self.highlight_score(event)
+            has_highlight = has_highlight or highlight > 0
+            event_time = parse_event_time(event["event_time"])
+            # 得分相同时更早、id 更小的优先，保证结果稳定
+            scored.append((-(highlight + self.proximity_score(event_time, now)), event_time, str(event["id"]), highlight, event))
+
+        if day and self.policy.date_highlights_only and has_highlight:
+            scored = [item for item in scored if item[3] > 0]
+
+        top = heapq.nsmallest(limit, scored, key=lambda item: item[:3])
+        top.sort(key=lambda item: (item[1], item[2]))
+        return [item[4] for item in top]
+
+
+# 默认排序器，使用 config 中的权重
+featured_ranker = FeaturedRanker()
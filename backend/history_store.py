@@ -0,0 +1,267 @@
+"""
+历届冬奥会静态数据集
+24 届历史数据不会再变化，由 scripts/export_history.py 从 Supabase 导出为带版本号的
+列式压缩文件（按年份分组，ISO 编码已解析），接口直接从内存读取
+
+- 数据文件按修改时间定期检查，重新导出后无需重启即可生效
+- 部署包中没有数据文件时，启动后由 build_history_dataset() 从 Supabase 导出一次：
+  能写入时落盘供后续进程复用，只读文件系统（如 Vercel）上只保存在内存中
+- 导出完成前路由回退到 Supabase 查询
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from supabase import Client
+
+from backend import config
+from backend.db import execute_async
+from backend.scripts.sync_medals import get_iso
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT = 1
+
+EDITION_COLUMNS = ("year", "location", "countries_count", "events_count")
+MEDAL_COLUMNS = ("rank", "country", "iso", "gold", "silver", "bronze", "total")
+EVENT_COLUMNS = (
+    "id", "sport_name", "event_name",
+    "gold_country", "gold_iso", "silver_country", "silver_iso", "bronze_country", "bronze_iso",
+)
+
+# 补充一些核心年份的兜底数据（特别是北京2022）
+FALLBACK_STATS = {
+    2022: {"countries": 91, "events": 109},
+    2018: {"countries": 92, "events": 102},
+    2014: {"countries": 88, "events": 98},
+    2010: {"countries": 82, "events": 86},
+    2006: {"countries": 80, "events": 84},
+}
+
+
+# ========== 数据库行 -> 响应数据 ==========
+
+def build_editions(medal_rows: Iterable[dict], stats_rows: Iterable[dict]) -> List[dict]:
+    """
+    合并届次列表
+    history_medals_duplicate 包含完整的届次列表（从1924年开始），
+    history_events 包含部分届次（1960年以后）的国家数和项目数
+    """
+    stats_map = {}
+    for item in stats_rows:
+        year = item["year"]
+        if year not in stats_map or (item.get("countries_count") and not stats_map[year]["countries"]):
+            stats_map[year] = {
+                "countries": item.get("countries_count", 0),
+                "events": item.get("events_count", 0)
+            }
+
+    # 按年份倒序去重合并，优先使用数据库数据，如果没有则使用兜底数据
+    seen = set()
+    editions = []
+    for item in sorted(medal_rows, key=lambda row: row["Year"], reverse=True):
+        year = item["Year"]
+        if year in seen:
+            continue
+        db_stats = stats_map.get(year, {"countries": 0, "events": 0})
+        fb_stats = FALLBACK_STATS.get(year, {"countries": 0, "events": 0})
+        editions.append({
+            "year": year,
+            "location": item["City"],
+            "countries_count": db_stats["countries"] or fb_stats["countries"],
+            "events_count": db_stats["events"] or fb_stats["events"],
+        })
+        seen.add(year)
+    return editions
+
+
+def build_history_medals(rows: Iterable[dict]) -> List[dict]:
+    """历史奖牌榜行（列名为 Year, Rank, Country, gold, silver, bronze），按名次排列"""
+    return [
+        {
+            "rank": m["Rank"],
+            "country": m["Country"],
+            "iso": get_iso(m["Country"]),  # 从国家名映射 ISO
+            "gold": m["gold"],
+            "silver": m["silver"],
+            "bronze": m["bronze"],
+            "total": m["gold"] + m["silver"] + m["bronze"],
+        }
+        for m in sorted(rows, key=lambda row: row["Rank"])
+    ]
+
+
+def build_history_events(rows: Iterable[dict]) -> List[dict]:
+    """历史赛事行，附带奖牌获得国的 ISO 编码"""
+    return [
+        {
+            "id": str(item["id"]),
+            "sport_name": item["sport_name"],
+            "event_name": item["event_name"],
+            "gold_country": item.get("gold_country"),
+            "gold_iso": get_iso(item["gold_country"]) if item.get("gold_country") else None,
+            "silver_country": item.get("silver_country"),
+            "silver_iso": get_iso(item["silver_country"]) if item.get("silver_country") else None,
+            "bronze_country": item.get("bronze_country"),
+            "bronze_iso": get_iso(item["bronze_country"]) if item.get("bronze_country") else None,
+        }
+        for item in rows
+    ]
+
+
+# ========== 列式编码 ==========
+
+def to_columns(rows: List[dict], columns) -> Dict[str, list]:
+    return {column: [row.get(column) for row in rows] for column in columns}
+
+
+def from_columns(table: Dict[str, list], columns) -> List[dict]:
+    length = len(table[columns[0]]) if table else 0
+    return [{column: table[column][i] for column in columns} for i in range(length)]
+
+
+def encode_artifact(
+    editions: List[dict],
+    medals_by_year: Dict[int, List[dict]],
+    events_by_year: Dict[int, List[dict]],
+    generated_at: str,
+) -> dict:
+    """将历史数据编码为列式结构，version 为内容摘要"""
+    years = {}
+    for year in sorted(set(medals_by_year) | set(events_by_year)):
+        years[str(year)] = {
+            "medals": to_columns(medals_by_year.get(year, []), MEDAL_COLUMNS),
+            "events": to_columns(events_by_year.get(year, []), EVENT_COLUMNS),
+        }
+    body = {"editions": to_columns(editions, EDITION_COLUMNS), "years": years}
+    raw = json.dumps(body, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return {
+        "format": ARTIFACT_FORMAT,
+        "version": hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16],
+        "generated_at": generated_at,
+        **body,
+    }
+
+
+def build_artifact(medal_rows: List[dict], event_rows: List[dict]) -> dict:
+    """由 history_medals_duplicate / history_events 两张表的全部行生成数据文件内容"""
+    medals_by_year = defaultdict(list)
+    for row in medal_rows:
+        medals_by_year[row["Year"]].append(row)
+    events_by_year = defaultdict(list)
+    for row in event_rows:
+        events_by_year[row["year"]].append(row)
+
+    return encode_artifact(
+        editions=build_editions(medal_rows, event_rows),
+        medals_by_year={year: build_history_medals(rows) for year, rows in medals_by_year.items()},
+        events_by_year={year: build_history_events(rows) for year, rows in events_by_year.items()},
+        generated_at=datetime.now(timezone.utc).isoformat(),
+    )
+
+
+def write_artifact(artifact: dict, path: str):
+    """先写临时文件再原子替换，避免运行中的服务读到半个文件"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(artifact, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+# ========== 运行时数据集 ==========
+
+class HistoryDataset:
+    """已解码的历史数据，所有查询均为内存字典查找"""
+
+    def __init__(self, artifact: dict):
+        self.version: str = artifact["version"]
+        self.generated_at: str = artifact.get("generated_at", "")
+        self.editions: List[dict] = from_columns(artifact["editions"], EDITION_COLUMNS)
+        self.medals_by_year: Dict[int, List[dict]] = {}
+        self.events_by_year: Dict[int, List[dict]] = {}
+        for year, tables in artifact["years"].items():
+            self.medals_by_year[int(year)] = from_columns(tables["medals"], MEDAL_COLUMNS)
+            self.events_by_year[int(year)] = from_columns(tables["events"], EVENT_COLUMNS)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["HistoryDataset"]:
+        """读取数据文件；文件不存在或格式不兼容时返回 None"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                artifact = json.load(f)
+            if artifact.get("format") != ARTIFACT_FORMAT:
+                logger.warning("历史数据文件格式不兼容: %s", artifact.get("format"))
+                return None
+            dataset = cls(artifact)
+            logger.info("历史数据集已加载: %s 届 (version=%s)", len(dataset.editions), dataset.version)
+            return dataset
+        except Exception as e:
+            logger.error(f"读取历史数据文件失败: {e}")
+            return None
+
+
+_dataset: Optional[HistoryDataset] = None
+# 已加载数据文件的修改时间，以及上一次检查文件的时间
+_loaded_mtime: Optional[float] = None
+_checked_at: Optional[float] = None
+
+
+def get_history_dataset() -> Optional[HistoryDataset]:
+    """
+    返回进程内的历史数据集，尚无可用数据时返回 None
+    每隔 HISTORY_RECHECK_INTERVAL 秒检查一次数据文件，文件出现或被重新导出时重新加载
+    """
+    global _dataset, _loaded_mtime, _checked_at
+    now = time.monotonic()
+    if _checked_at is None or now - _checked_at >= config.HISTORY_RECHECK_INTERVAL:
+        _checked_at = now
+        try:
+            mtime = os.path.getmtime(config.HISTORY_ARTIFACT_PATH)
+        except OSError:
+            mtime = None
+        if mtime is not None and mtime != _loaded_mtime:
+            dataset = HistoryDataset.load(config.HISTORY_ARTIFACT_PATH)
+            if dataset is not None:
+                _dataset, _loaded_mtime = dataset, mtime
+    return _dataset
+
+
+async def fetch_all_rows(supabase: Client, table: str, page_size: int = 1000) -> List[dict]:
+    """分页读取整张表，避免 PostgREST 单次返回行数上限"""
+    rows = []
+    offset = 0
+    while True:
+        result = await execute_async(
+            supabase.table(table).select("*").range(offset, offset + page_size - 1), table
+        )
+        rows.extend(result.data)
+        if len(result.data) < page_size:
+            return rows
+        offset += page_size
+
+
+async def build_history_dataset(supabase: Client) -> Optional[HistoryDataset]:
+    """数据文件不存在时从 Supabase 导出历史数据集，并尽量写入数据文件"""
+    global _dataset, _loaded_mtime
+    if get_history_dataset() is not None:
+        return _dataset
+    medal_rows = await fetch_all_rows(supabase, "history_medals_duplicate")
+    event_rows = await fetch_all_rows(supabase, "history_events")
+    artifact = build_artifact(medal_rows, event_rows)
+    _dataset = HistoryDataset(artifact)
+    try:
+        write_artifact(artifact, config.HISTORY_ARTIFACT_PATH)
+        _loaded_mtime = os.path.getmtime(config.HISTORY_ARTIFACT_PATH)
+    except OSError as e:
+        logger.warning(f"历史数据文件无法写入，仅保存在内存中: {e}")
+    logger.info("历史数据集已从数据库导出: %s 届 (version=%s)", len(_dataset.editions), _dataset.version)
+    return _dataset
@@ -0,0 +1,59 @@
+"""
+HTTP 缓存辅助
+为读接口生成强 ETag、处理 If-None-Match 条件请求（命中返回 304），
+并按路由设置 Cache-Control，方便 Vercel 边缘节点和浏览器吸收重复请求
+"""
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+
+def fingerprint(data: Any) -> str:
+    """对任意可 JSON 序列化的数据计算稳定摘要（跨进程一致）"""
+    raw = json.dumps(jsonable_encoder(data), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def make_etag(*parts: Any) -> str:
+    """由数据版本和请求参数组合生成强 ETag"""
+    return f'"{fingerprint(parts)[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match 是否命中（按 RFC 7232 使用弱比较）"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def not_modified(request: Request, etag: str, cache_control: str) -> Optional[Response]:
+    """命中条件请求时返回 304 响应，否则返回 None"""
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    return None
+
+
+def cached_json(request: Request, content: Any, cache_control: str, etag: Optional[str] = None) -> Response:
+    """
+    返回带 ETag 和 Cache-Control 的 JSON 响应
+    未提供 etag 时按响应内容计算；提供时先判断条件请求，命中则无需序列化
+    """
+    if etag is not None:
+        response = not_modified(request, etag, cache_control)
+        if response is not None:
+            return response
+    encoded = jsonable_encoder(content)
+    if etag is None:
+        etag = make_etag(encoded)
+        response = not_modified(request, etag, cache_control)
+        if response is not None:
+            return response
+    return JSONResponse(content=encoded, headers={"ETag": etag, "Cache-Control": cache_control})
@@ -0,0 +1,177 @@
+"""
+后台任务选主
+多 worker 部署（uvicorn --workers / gunicorn）时每个进程都会执行 startup，
+定时任务（如奖牌榜同步）通过租约保证同一时间只有一个进程在运行：
+
+- file:     本机文件锁，适合单机多 worker；持有锁的进程退出时由操作系统自动释放
+- supabase: job_leases 表中的租约行（带过期时间），适合多机部署；持有者停止续约后租约过期即可被接管
+- none:     不选主，每个进程都运行（单进程开发环境）
+
+LeaderElector 在后台按 ttl/3 的间隔获取或续约租约，定时任务运行前检查 is_leader
+"""
+import asyncio
+import logging
+import os
+import socket
+import tempfile
+import time
+import uuid
+from typing import Optional
+
+from backend import config
+from backend.db import get_supabase, execute_async
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+def holder_id() -> str:
+    """当前进程的租约持有者标识"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class FileLease:
+    """本机文件锁租约，锁随进程存活，无需续约"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    async def acquire(self) -> bool:
+        """获取锁（已持有时直接返回 True）"""
+        if self._file is not None:
+            return True
+        f = open(self.path, "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    async def release(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SupabaseLease:
+    """
+    job_leases 表中的租约行
+    获取、续约和释放都调用数据库函数（见 supabase_schema.sql），比较过期时间和计算新的到期时间
+    都使用数据库时钟，各 worker 本地时钟有偏差时也不会提前接管或延长他人的租约
+    需要使用 service_role key 连接（job_leases 只对 service_role 开放）
+    """
+
+    def __init__(self, name: str, ttl: float, holder: Optional[str] = None):
+        self.name = name
+        self.ttl = ttl
+        self.holder = holder or holder_id()
+
+    async def acquire(self) -> bool:
+        """获取或续约租约（租约行不存在时自动创建）"""
+        supabase = await get_supabase()
+        result = await execute_async(
+            supabase.rpc(
+                "acquire_job_lease",
+                {"p_name": self.name, "p_holder": self.holder, "p_ttl_seconds": self.ttl},
+            ),
+            "job_leases",
+        )
+        return bool(result.data)
+
+    async def release(self):
+        """主动让出租约（立即过期），其他进程无需等待 ttl 即可接管"""
+        supabase = await get_supabase()
+        await execute_async(
+            supabase.rpc("release_job_lease", {"p_name": self.name, "p_holder": self.holder}),
+            "job_leases",
+        )
+
+
+class LeaderElector:
+    """
+    后台维持租约并对外提供 is_leader
+
+    续约失败（如数据库暂时不可用）时，到上一次成功续约的租约到期为止仍视为 leader，
+    之后自动放弃，避免与接管者同时运行
+    """
+
+    def __init__(self, name: str, lease=None, ttl: float = 60):
+        self.name = name
+        self.ttl = ttl
+        self.lease = lease
+        self._valid_until = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        if self.lease is None:
+            return True
+        return time.monotonic() < self._valid_until
+
+    async def try_acquire(self) -> bool:
+        if self.lease is None:
+            return True
+        was_leader = self.is_leader
+        try:
+            # 续约前记录时间，保证本地认为的有效期不晚于租约实际到期时间
+            started = time.monotonic()
+            if await self.lease.acquire():
+                self._valid_until = started + self.ttl
+            else:
+                self._valid_until = 0.0
+        except Exception as e:
+            logger.error(f"[{self.name}] 获取租约失败: {e}")
+        if self.is_leader != was_leader:
+            logger.info("[%s] %s", self.name, "成为 leader" if self.is_leader else "不再是 leader")
+        return self.is_leader
+
+    def start(self):
+        if self.lease is not None and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self.try_acquire()
+            await asyncio.sleep(self.ttl / 3)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.lease is not None and self.is_leader:
+            try:
+                await self.lease.release()
+            except Exception as e:
+                logger.error(f"[{self.name}] 释放租约失败: {e}")
+        self._valid_until = 0.0
+
+
+def create_elector(name: str) -> LeaderElector:
+    """按 JOB_LEASE_BACKEND 配置创建选主器"""
+    backend = config.JOB_LEASE_BACKEND
+    if backend == "file":
+        path = os.path.join(config.JOB_LEASE_DIR or tempfile.gettempdir(), f"gamemilano-{name}.lock")
+        lease = FileLease(path)
+    elif backend == "supabase":
+        lease = SupabaseLease(name, ttl=config.JOB_LEASE_TTL)
+    else:
+        lease = None
+    return LeaderElector(name, lease, ttl=config.JOB_LEASE_TTL)
+
+
+# 奖牌榜同步任务的选主器
+medal_sync_elector = create_elector("medal_sync")
+# 提醒投递任务的选主器
+reminder_dispatch_elector = create_elector("reminder_dispatch")
@@ -7,6 +7,15 @@ from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
 from . import config
+from .db import init_supabase, close_supabase, get_supabase
+from .event_store import event_store
+from .medal_table import medal_table
+from .medal_push import medal_broadcaster
+from .history_store import build_history_dataset, get_history_dataset
+from .medal_schedule import medal_poll_scheduler
+from .leader import medal_sync_elector, reminder_dispatch_elector
+from .reminder_dispatch import reminder_dispatcher
+from .upstream import init_upstream_clients, prewarm_upstream_clients, close_upstream_clients
 from .routers import events, medals, ai, reminders
 from .scripts.sync_medals import run_sync
 import asyncio
@@ -35,20 +44,97 @@ app.include_router(reminders.router)
 
 
 async def medal_sync_scheduler():
-    """定时抓取奖牌榜任务"""
+    """
+    定时抓取奖牌榜任务，间隔随赛程自适应（奖牌赛前后高频，其余时间低频）
+    多 worker 部署时只有持有租约的进程执行，其余进程定期检查以便在 leader 退出后接管
+    """
+    medal_sync_elector.start()
     while True:
+        if not await medal_sync_elector.try_acquire():
+            await asyncio.sleep(config.JOB_LEASE_TTL / 3)
+            continue
         try:
             await run_sync()
         except Exception as e:
             print(f"奖牌同步后台任务出错: {e}")
-        # 每 30 分钟同步一次
-        await asyncio.sleep(1800)
+        try:
+            await event_store.ensure_fresh(await get_supabase())
+            delay = medal_poll_scheduler.next_interval(event_store)
+        except Exception as e:
+            print(f"计算奖牌同步间隔出错: {e}")
+            delay = config.MEDAL_POLL_SLOW_INTERVAL
+        await asyncio.sleep(delay)
+
+
+async def export_history_dataset(supabase):
+    try:
+        await build_history_dataset(supabase)
+    except Exception as e:
+        print(f"导出历史数据集失败: {e}")
+
+
+async def reminder_dispatch_task():
+    """
+    提醒投递任务：到点把赛事提醒投递到通知通道
+    与奖牌同步一样只在持有租约的进程运行；失去租约时清空调度状态，重新获得后整体重新加载
+    """
+    try:
+        reminder_dispatcher.open_sink()
+    except Exception as e:
+        # 通道配置错误只影响提醒投递，不影响应用启动
+        print(f"提醒投递通道 {config.REMINDER_SINK} 创建失败，提醒投递未启动: {e}")
+        return
+    reminder_dispatch_elector.start()
+    while True:
+        if not await reminder_dispatch_elector.try_acquire():
+            if reminder_dispatcher.active:
+                reminder_dispatcher.reset()
+            await asyncio.sleep(config.JOB_LEASE_TTL / 3)
+            continue
+        try:
+            delay = await reminder_dispatcher.tick(await get_supabase())
+        except Exception as e:
+            print(f"提醒投递后台任务出错: {e}")
+            delay = 5
+        # 不超过租约续约周期，保证失去租约后及时停止投递
+        await reminder_dispatcher.wait(min(delay, config.JOB_LEASE_TTL / 3))
 
 
 @app.on_event("startup")
 async def startup_event():
-    """应用启动时启动定时任务"""
+    """应用启动时初始化共享数据库连接和 AI 上游连接池、加载赛事快照并启动定时任务"""
+    supabase = init_supabase()
+    init_upstream_clients()
+    if config.AI_HTTP_PREWARM:
+        # 预热在后台进行，不阻塞启动
+        asyncio.create_task(prewarm_upstream_clients())
+    try:
+        await event_store.refresh(supabase)
+    except Exception as e:
+        # 加载失败不影响启动，首次请求时会重新加载
+        print(f"加载赛事快照失败: {e}")
+    try:
+        await medal_table.refresh(supabase)
+    except Exception as e:
+        print(f"加载奖牌榜失败: {e}")
+    if get_history_dataset() is None:
+        # 部署包中没有历史数据文件时在后台导出一次，完成前历史接口回退到数据库查询
+        asyncio.create_task(export_history_dataset(supabase))
+    if config.AI_SEARCH_PREWARM:
+        ai.start_search_prewarm(event_store)
     asyncio.create_task(medal_sync_scheduler())
+    if config.REMINDER_DISPATCH_ENABLED:
+        asyncio.create_task(reminder_dispatch_task())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """应用关闭时让出定时任务租约，停止奖牌榜推送，释放数据库连接池和 AI 上游连接池"""
+    await medal_sync_elector.stop()
+    await reminder_dispatch_elector.stop()
+    await medal_broadcaster.close()
+    close_supabase()
+    await close_upstream_clients()
 
 
 @app.get("/")
@@ -0,0 +1,345 @@
+"""
+百度体育奖牌榜页面解析
+按顺序尝试多个解析引擎，第一个解析出数据的引擎胜出：
+
+- json:   页面内嵌的 JSON 数据（如果页面把奖牌榜数据直接写在脚本里，无需解析 DOM）
+- lxml:   lxml（C 实现）+ XPath，需要安装 lxml，未安装时自动跳过
+- stream: 标准库 HTMLParser 流式扫描，只提取奖牌行中需要的几个字段，不构建 DOM 树
+- bs4:    原 BeautifulSoup + html.parser 实现，作为兜底
+
+每个引擎的结果都会与页面中奖牌行元素的个数核对，漏行时继续尝试下一个引擎。
+引擎顺序可通过 MEDAL_EXTRACTORS 配置。每个引擎返回
+[{"country", "gold", "silver", "bronze", "rank"}, ...]，无法处理该页面时返回 None
+"""
+import json
+import logging
+import re
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+from backend import config
+
+try:
+    import lxml.html
+except ImportError:  # lxml 是可选依赖
+    lxml = None
+
+logger = logging.getLogger(__name__)
+
+Extractor = Callable[[str], Optional[List[dict]]]
+
+
+def make_row(country, gold, silver, bronze, rank=None) -> dict:
+    return {
+        "country": str(country).strip(),
+        "gold": int(str(gold).strip()),
+        "silver": int(str(silver).strip()),
+        "bronze": int(str(bronze).strip()),
+        "rank": int(str(rank).strip()) if rank not in (None, "") else 0,
+    }
+
+
+# ========== 内嵌 JSON ==========
+
+# 页面脚本中常见的初始数据变量
+_EMBEDDED_JSON_PATTERN = re.compile(
+    r"(?:window\.)?(?:__INITIAL_STATE__|__INITIAL_DATA__|__NEXT_DATA__|tplData|pageData)\s*=\s*(\{.*?\})\s*;?\s*</script>",
+    re.S,
+)
+_NAME_KEYS = ("countryName", "country", "name")
+_COUNT_KEYS = (
+    ("gold", "silver", "bronze"),
+    ("goldNum", "silverNum", "bronzeNum"),
+    ("goldCount", "silverCount", "bronzeCount"),
+)
+_RANK_KEYS = ("rank", "ranking")
+
+
+def _medal_row_from_json(item) -> Optional[dict]:
+    if not isinstance(item, dict):
+        return None
+    name = next((item[key] for key in _NAME_KEYS if item.get(key)), None)
+    if name is None:
+        return None
+    for keys in _COUNT_KEYS:
+        if all(key in item for key in keys):
+            try:
+                rank = next((item[key] for key in _RANK_KEYS if key in item), None)
+                return make_row(name, *(item[key] for key in keys), rank=rank)
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def _find_medal_list(node) -> Optional[List[dict]]:
+    """
+    在 JSON 树中查找最长的“每个元素都是奖牌行”的列表
+    页面数据里可能还有前三名、中国队卡片等较短的奖牌行列表，取最长的作为完整榜单
+    """
+    if isinstance(node, list):
+        if node:
+            rows = [_medal_row_from_json(item) for item in node]
+            if all(rows):
+                return rows
+        children = node
+    elif isinstance(node, dict):
+        children = node.values()
+    else:
+        return None
+    best = None
+    for child in children:
+        found = _find_medal_list(child)
+        if found and (best is None or len(found) > len(best)):
+            best = found
+    return best
+
+
+def extract_embedded_json(html: str) -> Optional[List[dict]]:
+    best = None
+    for match in _EMBEDDED_JSON_PATTERN.finditer(html):
+        try:
+            data = json.loads(match.group(1))
+        except ValueError:
+            continue
+        rows = _find_medal_list(data)
+        if rows and (best is None or len(rows) > len(best)):
+            best = rows
+    return best
+
+
+# ========== lxml ==========
+
+def _xpath_class(*names: str) -> str:
+    return " and ".join(f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')" for name in names)
+
+
+_ROW_XPATH = f"//*[{_xpath_class('rankContainer', 'rankTable')}]"
+_FIELD_XPATHS = {
+    "rank": f".//*[{_xpath_class('rankHeaderRanking')}]//span",
+    "country": f".//*[{_xpath_class('rankHeaderAreaName')}]",
+    "gold": f".//*[{_xpath_class('medalImg', 'gold')}]",
+    "silver": f".//*[{_xpath_class('medalImg', 'silver')}]",
+    "bronze": f".//*[{_xpath_class('medalImg', 'copper')}]",
+}
+
+
+def extract_lxml(html: str) -> Optional[List[dict]]:
+    if lxml is None:
+        return None
+    tree = lxml.html.fromstring(html)
+    rows = []
+    for node in tree.xpath(_ROW_XPATH):
+        fields = {}
+        for field, xpath in _FIELD_XPATHS.items():
+            found = node.xpath(xpath)
+            fields[field] = found[0].text_content() if found else None
+        try:
+            rows.append(make_row(**fields))
+        except (TypeError, ValueError, AttributeError):
+            continue
+    return rows or None
+
+
+# ========== 流式扫描 ==========
+
+# 没有结束标签的元素
+_VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr",
+}
+
+
+class _OpenElement:
+    """
+    正在跟踪的元素：只统计与它同名标签的嵌套层数，遇到同名结束标签时减一
+
+    不维护整体嵌套深度，其他标签未闭合（如 <p> 缺少 </p>）不会影响跟踪
+    """
+
+    def __init__(self, tag: str):
+        self.tag = tag
+        self.open = 1
+
+    def start(self, tag: str):
+        if tag == self.tag:
+            self.open += 1
+
+    def end(self, tag: str) -> bool:
+        """返回该元素是否已闭合"""
+        if tag == self.tag:
+            self.open -= 1
+        return self.open <= 0
+
+
+class _MedalRowScanner(HTMLParser):
+    """
+    只跟踪奖牌行及其中几个字段元素的文本，不保留其他内容
+
+    一行在行元素闭合或遇到下一个奖牌行时结束，因此行内标签不闭合最多影响当前行的字段
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows: List[dict] = []
+        self._row: Optional[dict] = None
+        self._row_element: Optional[_OpenElement] = None
+        self._ranking: Optional[_OpenElement] = None
+        self._field: Optional[str] = None
+        self._field_element: Optional[_OpenElement] = None
+        self._text: List[str] = []
+
+    def _field_for(self, tag: str, classes: set) -> Optional[str]:
+        if "rankHeaderAreaName" in classes:
+            return "country"
+        if "medalImg" in classes:
+            for name, field in (("gold", "gold"), ("silver", "silver"), ("copper", "bronze")):
+                if name in classes:
+                    return field
+        if tag == "span" and self._ranking is not None:
+            return "rank"
+        return None
+
+    def _end_field(self):
+        if self._field is not None:
+            self._row[self._field] = "".join(self._text)
+            self._field = None
+            self._field_element = None
+
+    def _end_row(self):
+        if self._row is None:
+            return
+        self._end_field()
+        try:
+            self.rows.append(make_row(**self._row))
+        except (TypeError, ValueError):
+            pass
+        self._row = None
+        self._row_element = None
+        self._ranking = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _VOID_TAGS:
+            return
+        classes = set((dict(attrs).get("class") or "").split())
+        if "rankContainer" in classes and "rankTable" in classes:
+            # 上一行未正常闭合时在这里结束，不会吞掉后面的行
+            self._end_row()
+            self._row = {}
+            self._row_element = _OpenElement(tag)
+            return
+        if self._row is None:
+            return
+        self._row_element.start(tag)
+        if self._ranking is not None:
+            self._ranking.start(tag)
+        if self._field is not None:
+            self._field_element.start(tag)
+            return
+        field = self._field_for(tag, classes)
+        if "rankHeaderRanking" in classes and self._ranking is None:
+            self._ranking = _OpenElement(tag)
+        # 与 select_one 一致，每个字段只取第一个匹配的元素
+        if field and field not in self._row:
+            self._field = field
+            self._field_element = _OpenElement(tag)
+            self._text = []
+
+    def handle_endtag(self, tag):
+        if self._row is None or tag in _VOID_TAGS:
+            return
+        if self._field is not None and self._field_element.end(tag):
+            self._end_field()
+        if self._ranking is not None and self._ranking.end(tag):
+            self._ranking = None
+        if self._row_element.end(tag):
+            self._end_row()
+
+    def handle_data(self, data):
+        if self._field is not None:
+            self._text.append(data)
+
+    def close(self):
+        super().close()
+        self._end_row()
+
+
+def extract_stream(html: str) -> Optional[List[dict]]:
+    scanner = _MedalRowScanner()
+    scanner.feed(html)
+    scanner.close()
+    return scanner.rows or None
+
+
+# ========== BeautifulSoup（兜底） ==========
+
+def extract_bs4(html: str) -> Optional[List[dict]]:
+    soup = BeautifulSoup(html, 'html.parser')
+    rows = []
+    for row in soup.select('.rankContainer.rankTable'):
+        try:
+            rank_span = row.select_one('.rankHeaderRanking span')
+            rows.append(make_row(
+                country=row.select_one('.rankHeaderAreaName').text,
+                gold=row.select_one('.medalImg.gold').text,
+                silver=row.select_one('.medalImg.silver').text,
+                bronze=row.select_one('.medalImg.copper').text,
+                rank=rank_span.text if rank_span else None,
+            ))
+        except Exception as e:
+            logger.error(f"解析这一行时出错: {e}")
+            continue
+    return rows or None
+
+
+EXTRACTORS: Dict[str, Extractor] = {
+    "json": extract_embedded_json,
+    "lxml": extract_lxml,
+    "stream": extract_stream,
+    "bs4": extract_bs4,
+}
+
+_CLASS_ATTR_PATTERN = re.compile(r"""\bclass\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+
+
+def count_medal_rows(html: str) -> int:
+    """粗略统计页面中奖牌行元素（rankContainer rankTable）的个数，不解析 DOM"""
+    count = 0
+    for match in _CLASS_ATTR_PATTERN.finditer(html):
+        classes = (match.group(1) or match.group(2)).split()
+        if "rankContainer" in classes and "rankTable" in classes:
+            count += 1
+    return count
+
+
+def extract_medal_rows(html: str, engines: Optional[List[str]] = None) -> List[dict]:
+    """
+    按引擎顺序解析奖牌行，全部失败时返回空列表
+
+    解析出的行数少于页面中的奖牌行元素个数时（标签不闭合导致漏行，或内嵌 JSON 取到的是
+    前三名等局部列表），继续尝试下一个引擎；都不完整时返回行数最多的结果
+    """
+    expected = None
+    best: List[dict] = []
+    for name in engines or config.MEDAL_EXTRACTORS:
+        extractor = EXTRACTORS.get(name)
+        if extractor is None:
+            logger.warning(f"未知的奖牌榜解析引擎: {name}")
+            continue
+        try:
+            rows = extractor(html)
+        except Exception as e:
+            logger.warning(f"解析引擎 {name} 出错，尝试下一个: {e}")
+            continue
+        if not rows:
+            continue
+        if expected is None:
+            expected = count_medal_rows(html)
+        if len(rows) < expected:
+            logger.warning(f"解析引擎 {name} 只解析出 {len(rows)}/{expected} 行，尝试下一个")
+            if len(rows) > len(best):
+                best = rows
+            continue
+        logger.debug("奖牌榜由 %s 引擎解析出 %s 行", name, len(rows))
+        return rows
+    return best
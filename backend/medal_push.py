@@ -0,0 +1,125 @@
+"""
+奖牌榜推送
+/api/medals/stream 的 SSE 订阅者管理：奖牌榜变化时把增量行广播给所有连接
+
+- 每条消息只序列化一次，所有连接共享同一个字符串
+- 每个连接一个有界队列；慢客户端队列写满时丢弃积压，只保留一条 resync 消息，
+  客户端收到后整表重新拉取 /api/medals，服务端内存不会随慢连接增长
+- 所有连接共用一个心跳定时器，空闲连接不各自持有计时器；心跳时顺带检查奖牌榜快照是否过期，
+  使非同步进程（多 worker 部署）也能通过 TTL 刷新发现变化并推送
+"""
+import asyncio
+import logging
+from typing import AsyncIterator, Optional, Set
+
+from backend import config
+from backend.db import get_supabase
+from backend.medal_table import MedalTable, medal_table
+from backend.sse import sse_event, sse_comment
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT = sse_comment("ping")
+RESYNC = sse_event({"reason": "lagged"}, event="resync")
+
+
+class MedalBroadcaster:
+    """奖牌榜变化广播"""
+
+    def __init__(self, table: MedalTable, queue_size: int = 8, heartbeat: float = 15, max_clients: int = 10000):
+        self.table = table
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self.max_clients = max_clients
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.dropped = 0
+        table.add_listener(self.publish_changes)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def is_full(self) -> bool:
+        return len(self._subscribers) >= self.max_clients
+
+    def subscribe(self) -> asyncio.Queue:
+        """新建订阅队列"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def publish_changes(self, changes: dict):
+        """MedalTable 监听回调：广播变化行"""
+        self.publish(sse_event(changes, event="diff"))
+
+    def publish(self, message: str):
+        """将已编码的消息放入每个订阅队列"""
+        self.published += 1
+        for queue in self._subscribers:
+            self._offer(queue, message)
+
+    def _offer(self, queue: asyncio.Queue, message: str):
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # 客户端消费太慢：丢弃积压的增量，改为通知其整表重新拉取
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESYNC)
+            self.dropped += 1
+
+    async def _heartbeat_loop(self):
+        while self._subscribers:
+            await asyncio.sleep(self.heartbeat)
+            try:
+                await self.table.ensure_fresh(await get_supabase())
+            except Exception as e:
+                logger.error(f"推送心跳刷新奖牌榜失败: {e}")
+            for queue in self._subscribers:
+                # 队列非空说明连接上已有待发送的数据，无需心跳
+                if queue.empty():
+                    queue.put_nowait(HEARTBEAT)
+
+    async def stream(self) -> AsyncIterator[str]:
+        """
+        单个连接的 SSE 消息流：先发送当前数据版本，之后转发广播消息
+        在响应开始发送时才订阅，连接断开时生成器被关闭并取消订阅
+        """
+        queue = self.subscribe()
+        try:
+            yield sse_event({"version": self.table.data_version}, event="hello")
+            while True:
+                yield await queue.get()
+        finally:
+            self.unsubscribe(queue)
+
+    async def close(self):
+        """关闭心跳任务（应用关闭时调用）"""
+        self._subscribers.clear()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+# 进程级广播器
+medal_broadcaster = MedalBroadcaster(
+    medal_table,
+    queue_size=config.MEDAL_PUSH_QUEUE_SIZE,
+    heartbeat=config.MEDAL_PUSH_HEARTBEAT,
+    max_clients=config.MEDAL_PUSH_MAX_CLIENTS,
+)
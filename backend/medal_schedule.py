@@ -0,0 +1,89 @@
+"""
+奖牌榜自适应轮询
+根据赛事快照中的决赛/奖牌赛安排计算下一次抓取百度奖牌榜的间隔：
+奖牌赛预计结束前后的时间窗口内高频抓取，没有奖牌赛进行时降到低频，
+并限制最小间隔、加入随机抖动，避免对上游造成突发压力
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from backend import config
+from backend.event_store import EventStore, parse_event_time
+
+
+class MedalPollPolicy(BaseModel):
+    """奖牌榜轮询策略（时间单位为秒）"""
+    # 奖牌赛进行中的抓取间隔
+    fast_interval: float = config.MEDAL_POLL_FAST_INTERVAL
+    # 没有奖牌赛进行时的抓取间隔
+    slow_interval: float = config.MEDAL_POLL_SLOW_INTERVAL
+    # 任意两次抓取之间的最小间隔（限流）
+    min_interval: float = config.MEDAL_POLL_MIN_INTERVAL
+    # 奖牌赛从开始到产生结果的预计时长
+    event_duration: float = config.MEDAL_EVENT_DURATION
+    # 高频窗口：预计结束时间之前/之后各延伸多久
+    lead: float = config.MEDAL_POLL_WINDOW_LEAD
+    trail: float = config.MEDAL_POLL_WINDOW_TRAIL
+    # 随机抖动比例，实际间隔在 interval * (1 ± jitter) 之间
+    jitter: float = config.MEDAL_POLL_JITTER
+
+
+class MedalPollScheduler:
+    """根据赛程计算奖牌榜抓取间隔"""
+
+    def __init__(self, policy: Optional[MedalPollPolicy] = None, rng: Optional[random.Random] = None):
+        self.policy = policy or MedalPollPolicy()
+        self._rng = rng or random.Random()
+
+    def windows(self, store: EventStore, now: datetime) -> List[Tuple[datetime, datetime]]:
+        """
+        返回尚未结束的高频抓取窗口，按开始时间升序
+        窗口 = [预计结束 - lead, 预计结束 + trail]，预计结束 = event_time + event_duration
+        """
+        policy = self.policy
+        duration = timedelta(seconds=policy.event_duration)
+        lead = timedelta(seconds=policy.lead)
+        trail = timedelta(seconds=policy.trail)
+        # 只有 event_time 晚于该时间的奖牌赛窗口可能还没结束
+        since = now - duration - trail
+        windows = []
+        for event in store.query(finals_only=True, since=since):
+            expected_end = parse_event_time(event["event_time"]) + duration
+            windows.append((expected_end - lead, expected_end + trail))
+        windows.sort()
+        return windows
+
+    def next_interval(self, store: EventStore, now: Optional[datetime] = None) -> float:
+        """
+        计算距离下一次抓取的秒数
+
+        - 处于任一奖牌赛窗口内：fast_interval
+        - 否则：slow_interval，但不晚于下一个窗口开始
+        - 结果加入抖动，且不小于 min_interval
+        """
+        policy = self.policy
+        # 赛事快照中的时间为 naive UTC
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+        interval = policy.slow_interval
+        for start, end in self.windows(store, now):
+            if start <= now <= end:
+                interval = policy.fast_interval
+                break
+            if start > now:
+                interval = min(interval, (start - now).total_seconds())
+                break
+        if policy.jitter > 0:
+            interval *= 1 + self._rng.uniform(-policy.jitter, policy.jitter)
+        return max(interval, policy.min_interval)
+
+    def is_live(self, store: EventStore, now: Optional[datetime] = None) -> bool:
+        """当前是否处于奖牌赛高频抓取窗口"""
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+        return any(start <= now <= end for start, end in self.windows(store, now))
+
+
+# 进程级调度器
+medal_poll_scheduler = MedalPollScheduler()
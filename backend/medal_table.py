@@ -0,0 +1,220 @@
+"""
+奖牌榜内存快照
+按奥运惯例排名（金、银、铜依次比较，三者都相同则并列同名次），
+由 run_sync 在奖牌数发生变化时增量更新，/api/medals 和 /api/medals/china 直接读取，
+并支持按 ISO 编码 O(1) 查询名次
+
+data_version 取所有行 updated_at 的最大值（毫秒时间戳）：同步只在奖牌数变化时写入并更新
+updated_at，因此它只随数据变化单调递增，且各进程一致，可用于客户端/下游缓存
+
+榜单重新排名后会把变化的行（changes()）通知给监听者，供 /api/medals/stream 推送
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+from fastapi import Depends
+from supabase import Client
+
+from backend import config
+from backend.db import get_supabase, execute_async
+from backend.http_cache import fingerprint
+
+logger = logging.getLogger(__name__)
+
+MEDAL_FIELDS = ("gold", "silver", "bronze")
+# 推送给客户端的增量行字段（按顺序编码为数组）
+DIFF_FIELDS = ("iso", "country", "rank", "gold", "silver", "bronze")
+
+
+def medal_key(row: dict):
+    """排序键：金、银、铜降序，最后按 ISO 保证顺序稳定"""
+    return (-row["gold"], -row["silver"], -row["bronze"], row["iso"])
+
+
+def updated_at_ms(row: dict) -> int:
+    """将 updated_at 转换为毫秒时间戳，无法解析时返回 0"""
+    value = row.get("updated_at")
+    if not value:
+        return 0
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return 0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+class MedalTable:
+    """
+    已排名的奖牌榜
+
+    - load(): 用数据库行整体重建
+    - diff() / patch(): 对比抓取结果，只在奖牌数变化时重新排名
+    - 多进程部署时，非同步进程依靠 TTL 定期从数据库刷新
+    """
+
+    def __init__(self, ttl: float = 60):
+        self.ttl = ttl
+        self.version = 0
+        # 榜单内容摘要，跨进程一致，用于生成 ETag
+        self.fingerprint = ""
+        # 奖牌数据版本（最近一次变化的毫秒时间戳），只增不减
+        self.data_version = 0
+        self.loaded_at: Optional[float] = None
+        self._standings: List[dict] = []
+        self._by_iso: Dict[str, dict] = {}
+        self._refresh_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        # 榜单变化监听者，参数为 changes() 的结果
+        self._listeners: List[Callable[[dict], None]] = []
+
+    # ---------- 构建与更新 ----------
+
+    def load(self, rows: Iterable[dict]):
+        """用数据库行重建奖牌榜"""
+        by_iso = {}
+        for row in rows:
+            entry = dict(row)
+            for field in MEDAL_FIELDS:
+                entry[field] = int(entry.get(field) or 0)
+            by_iso[entry["iso"]] = entry
+        self._rank(by_iso)
+        self.loaded_at = time.monotonic()
+
+    def _rank(self, by_iso: Dict[str, dict]):
+        """排序并计算名次：奖牌数完全相同的国家并列，下一名次顺延（1, 2, 2, 4）"""
+        standings = sorted(by_iso.values(), key=medal_key)
+        previous = None
+        for position, entry in enumerate(standings, 1):
+            counts = (entry["gold"], entry["silver"], entry["bronze"])
+            if counts != previous:
+                rank = position
+                previous = counts
+            entry["rank"] = rank
+            entry["total"] = sum(counts)
+        # 一次性替换引用，读者不会看到排到一半的榜单
+        previous_by_iso = self._by_iso
+        self._standings, self._by_iso = standings, by_iso
+        self.fingerprint = fingerprint(standings)
+        self.data_version = max(self.data_version, max((updated_at_ms(entry) for entry in standings), default=0))
+        self.version += 1
+        # 首次加载没有可对比的旧榜单，不产生变化通知
+        if self._listeners and previous_by_iso:
+            changes = self.changes(previous_by_iso)
+            if changes["rows"] or changes["removed"]:
+                for listener in self._listeners:
+                    try:
+                        listener(changes)
+                    except Exception as e:
+                        logger.error(f"奖牌榜变化通知失败: {e}")
+
+    def changes(self, previous_by_iso: Dict[str, dict]) -> dict:
+        """
+        与旧榜单相比名次、国家名或奖牌数有变化的行（含因他国变化导致的名次变动）
+
+        Returns:
+            {"version": data_version, "fields": DIFF_FIELDS, "rows": [[iso, country, rank, gold, silver, bronze], ...],
+             "removed": [iso, ...]}
+        """
+        rows = []
+        for entry in self._standings:
+            old = previous_by_iso.get(entry["iso"])
+            if old is None or any(old.get(field) != entry[field] for field in DIFF_FIELDS):
+                rows.append([entry[field] for field in DIFF_FIELDS])
+        removed = [iso for iso in previous_by_iso if iso not in self._by_iso]
+        return {"version": self.data_version, "fields": DIFF_FIELDS, "rows": rows, "removed": removed}
+
+    def add_listener(self, listener: Callable[[dict], None]):
+        """注册榜单变化监听者（在重新排名的同一事件循环中同步调用，不应阻塞）"""
+        self._listeners.append(listener)
+
+    def diff(self, scraped: Iterable[dict]) -> List[dict]:
+        """返回与当前榜单相比国家名或奖牌数有变化（含新增国家）的抓取行"""
+        changed = []
+        for item in scraped:
+            current = self._by_iso.get(item["iso"])
+            if current is None or current.get("country") != item["country"] or any(
+                current[field] != item[field] for field in MEDAL_FIELDS
+            ):
+                changed.append(item)
+        return changed
+
+    def patch(self, changed: Iterable[dict]) -> bool:
+        """
+        将变化的行应用到榜单并重新排名
+
+        Returns:
+            True 表示全部打上补丁；False 表示出现新国家（缺少数据库 id），需要调用 refresh() 重新加载
+        """
+        changed = list(changed)
+        if not changed:
+            return True
+        if any(item["iso"] not in self._by_iso for item in changed):
+            return False
+        now = datetime.now(timezone.utc).isoformat()
+        by_iso = {iso: dict(entry) for iso, entry in self._by_iso.items()}
+        for item in changed:
+            entry = by_iso[item["iso"]]
+            entry["country"] = item["country"]
+            for field in MEDAL_FIELDS:
+                entry[field] = int(item[field])
+            entry["updated_at"] = item.get("updated_at") or now
+        self._rank(by_iso)
+        logger.info("奖牌榜已增量更新 %s 个国家 (version=%s)", len(changed), self.version)
+        return True
+
+    async def refresh(self, supabase: Client):
+        """从数据库重新加载奖牌榜"""
+        async with self._refresh_lock:
+            result = await execute_async(supabase.table("medals").select("*"), "medals")
+            self.load(result.data)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    async def ensure_fresh(self, supabase: Client):
+        """首次访问同步加载；之后过期时在后台刷新，当前请求继续使用旧榜单"""
+        if not self.is_loaded:
+            await self.refresh(supabase)
+        elif time.monotonic() - self.loaded_at > self.ttl and (
+            self._refresh_task is None or self._refresh_task.done()
+        ):
+            self._refresh_task = asyncio.create_task(self._background_refresh(supabase))
+
+    async def _background_refresh(self, supabase: Client):
+        try:
+            await self.refresh(supabase)
+        except Exception as e:
+            logger.error(f"后台刷新奖牌榜失败: {e}")
+
+    # ---------- 查询 ----------
+
+    def standings(self) -> List[dict]:
+        """按名次排列的完整奖牌榜"""
+        return self._standings
+
+    def get(self, iso: str) -> Optional[dict]:
+        """按 ISO 编码获取国家奖牌数据（含 rank）"""
+        return self._by_iso.get(iso)
+
+    def rank_of(self, iso: str) -> Optional[int]:
+        entry = self._by_iso.get(iso)
+        return entry["rank"] if entry else None
+
+    def __len__(self):
+        return len(self._standings)
+
+
+# 进程级奖牌榜
+medal_table = MedalTable(ttl=config.MEDAL_TABLE_TTL)
+
+
+async def get_medal_table(supabase: Client = Depends(get_supabase)) -> MedalTable:
+    """FastAPI 依赖：返回已加载的奖牌榜"""
+    await medal_table.ensure_fresh(supabase)
+    return medal_table
@@ -3,8 +3,8 @@ Pydantic数据模型
 定义API请求和响应的数据结构
 """
 from pydantic import BaseModel
-from typing import Optional, Literal
-from datetime import datetime
+from typing import List, Optional, Literal
+from datetime import date, datetime
 
 
 # ========== 赛事相关模型 ==========
@@ -127,3 +127,21 @@ class ReminderResponse(BaseModel):
     id: str
     event_id: str
     user_id: str
+
+
+class ReminderBatchRequest(BaseModel):
+    """批量设置/取消提醒请求：直接给出 event_ids，或按条件从赛程中选取（如当天的中国队决赛）"""
+    user_id: str = "default_user"
+    event_ids: Optional[List[str]] = None
+    event_date: Optional[date] = None
+    team_china_only: bool = False
+    finals_only: bool = False
+
+
+class ReminderBatchResponse(BaseModel):
+    """批量提醒响应"""
+    success: bool
+    count: int
+    event_ids: List[str]
+    # 不存在（或不是合法 ID）而被跳过的赛事
+    skipped: List[str] = []
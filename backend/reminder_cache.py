@@ -0,0 +1,98 @@
+"""
+用户提醒缓存
+按用户缓存已设置提醒的赛事 ID 集合，赛程和精选接口直接从内存标注 reminded，
+提醒的增删由 routers/reminders.py 先写数据库再同步更新缓存（write-through），
+缓存按用户 LRU 淘汰，并带 TTL 以兜底多进程部署下其他进程的写入
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Set
+
+from supabase import Client
+
+from backend import config
+from backend.db import execute_async
+
+logger = logging.getLogger(__name__)
+
+
+class ReminderCache:
+    """用户 -> 已提醒赛事 ID 集合的 LRU 缓存"""
+
+    def __init__(self, max_users: int = 10000, ttl: float = 60):
+        self.max_users = max_users
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[float, Set[str]]]" = OrderedDict()
+        # 正在从数据库加载的用户 -> 并发加载数；以及加载期间发生的写入次数
+        self._loaders: Dict[str, int] = {}
+        self._write_seq: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, supabase: Client, user_id: str) -> FrozenSet[str]:
+        """获取用户已提醒的赛事 ID 集合，未命中时从数据库加载"""
+        entry = self._entries.get(user_id)
+        if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return frozenset(entry[1])
+
+        self.misses += 1
+        self._loaders[user_id] = self._loaders.get(user_id, 0) + 1
+        writes_before = self._write_seq.get(user_id, 0)
+        try:
+            result = await execute_async(
+                supabase.table("user_reminders").select("event_id").eq("user_id", user_id),
+                "user_reminders",
+            )
+            event_ids = {str(r["event_id"]) for r in result.data}
+            # 加载期间有写入时结果可能已过时，本次直接返回但不缓存
+            if self._write_seq.get(user_id, 0) == writes_before:
+                self._store(user_id, event_ids)
+            return frozenset(event_ids)
+        finally:
+            self._loaders[user_id] -= 1
+            if not self._loaders[user_id]:
+                del self._loaders[user_id]
+                self._write_seq.pop(user_id, None)
+
+    def add(self, user_id: str, event_id: str):
+        """数据库写入成功后，将提醒加入缓存"""
+        self._on_write(user_id)
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            entry[1].add(str(event_id))
+
+    def discard(self, user_id: str, event_id: str):
+        """数据库删除成功后，将提醒移出缓存"""
+        self._on_write(user_id)
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            entry[1].discard(str(event_id))
+
+    def invalidate(self, user_id: str):
+        """丢弃用户缓存，下次访问重新加载"""
+        self._on_write(user_id)
+        self._entries.pop(user_id, None)
+
+    def _on_write(self, user_id: str):
+        if user_id in self._loaders:
+            self._write_seq[user_id] = self._write_seq.get(user_id, 0) + 1
+
+    def _store(self, user_id: str, event_ids: Set[str]):
+        self._entries[user_id] = (time.monotonic(), event_ids)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_users:
+            evicted, _ = self._entries.popitem(last=False)
+            logger.debug("提醒缓存淘汰用户: %s", evicted)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# 进程级提醒缓存
+reminder_cache = ReminderCache(
+    max_users=config.REMINDER_CACHE_MAX_USERS,
+    ttl=config.REMINDER_CACHE_TTL,
+)
@@ -0,0 +1,477 @@
+"""
+赛事提醒投递
+把 user_reminders 中的提醒按“开赛时间 - 提前量”排进最小堆，到点后批量投递到通知通道（sink）：
+
+- 堆按触发时间排序，新增 O(log n)；取消只在索引中打删除标记（O(1)），弹出时跳过，删除标记过多时重建堆
+- 开赛时间取自赛事内存快照：每次重新加载时与排队时的开赛时间比较，赛程改期（提前或推迟）后按新时间重新排队；
+  投递前再次核对，已开赛的不再投递
+- 启动时按 created_at 分页加载提醒，之后按 created_at 水位增量加载其他进程新建的提醒；
+  本进程新建/取消的提醒由 routers/reminders.py 直接通知
+- 投递前先向 reminder_deliveries 表批量插入 (reminder_id, lead_minutes)（冲突忽略），
+  只投递本次插入成功的提醒，因此重启、leader 切换后不会重复投递；
+  投递通道出错时删除占位记录并稍后重试
+- 多 worker 部署时只有持有 reminder_dispatch 租约的进程运行
+"""
+import asyncio
+import heapq
+import importlib
+import itertools
+import json
+import logging
+import os
+import time
+from datetime import timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from supabase import Client
+
+from backend import config
+from backend.db import execute_async
+from backend.event_store import EventStore, event_store, parse_event_time
+
+logger = logging.getLogger(__name__)
+
+# 分页加载提醒
+LOAD_PAGE_SIZE = 1000
+# in_ 过滤每次最多携带的 ID 数，避免 URL 过长（414）
+IN_FILTER_CHUNK = 100
+
+TimerKey = Tuple[str, int]
+
+
+class TimerHeap:
+    """带删除标记的最小堆：push/pop O(log n)，cancel O(1)"""
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, TimerKey]] = []
+        # key -> (触发时间, 序号)，堆中序号不一致的条目已失效
+        self._live: Dict[TimerKey, Tuple[float, int]] = {}
+        self._seq = itertools.count()
+
+    def push(self, key: TimerKey, fire_at: float):
+        """加入或改期"""
+        seq = next(self._seq)
+        self._live[key] = (fire_at, seq)
+        heapq.heappush(self._heap, (fire_at, seq, key))
+
+    def cancel(self, key: TimerKey) -> bool:
+        if self._live.pop(key, None) is None:
+            return False
+        # 失效条目超过一半时重建堆，避免大量取消后内存不释放
+        if len(self._heap) > 2 * len(self._live) + 64:
+            self._heap = [(fire_at, seq, key) for key, (fire_at, seq) in self._live.items()]
+            heapq.heapify(self._heap)
+        return True
+
+    def _is_live(self, item) -> bool:
+        fire_at, seq, key = item
+        return self._live.get(key) == (fire_at, seq)
+
+    def next_time(self) -> Optional[float]:
+        """最早的触发时间，堆为空时返回 None"""
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float, limit: int) -> List[TimerKey]:
+        """弹出至多 limit 个已到触发时间的 key"""
+        due = []
+        while len(due) < limit and self._heap and self._heap[0][0] <= now:
+            item = heapq.heappop(self._heap)
+            if self._is_live(item):
+                del self._live[item[2]]
+                due.append(item[2])
+        return due
+
+    def __contains__(self, key: TimerKey) -> bool:
+        return key in self._live
+
+    def __len__(self):
+        return len(self._live)
+
+
+# ========== 投递通道 ==========
+
+class FileSink:
+    """将通知追加写入本地 JSON Lines 文件（开发和测试用）"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    async def send(self, notifications: List[dict]):
+        lines = "".join(json.dumps(n, ensure_ascii=False) + "\n" for n in notifications)
+        await asyncio.to_thread(self._append, lines)
+
+    def _append(self, lines: str):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+class LogSink:
+    """只把通知写入日志"""
+
+    async def send(self, notifications: List[dict]):
+        for n in notifications:
+            logger.info("提醒 [%s] %s", n["user_id"], n["message"])
+
+
+SINKS = {
+    "file": lambda: FileSink(config.REMINDER_SINK_PATH),
+    "log": LogSink,
+}
+
+
+def create_sink(name: str):
+    """
+    按名称创建投递通道：内置 file / log，
+    或 "模块路径:类名" 指定自定义通道（需实现 async send(notifications)）
+    """
+    if name in SINKS:
+        return SINKS[name]()
+    module_name, _, attr = name.partition(":")
+    if not attr:
+        raise ValueError(f"未知的提醒投递通道: {name}")
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+# ========== 调度 ==========
+
+def chunked(items: List, size: int = IN_FILTER_CHUNK):
+    for offset in range(0, len(items), size):
+        yield items[offset:offset + size]
+
+
+def fire_plan(event_ts: float, leads: List[int], now: float) -> List[Tuple[int, float]]:
+    """
+    各提前量（降序）的触发时间
+
+    已错过的提前量只保留最近的一个（例如开赛前 10 分钟才设置提醒，立即补发一次而不是补发多次）
+    """
+    fire_times = [(lead, event_ts - lead * 60) for lead in leads]
+    overdue = [item for item in fire_times if item[1] <= now]
+    return [item for item in fire_times if item[1] > now] + overdue[-1:]
+
+
+def event_timestamp(event: Optional[dict]) -> Optional[float]:
+    """赛事开始时间的 Unix 时间戳（event_time 为 naive UTC）"""
+    if not event:
+        return None
+    event_time = parse_event_time(event.get("event_time"))
+    if event_time is None:
+        return None
+    return event_time.replace(tzinfo=timezone.utc).timestamp()
+
+
+class ReminderDispatcher:
+    """提醒调度与投递"""
+
+    def __init__(
+        self,
+        store: EventStore,
+        sink=None,
+        sink_name: str = "log",
+        lead_minutes: Optional[List[int]] = None,
+        batch_size: int = 500,
+        reload_interval: float = 60,
+        retry_delay: float = 30,
+    ):
+        self.store = store
+        # 投递通道在投递任务启动时才创建（见 open_sink），未启用投递的进程不会加载自定义通道
+        self.sink = sink
+        self.sink_name = sink_name
+        self.lead_minutes = sorted(set(lead_minutes or [30]), reverse=True)
+        self.batch_size = batch_size
+        self.reload_interval = reload_interval
+        self.retry_delay = retry_delay
+        self.timers = TimerHeap()
+        # reminder_id -> (user_id, event_id)，以及按 (user_id, event_id) 反查
+        self._reminders: Dict[str, Tuple[str, str]] = {}
+        self._by_pair: Dict[Tuple[str, str], str] = {}
+        # event_id -> 该赛事的提醒；reminder_id -> 排队时使用的开赛时间，用于发现改期
+        self._by_event: Dict[str, Set[str]] = {}
+        self._event_ts: Dict[str, float] = {}
+        self._watermark: Optional[str] = None
+        self._loaded_at: Optional[float] = None
+        self._wakeup = asyncio.Event()
+        self.delivered = 0
+        self.duplicates = 0
+        self.retried = 0
+        self.rescheduled = 0
+
+    def open_sink(self):
+        """返回投递通道，首次调用时按 sink_name 创建；配置错误时抛出异常"""
+        if self.sink is None:
+            self.sink = create_sink(self.sink_name)
+        return self.sink
+
+    @property
+    def active(self) -> bool:
+        """是否已加载并在本进程投递"""
+        return self._loaded_at is not None
+
+    # ---------- 增删 ----------
+
+    def schedule(self, reminder: dict) -> int:
+        """
+        为一条提醒按各提前量排队（见 fire_plan），返回排队数；已开赛的赛事不排队
+        """
+        reminder_id = str(reminder["id"])
+        user_id, event_id = str(reminder["user_id"]), str(reminder["event_id"])
+        if reminder_id in self._reminders:
+            return 0
+        event_ts = event_timestamp(self.store.get(event_id))
+        now = time.time()
+        if event_ts is None or event_ts <= now:
+            return 0
+        pending = fire_plan(event_ts, self.lead_minutes, now)
+        self._remember(reminder_id, user_id, event_id, event_ts)
+        self._push(reminder_id, pending)
+        return len(pending)
+
+    def _remember(self, reminder_id: str, user_id: str, event_id: str, event_ts: float):
+        self._reminders[reminder_id] = (user_id, event_id)
+        self._by_pair[(user_id, event_id)] = reminder_id
+        self._by_event.setdefault(event_id, set()).add(reminder_id)
+        self._event_ts[reminder_id] = event_ts
+
+    def _push(self, reminder_id: str, pending: List[Tuple[int, float]]):
+        earliest = self.timers.next_time()
+        for lead, fire_at in pending:
+            self.timers.push((reminder_id, lead), fire_at)
+        # 早于当前等待的触发时间时唤醒投递循环
+        if pending and (earliest is None or min(fire_at for _, fire_at in pending) < earliest):
+            self._wakeup.set()
+
+    def reschedule(self) -> int:
+        """
+        按赛事快照中的最新开赛时间重新排队改期的提醒（提前或推迟），返回改期的提醒数
+        赛事已开赛或已从快照中删除时取消其提醒
+        """
+        now = time.time()
+        moved = 0
+        for event_id, reminder_ids in list(self._by_event.items()):
+            event_ts = event_timestamp(self.store.get(event_id))
+            for reminder_id in list(reminder_ids):
+                if self._event_ts.get(reminder_id) == event_ts:
+                    continue
+                if event_ts is None or event_ts <= now:
+                    self._forget(reminder_id)
+                    continue
+                # 只调整尚未触发的提前量，已投递过的不再重复
+                leads = [lead for lead in self.lead_minutes if (reminder_id, lead) in self.timers]
+                pending = fire_plan(event_ts, leads, now)
+                for lead in leads:
+                    self.timers.cancel((reminder_id, lead))
+                self._push(reminder_id, pending)
+                self._event_ts[reminder_id] = event_ts
+                moved += 1
+        if moved:
+            self.rescheduled += moved
+            logger.info("赛程改期，已重新排队 %s 条提醒", moved)
+        return moved
+
+    def cancel(self, user_id: str, event_id: str) -> bool:
+        """取消某用户对某赛事的提醒"""
+        reminder_id = self._by_pair.get((str(user_id), str(event_id)))
+        if reminder_id is None:
+            return False
+        self._forget(reminder_id)
+        return True
+
+    def _forget(self, reminder_id: str):
+        pair = self._reminders.pop(reminder_id, None)
+        if pair is not None:
+            self._by_pair.pop(pair, None)
+            reminder_ids = self._by_event.get(pair[1])
+            if reminder_ids is not None:
+                reminder_ids.discard(reminder_id)
+                if not reminder_ids:
+                    del self._by_event[pair[1]]
+        self._event_ts.pop(reminder_id, None)
+        for lead in self.lead_minutes:
+            self.timers.cancel((reminder_id, lead))
+
+    def reset(self):
+        """清空调度状态（失去 leader 身份时调用，重新成为 leader 后整体重新加载）"""
+        self.timers = TimerHeap()
+        self._reminders.clear()
+        self._by_pair.clear()
+        self._by_event.clear()
+        self._event_ts.clear()
+        self._watermark = None
+        self._loaded_at = None
+
+    # ---------- 加载 ----------
+
+    async def load(self, supabase: Client) -> int:
+        """按 created_at 水位加载新建的提醒（首次加载全部），返回新排队的提醒数"""
+        scheduled = 0
+        offset = 0
+        watermark = self._watermark
+        while True:
+            query = supabase.table("user_reminders").select("id,user_id,event_id,created_at")
+            if watermark:
+                # 与水位相同时间的行会重复读到，schedule() 对已知提醒是幂等的
+                query = query.gte("created_at", watermark)
+            query = query.order("created_at").order("id").range(offset, offset + LOAD_PAGE_SIZE - 1)
+            result = await execute_async(query, "user_reminders")
+            for row in result.data:
+                if self.schedule(row):
+                    scheduled += 1
+                if row.get("created_at") and (self._watermark is None or row["created_at"] > self._watermark):
+                    self._watermark = row["created_at"]
+            if len(result.data) < LOAD_PAGE_SIZE:
+                break
+            offset += LOAD_PAGE_SIZE
+        self._loaded_at = time.monotonic()
+        if scheduled:
+            logger.info("提醒调度已加载 %s 条新提醒，共 %s 个待触发", scheduled, len(self.timers))
+        return scheduled
+
+    # ---------- 投递 ----------
+
+    async def tick(self, supabase: Client) -> float:
+        """加载新提醒并投递所有到期提醒，返回距下一次需要处理的秒数"""
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.reload_interval:
+            await self.store.ensure_fresh(supabase)
+            await self.load(supabase)
+            self.reschedule()
+        while True:
+            due = self.timers.pop_due(time.time(), self.batch_size)
+            if not due:
+                break
+            await self._dispatch(supabase, due)
+        delay = self.reload_interval - (time.monotonic() - self._loaded_at)
+        next_time = self.timers.next_time()
+        if next_time is not None:
+            delay = min(delay, next_time - time.time())
+        return max(delay, 0.0)
+
+    async def wait(self, timeout: float):
+        """等待到超时，或有更早触发的新提醒加入"""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _dispatch(self, supabase: Client, due: List[TimerKey]):
+        now = time.time()
+        candidates = []
+        for reminder_id, lead in due:
+            pair = self._reminders.get(reminder_id)
+            if pair is None:
+                continue
+            event = self.store.get(pair[1])
+            event_ts = event_timestamp(event)
+            if event_ts is not None and event_ts - lead * 60 > now:
+                # 赛程改期到更晚（快照在两次重新加载之间已更新），按新时间重新排队
+                self.timers.push((reminder_id, lead), event_ts - lead * 60)
+                self._event_ts[reminder_id] = event_ts
+                continue
+            if event_ts is not None and event_ts > now:
+                candidates.append((reminder_id, lead, pair, event, event_ts))
+            if not any((reminder_id, other) in self.timers for other in self.lead_minutes):
+                self._forget(reminder_id)
+        if not candidates:
+            return
+
+        # 跳过已被其他进程取消的提醒
+        existing = set()
+        for chunk in chunked(list({c[0] for c in candidates})):
+            result = await execute_async(
+                supabase.table("user_reminders").select("id").in_("id", chunk),
+                "user_reminders",
+            )
+            existing.update(str(row["id"]) for row in result.data)
+        candidates = [c for c in candidates if c[0] in existing]
+        if not candidates:
+            return
+
+        # 先占位再投递：冲突的行不会返回，说明已由之前的进程投递过
+        result = await execute_async(
+            supabase.table("reminder_deliveries").upsert(
+                [{"reminder_id": c[0], "lead_minutes": c[1]} for c in candidates],
+                on_conflict="reminder_id,lead_minutes",
+                ignore_duplicates=True,
+            ),
+            "reminder_deliveries",
+        )
+        claimed = {(str(row["reminder_id"]), int(row["lead_minutes"])) for row in result.data}
+        self.duplicates += len(candidates) - len(claimed)
+
+        notifications = []
+        sent = []
+        for reminder_id, lead, (user_id, event_id), event, event_ts in candidates:
+            if (reminder_id, lead) not in claimed:
+                continue
+            sent.append((reminder_id, lead, (user_id, event_id), event_ts))
+            minutes_left = max(1, round((event_ts - now) / 60))
+            notifications.append({
+                "reminder_id": reminder_id,
+                "user_id": user_id,
+                "event_id": event_id,
+                "title": event.get("title"),
+                "sport": event.get("sport"),
+                "location": event.get("location"),
+                "event_time": event.get("event_time"),
+                "lead_minutes": lead,
+                "message": f"{event.get('title')} 将在 {minutes_left} 分钟后开始",
+            })
+        if not notifications:
+            return
+        try:
+            await self.open_sink().send(notifications)
+            self.delivered += len(notifications)
+        except Exception as e:
+            logger.error(f"投递 {len(notifications)} 条提醒失败，{self.retry_delay:g} 秒后重试: {e}")
+            await self._release(supabase, sent)
+
+    async def _release(self, supabase: Client, sent: List[Tuple[str, int, Tuple[str, str], float]]):
+        """投递失败：删除占位记录并重新排队，稍后重试"""
+        by_lead: Dict[int, List[str]] = {}
+        for reminder_id, lead, _, _ in sent:
+            by_lead.setdefault(lead, []).append(reminder_id)
+        try:
+            for lead, reminder_ids in by_lead.items():
+                for chunk in chunked(reminder_ids):
+                    await execute_async(
+                        supabase.table("reminder_deliveries").delete()
+                        .eq("lead_minutes", lead).in_("reminder_id", chunk),
+                        "reminder_deliveries",
+                    )
+        except Exception as e:
+            # 占位记录仍在，其他进程也不会再投递这些提醒
+            logger.error(f"删除提醒占位记录失败，{len(sent)} 条提醒不再重试: {e}")
+            return
+        retry_at = time.time() + self.retry_delay
+        for reminder_id, lead, (user_id, event_id), event_ts in sent:
+            if event_ts <= retry_at:
+                continue
+            if reminder_id not in self._reminders:
+                self._remember(reminder_id, user_id, event_id, event_ts)
+            self._push(reminder_id, [(lead, retry_at)])
+            self.retried += 1
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "reminders": len(self._reminders),
+            "pending": len(self.timers),
+            "delivered": self.delivered,
+            "duplicates": self.duplicates,
+            "retried": self.retried,
+            "rescheduled": self.rescheduled,
+        }
+
+
+# 进程级提醒调度器
+reminder_dispatcher = ReminderDispatcher(
+    event_store,
+    sink_name=config.REMINDER_SINK,
+    lead_minutes=config.REMINDER_LEAD_MINUTES,
+    batch_size=config.REMINDER_DISPATCH_BATCH,
+    reload_interval=config.REMINDER_DISPATCH_RELOAD,
+    retry_delay=config.REMINDER_RETRY_DELAY,
+)
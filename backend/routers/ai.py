@@ -2,12 +2,19 @@
 AI助手API路由
 使用httpx直接调用智谱GLM-4.7-Flash REST API
 """
-from fastapi import APIRouter
-import httpx
-from typing import Optional  # 修复返回值类型注解
+from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+from typing import AsyncIterator, Optional  # 修复返回值类型注解
 
+from backend import config
 from backend.config import ZHIPU_API_KEY, BOCHA_API_KEY
 from backend.models import AIAthleteRequest, AIEventRequest, AIResponse
+from backend.async_cache import AsyncTTLCache, normalize_key
+from backend.auth import require_admin
+from backend.upstream import get_upstream_client, upstream_stats
+from backend.sse import sse_event, sse_response
+from backend.event_store import EventStore, get_event_store
 
 router = APIRouter(prefix="/api/ai", tags=["ai"])
 
@@ -16,8 +23,25 @@ ZHIPU_API_URL = "https://open.bigmodel.cn/api/paas/v4/chat/completions"
 # 博查 AI API 端点
 BOCHA_API_URL = "https://api.bochaai.com/v1/web-search"
 
+# 运动员简介/赛事预测结果缓存（按规范化后的名称/标题）
+insight_cache = AsyncTTLCache(
+    "ai_insight",
+    max_size=config.AI_CACHE_MAX_ENTRIES,
+    ttl=config.AI_CACHE_TTL,
+    stale_ttl=config.AI_CACHE_STALE_TTL,
+)
 
-async def call_bocha_search(query: str) -> str:
+# 博查搜索结果缓存（按规范化后的搜索词），与生成结果分开缓存：
+# 背景信息变化很慢，即使生成结果没有命中缓存也可以复用
+search_cache = AsyncTTLCache(
+    "bocha_search",
+    max_size=config.AI_SEARCH_CACHE_MAX_ENTRIES,
+    ttl=config.AI_SEARCH_CACHE_TTL,
+    stale_ttl=config.AI_SEARCH_CACHE_STALE_TTL,
+)
+
+
+async def call_bocha_search(query: str, timeout: float = 20.0) -> str:
     """
     调用博查联网搜索 API 获取实时背景信息
     """
@@ -39,39 +63,39 @@ async def call_bocha_search(query: str) -> str:
     
     print(f"Calling BOCHA API for: {query}...")
     
-    async with httpx.AsyncClient() as client:
-        try:
-            # 去掉代理，直接连接
-            response = await client.post(
-                BOCHA_API_URL,
-                headers=headers,
-                json=payload,
-                timeout=20.0
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                # 优先获取 AI 总结结果
-                summary = data.get("data", {}).get("summary", "")
-                if summary:
-                    print(f"BOCHA Search Summary Success: {summary[:50]}...")
-                    return summary
-                
-                # 如果没有 AI 总结，拼接网页片段
-                web_pages = data.get("data", {}).get("webPages", {}).get("value", [])
-                if web_pages:
-                    snippets = "\n".join([f"- {p.get('name')}: {p.get('snippet')}" for p in web_pages[:5]])
-                    print(f"BOCHA Search Snippets Success: {len(web_pages)} pages found.")
-                    return snippets
-            else:
-                print(f"BOCHA API Error: {response.status_code} - {response.text}")
-        except Exception as e:
-            print(f"BOCHA API Exception: {str(e)}")
+    client = get_upstream_client("bocha")
+    try:
+        # 去掉代理，直接连接
+        response = await client.post(
+            BOCHA_API_URL,
+            headers=headers,
+            json=payload,
+            timeout=timeout
+        )
+        
+        if response.status_code == 200:
+            data = response.json()
+            # 优先获取 AI 总结结果
+            summary = data.get("data", {}).get("summary", "")
+            if summary:
+                print(f"BOCHA Search Summary Success: {summary[:50]}...")
+                return summary
             
+            # 如果没有 AI 总结，拼接网页片段
+            web_pages = data.get("data", {}).get("webPages", {}).get("value", [])
+            if web_pages:
+                snippets = "\n".join([f"- {p.get('name')}: {p.get('snippet')}" for p in web_pages[:5]])
+                print(f"BOCHA Search Snippets Success: {len(web_pages)} pages found.")
+                return snippets
+        else:
+            print(f"BOCHA API Error: {response.status_code} - {response.text}")
+    except Exception as e:
+        print(f"BOCHA API Exception: {str(e)}")
+        
     return ""
 
 
-async def call_glm_api(prompt: str) -> Optional[str]:
+async def call_glm_api(prompt: str, timeout: float = 60.0) -> Optional[str]:
     """
     调用智谱 GLM-4.7-Flash API 生成内容
     """
@@ -101,70 +125,340 @@ async def call_glm_api(prompt: str) -> Optional[str]:
     
     print(f"Calling ZHIPU API for prompt length: {len(prompt)}...")
     
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                ZHIPU_API_URL,
-                headers=headers,
-                json=payload,
-                timeout=60.0
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                # 提取生成的文本 (OpenAI 格式)
-                choices = data.get("choices", [])
-                if choices:
-                    message = choices[0].get("message", {})
-                    content = message.get("content", "").strip()
-                    
-                    if content:
-                        print(f"ZHIPU API Success: {content[:30]}...")
-                        return content
-                    else:
-                        print("ZHIPU API Error: Empty content in response")
-                        # 如果 content 为空，检查是否有其他可用字段
-                        reasoning = message.get("reasoning_content", "").strip()
-                        if reasoning:
-                            print(f"Found reasoning_content instead: {reasoning[:30]}...")
-                            return reasoning
-            else:
-                print(f"ZHIPU API Error: {response.status_code} - {response.text}")
-        except Exception as e:
-            print(f"ZHIPU API Exception: {str(e)}")
-            import traceback
-            traceback.print_exc()
+    client = get_upstream_client("zhipu")
+    try:
+        response = await client.post(
+            ZHIPU_API_URL,
+            headers=headers,
+            json=payload,
+            timeout=timeout
+        )
         
+        if response.status_code == 200:
+            data = response.json()
+            # 提取生成的文本 (OpenAI 格式)
+            choices = data.get("choices", [])
+            if choices:
+                message = choices[0].get("message", {})
+                content = message.get("content", "").strip()
+                
+                if content:
+                    print(f"ZHIPU API Success: {content[:30]}...")
+                    return content
+                else:
+                    print("ZHIPU API Error: Empty content in response")
+                    # 如果 content 为空，检查是否有其他可用字段
+                    reasoning = message.get("reasoning_content", "").strip()
+                    if reasoning:
+                        print(f"Found reasoning_content instead: {reasoning[:30]}...")
+                        return reasoning
+        else:
+            print(f"ZHIPU API Error: {response.status_code} - {response.text}")
+    except Exception as e:
+        print(f"ZHIPU API Exception: {str(e)}")
+        import traceback
+        traceback.print_exc()
+    
+    return None
+
+
+async def stream_glm_api(prompt: str, timeout: float = 60.0) -> AsyncIterator[str]:
+    """
+    以流式方式调用智谱 API（stream=true），逐段产出生成的文本
+    上游失败时抛出异常，由调用方转换为 SSE 错误事件
+    """
+    if not ZHIPU_API_KEY:
+        raise RuntimeError("ZHIPU_API_KEY is missing!")
+
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {ZHIPU_API_KEY}"
+    }
+    payload = {
+        "model": "glm-4-flash",
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.7,
+        "max_tokens": 500,
+        "stream": True
+    }
+
+    print(f"Streaming ZHIPU API for prompt length: {len(prompt)}...")
+
+    client = get_upstream_client("zhipu")
+    async with client.stream("POST", ZHIPU_API_URL, headers=headers, json=payload, timeout=timeout) as response:
+        if response.status_code != 200:
+            body = await response.aread()
+            raise RuntimeError(f"ZHIPU API Error: {response.status_code} - {body.decode('utf-8', 'replace')}")
+
+        reasoning = []
+        has_content = False
+        async for line in response.aiter_lines():
+            # OpenAI 兼容的 SSE 格式：每行 "data: {...}"，以 "data: [DONE]" 结束
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            chunk = json.loads(data)
+            if chunk.get("error"):
+                # 上游在流中途返回错误（如内容审核、限流）
+                raise RuntimeError(f"ZHIPU API Error: {chunk['error']}")
+            choices = chunk.get("choices", [])
+            if not choices:
+                continue
+            delta = choices[0].get("delta", {})
+            content = delta.get("content")
+            if content:
+                has_content = True
+                yield content
+            elif delta.get("reasoning_content"):
+                reasoning.append(delta["reasoning_content"])
+
+        # 与 call_glm_api 一致：content 为空时退回 reasoning_content
+        if not has_content and reasoning:
+            yield "".join(reasoning).strip()
+
+
+async def cached_bocha_search(query: str, timeout: float = 20.0) -> str:
+    """带缓存的联网搜索，空结果（搜索失败）不缓存"""
+    return await search_cache.get_or_load(
+        normalize_key(query),
+        lambda: call_bocha_search(query, timeout=timeout),
+        cacheable=bool,
+    )
+
+
+async def prewarm_search_cache(store: EventStore) -> dict:
+    """
+    预先为所有赛事标题和 AI_PREWARM_ATHLETES 中的中国运动员填充搜索缓存，
+    用户首次查询时无需等待联网搜索；已缓存的搜索词跳过
+    """
+    queries = {}
+    for event in store.query():
+        if event.get("title"):
+            query = event_search_query(sanitize_input(event["title"]))
+            queries.setdefault(normalize_key(query), query)
+    for name in config.AI_PREWARM_ATHLETES:
+        query = athlete_search_query(sanitize_input(name))
+        queries.setdefault(normalize_key(query), query)
+
+    todo = [query for key, query in queries.items() if search_cache.get(key) is None]
+    semaphore = asyncio.Semaphore(config.AI_SEARCH_PREWARM_CONCURRENCY)
+
+    async def warm(query: str) -> bool:
+        async with semaphore:
+            return bool(await cached_bocha_search(query))
+
+    results = await asyncio.gather(*(warm(query) for query in todo), return_exceptions=True)
+    summary = {
+        "total": len(queries),
+        "skipped": len(queries) - len(todo),
+        "loaded": sum(1 for result in results if result is True),
+        "failed": sum(1 for result in results if result is not True),
+    }
+    print(f"Search cache prewarm finished: {summary}")
+    return summary
+
+
+# 正在进行的搜索缓存预热任务，同一时间只运行一个
+_prewarm_task: Optional[asyncio.Task] = None
+
+
+def start_search_prewarm(store: EventStore) -> Optional[asyncio.Task]:
+    """在后台启动搜索缓存预热；已有预热在进行时返回 None"""
+    global _prewarm_task
+    if _prewarm_task is not None and not _prewarm_task.done():
         return None
+    _prewarm_task = asyncio.create_task(prewarm_search_cache(store))
+    # 取走异常，避免 "exception was never retrieved" 警告
+    _prewarm_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    return _prewarm_task
 
 
-@router.post("/athlete", response_model=AIResponse)
-async def get_athlete_insight(request: AIAthleteRequest):
+async def stream_insight(cache_key, search_query: str, build_prompt, subject: str) -> AsyncIterator[str]:
     """
-    获取运动员简介
-    先通过博查联网搜索实时信息，再由智谱生成总结
+    流式生成 AI 内容的 SSE 事件流
+    缓存命中时一次性返回；否则先联网搜索，再逐段转发智谱的增量输出，完整结果写入缓存
+    与 run_insight_pipeline 相同，整个请求不超过 AI_DEADLINE 秒，联网搜索最多占用其中 AI_SEARCH_BUDGET_RATIO
+    事件格式：event: status（阶段提示，首字节不等待搜索） -> data: {"delta": ...}（多次） -> event: done；
+    失败或超时时 event: error（已推送的部分内容不写入缓存）
     """
-    safe_athlete_name = request.athlete_name.strip().replace("\n", "").replace('"', '').replace("'", "")
-    
-    # 1. 联网搜索相关信息
-    search_query = f"2026年米兰冬奥会 中国运动员 {safe_athlete_name} 个人简介 运动成就 最新消息"
-    search_context = await call_bocha_search(search_query)
-    
-    # 2. 构造提示词
+    cached = insight_cache.get(cache_key)
+    if cached:
+        yield sse_event({"delta": cached})
+        yield sse_event({"success": True, "cached": True}, event="done")
+        return
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + config.AI_DEADLINE
+
+    def remaining() -> float:
+        return max(deadline - loop.time(), 0.0)
+
+    chunks = []
+    # 先下发阶段提示让客户端立即收到首字节
+    yield sse_event({"stage": "searching"}, event="status")
+    stream = None
+    try:
+        search_context = await search_within_budget(search_query, config.AI_DEADLINE * config.AI_SEARCH_BUDGET_RATIO)
+        yield sse_event({"stage": "generating"}, event="status")
+        stream = stream_glm_api(build_prompt(subject, search_context), timeout=remaining())
+        while True:
+            # 每一段都只等待到截止时间，上游卡住时不会无限期占用连接
+            try:
+                delta = await asyncio.wait_for(stream.__anext__(), timeout=remaining())
+            except StopAsyncIteration:
+                break
+            chunks.append(delta)
+            yield sse_event({"delta": delta})
+    except asyncio.TimeoutError:
+        print(f"AI stream exceeded {config.AI_DEADLINE:.0f}s deadline")
+        yield sse_event({"success": False, "message": "AI 助手响应超时，请稍后再试。"}, event="error")
+        return
+    except Exception as e:
+        print(f"ZHIPU stream error: {e}")
+        yield sse_event({"success": False, "message": "AI 助手服务异常，请稍后再试。"}, event="error")
+        return
+    finally:
+        if stream is not None:
+            await stream.aclose()
+
+    text = "".join(chunks).strip()
+    if not text:
+        yield sse_event({"success": False, "message": "AI 助手暂时无法回答，请稍后再试。"}, event="error")
+        return
+    insight_cache.set(cache_key, text)
+    yield sse_event({"success": True, "cached": False}, event="done")
+
+
+def sanitize_input(text: str) -> str:
+    """去除换行和引号，防止提示词注入"""
+    return text.strip().replace("\n", "").replace('"', '').replace("'", "")
+
+
+def build_athlete_prompt(safe_athlete_name: str, search_context: str) -> str:
+    """构造运动员简介提示词"""
     if search_context:
-        prompt = f"""你是一名专业的体育评论员。基于以下联网实时搜索到的背景信息，请为准备参加2026年米兰-科尔蒂纳冬奥会的中国运动员 {safe_athlete_name} 提供一段简短且鼓舞人心的总结（最多1000字）。
+        return f"""你是一名专业的体育评论员。基于以下联网实时搜索到的背景信息，请为准备参加2026年米兰-科尔蒂纳冬奥会的中国运动员 {safe_athlete_name} 提供一段简短且鼓舞人心的总结（最多1000字）。
 
 【联网实时背景信息】：
 {search_context}
 
 请结合以上背景信息，重点介绍他们的专长、运动特点、主要成就和近期动态。如果信息不足，请基于通用知识并注明。
 请使用专业的体育知识回答，语调积极向上，并使用中文回复。"""
-    else:
-        prompt = f"""你是一名专业的体育评论员，请为准备参加2026年米兰-科尔蒂纳冬奥会的中国运动员 {safe_athlete_name} 提供一段简短且鼓舞人心的总结（最多1000字）。
+    return f"""你是一名专业的体育评论员，请为准备参加2026年米兰-科尔蒂纳冬奥会的中国运动员 {safe_athlete_name} 提供一段简短且鼓舞人心的总结（最多1000字）。
 重点介绍他们的专长、运动项目、运动成就和运动精神，并使用中文回复。"""
+
+
+def build_event_prompt(safe_event_title: str, search_context: str) -> str:
+    """构造赛事预测提示词"""
+    if search_context:
+        return f"""你是一个专业的赛事预测与分析助手。基于以下联网实时搜索到的最新信息，请预测冬奥会项目 "{safe_event_title}" 的比赛前景和可能的结果。
+
+【联网实时赛况与分析】：
+{search_context}
+
+你的风格是专业、分析透彻且客观。请分析各代表队或运动员的优势和短板，并使用“概率更高”、“略显优势”、“胜负难料”等客观表述。
+字数控制在1000字以内，请使用中文回复。"""
+    return f"""你是一个专业的赛事预测与分析助手，专注于为用户提供赛事前瞻和关键看点分析。
+请预测冬奥会项目 "{safe_event_title}" 的最终比赛结果，分析可能的优势和短板。
+字数控制在1000字以内，请使用中文回复。"""
+
+
+def athlete_search_query(safe_athlete_name: str) -> str:
+    return f"2026年米兰冬奥会 中国运动员 {safe_athlete_name} 个人简介 运动成就 最新消息"
+
+
+def event_search_query(safe_event_title: str) -> str:
+    return f"2026年米兰冬奥会 {safe_event_title} 赛事分析 实力对比 夺金分析"
+
+
+async def search_within_budget(query: str, budget: float) -> str:
+    """在预算时间内完成联网搜索，超时则放弃搜索上下文（返回空字符串）"""
+    try:
+        return await asyncio.wait_for(cached_bocha_search(query, timeout=budget), timeout=budget)
+    except asyncio.TimeoutError:
+        print(f"BOCHA search exceeded {budget:.1f}s budget, generating without context")
+        return ""
+
+
+async def run_insight_pipeline(search_query: str, build_prompt, subject: str) -> Optional[str]:
+    """
+    带端到端截止时间的“搜索 -> 生成”流水线
+
+    - 整个请求不超过 AI_DEADLINE 秒，联网搜索最多占用其中 AI_SEARCH_BUDGET_RATIO 的时间，
+      超时后不带搜索上下文直接生成
+    - 开启 AI_SPECULATIVE_GENERATION 时，搜索的同时先发起一次不带上下文的生成，
+      与带上下文的生成竞争，截止时间内先得到的可用结果胜出
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + config.AI_DEADLINE
+    search_budget = config.AI_DEADLINE * config.AI_SEARCH_BUDGET_RATIO
+
+    def remaining() -> float:
+        return max(deadline - loop.time(), 0.0)
+
+    search_task = asyncio.create_task(search_within_budget(search_query, search_budget))
+    pending = {search_task}
+    if config.AI_SPECULATIVE_GENERATION:
+        pending.add(asyncio.create_task(call_glm_api(build_prompt(subject, ""), timeout=config.AI_DEADLINE)))
+
+    try:
+        # 任一生成任务返回可用结果即结束；全部失败或到达截止时间则返回 None
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=remaining(), return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                print(f"AI pipeline exceeded {config.AI_DEADLINE:.0f}s deadline")
+                return None
+            for task in done:
+                if task is search_task:
+                    search_context = task.result()
+                    # 没有搜索结果且推测性生成仍在进行时，无需再发起一次相同的生成
+                    if search_context or not pending:
+                        pending.add(asyncio.create_task(
+                            call_glm_api(build_prompt(subject, search_context), timeout=remaining())
+                        ))
+                elif not task.cancelled() and task.exception() is None and task.result():
+                    return task.result()
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def generate_athlete_insight(safe_athlete_name: str) -> Optional[str]:
+    """
+    生成运动员简介
+    先通过博查联网搜索实时信息，再由智谱生成总结
+    """
+    return await run_insight_pipeline(
+        athlete_search_query(safe_athlete_name), build_athlete_prompt, safe_athlete_name
+    )
+
+
+async def generate_event_prediction(safe_event_title: str) -> Optional[str]:
+    """
+    生成赛事预测
+    先通过博查联网搜索实时赛况，再由智谱分析
+    """
+    return await run_insight_pipeline(
+        event_search_query(safe_event_title), build_event_prompt, safe_event_title
+    )
+
+
+@router.post("/athlete", response_model=AIResponse)
+async def get_athlete_insight(request: AIAthleteRequest):
+    """
+    获取运动员简介
+    相同运动员的结果会被缓存，并发的相同请求只调用一次上游
+    """
+    safe_athlete_name = sanitize_input(request.athlete_name)
     
     try:
-        result = await call_glm_api(prompt)
+        result = await insight_cache.get_or_load(
+            ("athlete", normalize_key(safe_athlete_name)),
+            lambda: generate_athlete_insight(safe_athlete_name),
+        )
         if result:
             return AIResponse(success=True, message=result)
         else:
@@ -178,30 +472,15 @@ async def get_athlete_insight(request: AIAthleteRequest):
 async def get_event_prediction(request: AIEventRequest):
     """
     获取赛事预测
-    先通过博查联网搜索实时赛况，再由智谱分析
+    相同赛事的结果会被缓存，并发的相同请求只调用一次上游
     """
-    safe_event_title = request.event_title.strip().replace("\n", "").replace('"', '').replace("'", "")
-    
-    # 1. 联网搜索实时赛况和预测
-    search_query = f"2026年米兰冬奥会 {safe_event_title} 赛事分析 实力对比 夺金分析"
-    search_context = await call_bocha_search(search_query)
-    
-    # 2. 构造提示词
-    if search_context:
-        prompt = f"""你是一个专业的赛事预测与分析助手。基于以下联网实时搜索到的最新信息，请预测冬奥会项目 "{safe_event_title}" 的比赛前景和可能的结果。
-
-【联网实时赛况与分析】：
-{search_context}
-
-你的风格是专业、分析透彻且客观。请分析各代表队或运动员的优势和短板，并使用“概率更高”、“略显优势”、“胜负难料”等客观表述。
-字数控制在1000字以内，请使用中文回复。"""
-    else:
-        prompt = f"""你是一个专业的赛事预测与分析助手，专注于为用户提供赛事前瞻和关键看点分析。
-请预测冬奥会项目 "{safe_event_title}" 的最终比赛结果，分析可能的优势和短板。
-字数控制在1000字以内，请使用中文回复。"""
+    safe_event_title = sanitize_input(request.event_title)
     
     try:
-        result = await call_glm_api(prompt)
+        result = await insight_cache.get_or_load(
+            ("event", normalize_key(safe_event_title)),
+            lambda: generate_event_prediction(safe_event_title),
+        )
         if result:
             return AIResponse(success=True, message=result)
         else:
@@ -209,3 +488,51 @@ async def get_event_prediction(request: AIEventRequest):
     except Exception as e:
         print(f"Event prediction error: {e}")
         return AIResponse(success=False, message="AI 助手服务异常，请检查网络。")
+
+
+@router.post("/athlete/stream")
+async def stream_athlete_insight(request: AIAthleteRequest):
+    """
+    流式获取运动员简介（SSE）
+    与 /athlete 内容一致，生成过程中逐段推送，缩短首字节时间
+    """
+    safe_athlete_name = sanitize_input(request.athlete_name)
+    return sse_response(stream_insight(
+        ("athlete", normalize_key(safe_athlete_name)),
+        athlete_search_query(safe_athlete_name),
+        build_athlete_prompt,
+        safe_athlete_name,
+    ))
+
+
+@router.post("/event/stream")
+async def stream_event_prediction(request: AIEventRequest):
+    """
+    流式获取赛事预测（SSE）
+    与 /event 内容一致，生成过程中逐段推送，缩短首字节时间
+    """
+    safe_event_title = sanitize_input(request.event_title)
+    return sse_response(stream_insight(
+        ("event", normalize_key(safe_event_title)),
+        event_search_query(safe_event_title),
+        build_event_prompt,
+        safe_event_title,
+    ))
+
+
+@router.get("/stats", dependencies=[Depends(require_admin)])
+async def get_ai_stats():
+    """AI 上游连接耗时和结果缓存命中统计（需要管理令牌）"""
+    return {
+        "upstream": upstream_stats(),
+        "cache": {**insight_cache.stats, "size": len(insight_cache)},
+        "search_cache": {**search_cache.stats, "size": len(search_cache)},
+    }
+
+
+@router.post("/search-cache/prewarm", dependencies=[Depends(require_admin)])
+async def prewarm_search(store: EventStore = Depends(get_event_store)):
+    """在后台为所有赛事和中国运动员预取联网搜索结果（需要管理令牌，会产生博查 API 调用费用）"""
+    if start_search_prewarm(store) is None:
+        raise HTTPException(status_code=409, detail="搜索缓存预热正在进行中")
+    return {"success": True, "message": "搜索缓存预热已开始"}
@@ -2,80 +2,70 @@
 赛事API路由
 提供赛事列表、精选赛事等接口
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from typing import List, Optional
-from datetime import datetime, date
-from supabase import create_client, Client
+from datetime import date
+from supabase import Client
 
-from backend.config import SUPABASE_URL, SUPABASE_KEY
-from backend.models import EventResponse, EventCreate
+from backend import config
+from backend.auth import require_admin
+from backend.db import get_supabase
+from backend.event_store import EventStore, event_store, get_event_store
+from backend.featured import featured_ranker
+from backend.reminder_cache import reminder_cache
+from backend.http_cache import make_etag, cached_json
+from backend.models import EventResponse
 
 router = APIRouter(prefix="/api/events", tags=["events"])
 
-def get_supabase() -> Client:
-    """获取Supabase客户端"""
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+
+def to_event_response(event: dict, reminded_event_ids: set) -> EventResponse:
+    """将赛事行转换为响应模型"""
+    return EventResponse(
+        id=event["id"],
+        sport=event["sport"],
+        discipline=event["discipline"],
+        title=event["title"],
+        event_time=event["event_time"],
+        location=event["location"],
+        is_team_china=event["is_team_china"],
+        type=event["type"],
+        reminded=str(event["id"]) in reminded_event_ids
+    )
+
+
+def events_etag(store: EventStore, events: List[dict], reminded_event_ids) -> str:
+    """赛事列表的 ETag：快照版本 + 返回的赛事 + 其中已提醒的赛事"""
+    event_ids = [str(event["id"]) for event in events]
+    return make_etag(store.fingerprint, event_ids, [i for i in event_ids if i in reminded_event_ids])
 
 
 @router.get("", response_model=List[EventResponse])
 async def get_events(
+    request: Request,
     event_date: Optional[date] = Query(None, description="筛选指定日期的赛事"),
     team_china_only: bool = Query(False, description="仅显示中国队参赛项目"),
-    user_id: str = Query("default_user", description="用户ID，用于获取提醒状态")
+    user_id: str = Query("default_user", description="用户ID，用于获取提醒状态"),
+    supabase: Client = Depends(get_supabase),
+    store: EventStore = Depends(get_event_store)
 ):
     """
     获取赛事列表
-    支持按日期和中国队筛选
+    支持按日期和中国队筛选，赛事数据来自内存快照
     """
-    supabase = get_supabase()
-    
     try:
-        # 构建查询
-        query = supabase.table("events").select("*")
-        
-        # 按日期筛选 (北京时间)
-        if event_date:
-            # 用户选择的是北京时间 D 日 (00:00 - 24:00)
-            # 对应的意大利时间 (CET, UTC+1) = 北京时间 (UTC+8) - 7h
-            # 所以我们要找意大利时间在 (D日 00:00 - 7h) 到 (D+1日 00:00 - 7h) 之间的比赛
-            from datetime import timedelta
-            bj_start = datetime.combine(event_date, datetime.min.time())
-            it_start = bj_start - timedelta(hours=7)
-            it_end = it_start + timedelta(days=1)
-            
-            query = query.gte("event_time", it_start.isoformat())
-            query = query.lt("event_time", it_end.isoformat())
-        
-        # 中国队筛选
-        if team_china_only:
-            query = query.eq("is_team_china", True)
-        
-        # 按时间排序
-        query = query.order("event_time", desc=False)
-        
-        result = query.execute()
-        events = result.data
-        
-        # 获取用户提醒状态
-        reminders_result = supabase.table("user_reminders").select("event_id").eq("user_id", user_id).execute()
-        reminded_event_ids = {r["event_id"] for r in reminders_result.data}
-        
-        # 组装响应
-        response_events = []
-        for event in events:
-            response_events.append(EventResponse(
-                id=event["id"],
-                sport=event["sport"],
-                discipline=event["discipline"],
-                title=event["title"],
-                event_time=event["event_time"],
-                location=event["location"],
-                is_team_china=event["is_team_china"],
-                type=event["type"],
-                reminded=event["id"] in reminded_event_ids
-            ))
-        
-        return response_events
+        # 按日期（北京时间）和中国队筛选，结果已按时间排序
+        events = store.query(day=event_date, team_china_only=team_china_only)
+        
+        # 获取用户提醒状态（内存缓存）
+        reminded_event_ids = await reminder_cache.get(supabase, user_id)
+        
+        return cached_json(
+            request,
+            [to_event_response(event, reminded_event_ids) for event in events],
+            config.CACHE_CONTROL_EVENTS,
+            etag=events_etag(store, events, reminded_event_ids),
+        )
     
     except Exception as e:
         import traceback
@@ -83,130 +73,56 @@ async def get_events(
         raise HTTPException(status_code=500, detail=f"获取赛事失败: {str(e)}")
 
 
-@router.get("/featured", response_model=List[EventResponse])
 @router.get("/featured", response_model=List[EventResponse])
 async def get_featured_events(
+    request: Request,
     limit: int = Query(5, description="返回数量限制"),
     date: Optional[date] = Query(None, description="筛选指定日期的赛事"),
-    user_id: str = Query("default_user", description="用户ID")
+    user_id: str = Query("default_user", description="用户ID"),
+    supabase: Client = Depends(get_supabase),
+    store: EventStore = Depends(get_event_store)
 ):
     """
     获取精选赛事
     逻辑：
     1. 必须是未来的比赛 (event_time >= now) [如果指定了日期，则为该日期内的比赛]
-    2. 严格筛选：中国队参加 (is_team_china=true) 或 决赛 (type='final' / title contain '决赛'/'金牌')
+    2. 按得分排序：中国队参加 (is_team_china=true)、决赛 (type='final' / title contain '决赛'/'金牌')、时间越近越靠前
+    3. 未指定日期时不足部分用普通赛事补齐；指定日期时当天没有重点赛事才展示普通赛事
     """
-    supabase = get_supabase()
-    
     try:
-        current_time = datetime.now().isoformat()
-        
-        # 构建查询
-        query = supabase.table("events").select("*")
-        
-        # 时间筛选
-        if date:
-            start_of_day = datetime.combine(date, datetime.min.time())
-            end_of_day = datetime.combine(date, datetime.max.time())
-            query = query.gte("event_time", start_of_day.isoformat())
-            query = query.lte("event_time", end_of_day.isoformat())
-        else:
-            # 默认为当前时间之后的未来赛事
-            query = query.gte("event_time", current_time)
-            
         result_limit = limit if limit > 0 else 100
         
-        # 辅助函数：添加时间筛选 (北京时间)
-        def apply_time_filter(qry):
-            if date:
-                # 北京时间 D 日 (00:00 - 24:00) -> 意大利时间 (D日 00:00 - 7h) 到 (D+1日 00:00 - 7h)
-                from datetime import timedelta
-                bj_start = datetime.combine(date, datetime.min.time())
-                it_start = bj_start - timedelta(hours=7)
-                it_end = it_start + timedelta(days=1)
-                return qry.gte("event_time", it_start.isoformat()).lt("event_time", it_end.isoformat())
-            else:
-                return qry.gte("event_time", current_time)
-
-        # 1. 首先获取中国队参加的赛事
-        query_china = supabase.table("events").select("*")
-        query_china = apply_time_filter(query_china)
-        query_china = query_china.eq("is_team_china", True).order("event_time").limit(result_limit)
+        # 单次遍历打分：中国队参赛、决赛/奖牌赛、时间临近度，取前 result_limit 条并按时间排序
+        featured_events = featured_ranker.rank(store, result_limit, day=date)
         
-        result_china = query_china.execute()
-        china_events = result_china.data
+        # 获取用户提醒状态（内存缓存）
+        reminded_event_ids = await reminder_cache.get(supabase, user_id)
         
-        featured_events = list(china_events)
-        existing_ids = {e["id"] for e in featured_events}
-        
-        # 2. 如果数量不够（或者指定了日期），补充决赛/金牌赛
-        # 如果指定了日期，我们希望尽可能多地展示当天的重点比赛，而不仅仅是填满limit
-        should_fetch_more = len(featured_events) < result_limit or date is not None
-        
-        if should_fetch_more:
-            needed = result_limit - len(featured_events)
-            if date: needed = 100 # 如果是日期筛选，多取一些
-            
-            # 尝试获取 title 包含 "决赛" 或 "金牌" 的赛事
-            query_finals = supabase.table("events").select("*")
-            query_finals = apply_time_filter(query_finals)
-            
-            # 使用简单的 ilike 逐个尝试 (Supabase SDK or_ 语法有时不稳定)
-            # 这里我们只查 title 包含 决赛 的，简单点
-            query_finals = query_finals.ilike("title", "%决赛%").order("event_time").limit(needed * 2)
-            
-            result_finals = query_finals.execute()
-            
-            for event in result_finals.data:
-                if event["id"] not in existing_ids:
-                    featured_events.append(event)
-                    existing_ids.add(event["id"])
-                    if len(featured_events) >= result_limit and not date:
-                        break
-        
-        # 3. 如果还是不够（且没有指定日期，或者指定了日期但没数据），就补充任意赛事
-        # 对于指定日期的情况，如果上面没数据，为了不显示空白，也显示当天的普通比赛
-        if len(featured_events) == 0 or (not date and len(featured_events) < result_limit):
-             needed = result_limit - len(featured_events)
-             if date: needed = 100
-             
-             query_nav = supabase.table("events").select("*")
-             query_nav = apply_time_filter(query_nav)
-             query_nav = query_nav.order("event_time").limit(needed)
-             
-             result_nav = query_nav.execute()
-             
-             for event in result_nav.data:
-                if event["id"] not in existing_ids:
-                    featured_events.append(event)
-                    existing_ids.add(event["id"])
-                    if len(featured_events) >= result_limit and not date:
-                        break
-                        
-        # 再次按时间排序
-        featured_events.sort(key=lambda x: x["event_time"] or "")
-        
-        # 获取用户提醒状态
-        reminders_result = supabase.table("user_reminders").select("event_id").eq("user_id", user_id).execute()
-        reminded_event_ids = {r["event_id"] for r in reminders_result.data}
-        
-        response_events = []
-        for event in featured_events:
-            response_events.append(EventResponse(
-                id=event["id"],
-                sport=event["sport"],
-                discipline=event["discipline"],
-                title=event["title"],
-                event_time=event["event_time"],
-                location=event["location"],
-                is_team_china=event["is_team_china"],
-                type=event["type"],
-                reminded=event["id"] in reminded_event_ids
-            ))
-        
-        return response_events
+        return cached_json(
+            request,
+            [to_event_response(event, reminded_event_ids) for event in featured_events],
+            config.CACHE_CONTROL_EVENTS,
+            etag=events_etag(store, featured_events, reminded_event_ids),
+        )
     
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"获取精选赛事失败: {str(e)}")
+
+
+@router.post("/refresh", dependencies=[Depends(require_admin)])
+async def refresh_events(
+    supabase: Client = Depends(get_supabase)
+):
+    """
+    手动刷新赛事内存快照（需要管理令牌）
+    scrape_schedule.py / insert_events.py 写入新赛事后通过 scripts/notify_api.py 调用
+    """
+    try:
+        await event_store.refresh(supabase)
+        return {"status": "success", "count": len(event_store), "version": event_store.version}
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"刷新赛事失败: {str(e)}")
@@ -2,46 +2,55 @@
 奖牌榜API路由
 提供奖牌排行榜数据
 """
-from fastapi import APIRouter, HTTPException, Query
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from typing import List, Optional
-from supabase import create_client, Client
+from supabase import Client
 from datetime import datetime
 
-from backend.config import SUPABASE_URL, SUPABASE_KEY
+from backend import config
+from backend.db import get_supabase, execute_async
+from backend.http_cache import make_etag, not_modified, cached_json
+from backend.medal_table import MedalTable, get_medal_table, medal_table
+from backend.medal_push import medal_broadcaster
+from backend.sse import sse_response
 from backend.models import MedalResponse, ChinaMedalResponse, HistoricalEditionResponse, HistoricalMedalResponse, HistoricalEventResponse
-from backend.scripts.sync_medals import get_iso, run_sync
+from backend.history_store import get_history_dataset, build_editions, build_history_medals, build_history_events
+from backend.scripts.sync_medals import run_sync
 
 router = APIRouter(prefix="/api/medals", tags=["medals"])
 
-def get_supabase() -> Client:
-    """获取Supabase客户端"""
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+
+def with_medal_version(response: Response, table: MedalTable) -> Response:
+    """附加奖牌数据版本响应头，客户端可据此判断数据是否变化"""
+    response.headers["X-Medal-Version"] = str(table.data_version)
+    return response
 
 
 @router.get("", response_model=List[MedalResponse])
 async def get_medals(
+    request: Request,
     region: Optional[str] = Query(None, description="按地区筛选: 欧洲/北美洲/亚洲"),
-    search: Optional[str] = Query(None, description="搜索国家名称")
+    search: Optional[str] = Query(None, description="搜索国家名称"),
+    table: MedalTable = Depends(get_medal_table)
 ):
     """
     获取奖牌榜
-    按金牌数排序，返回所有国家的奖牌数据
+    按金、银、铜牌数排序，返回所有国家的奖牌数据（来自内存奖牌榜，名次并列按奥运惯例处理）
     """
-    supabase = get_supabase()
-    
     try:
-        # 获取所有奖牌数据
-        query = supabase.table("medals").select("*")
+        # 榜单未变化时直接返回 304
+        etag = make_etag("medals", table.fingerprint, region, search)
+        cached = not_modified(request, etag, config.CACHE_CONTROL_MEDALS)
+        if cached:
+            return with_medal_version(cached, table)
+        
+        medals = table.standings()
         
         # 搜索筛选
         if search:
-            query = query.ilike("country", f"%{search}%")
-        
-        # 按金牌数排序
-        query = query.order("gold", desc=True).order("silver", desc=True).order("bronze", desc=True)
-        
-        result = query.execute()
-        medals = result.data
+            keyword = search.lower()
+            medals = [m for m in medals if keyword in m["country"].lower()]
         
         # 地区筛选映射（简化实现）
         region_countries = {
@@ -53,12 +62,12 @@ async def get_medals(
         if region and region in region_countries:
             medals = [m for m in medals if m["iso"] in region_countries[region]]
         
-        # 组装响应，添加排名
+        # 组装响应，名次为总榜名次
         response_medals = []
-        for idx, medal in enumerate(medals, 1):
+        for medal in medals:
             response_medals.append(MedalResponse(
                 id=medal["id"],
-                rank=idx,
+                rank=medal["rank"],
                 country=medal["country"],
                 iso=medal["iso"],
                 gold=medal["gold"],
@@ -66,7 +75,9 @@ async def get_medals(
                 bronze=medal["bronze"]
             ))
         
-        return response_medals
+        return with_medal_version(
+            cached_json(request, response_medals, config.CACHE_CONTROL_MEDALS, etag=etag), table
+        )
     
     except Exception as e:
         import traceback
@@ -80,8 +91,15 @@ async def sync_medals_manual():
     手动触发奖牌榜同步
     """
     try:
-        await run_sync()
-        return {"status": "success", "message": "奖牌榜同步已触发"}
+        outcomes = await run_sync()
+        failed = {iso: outcome for iso, outcome in outcomes.items() if outcome != "upserted"}
+        return {
+            "status": "success",
+            "message": "奖牌榜同步已触发",
+            "synced": len(outcomes) - len(failed),
+            "failed": failed,
+            "version": medal_table.data_version,
+        }
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -89,20 +107,21 @@ async def sync_medals_manual():
 
 
 @router.get("/china", response_model=ChinaMedalResponse)
-async def get_china_medals():
+async def get_china_medals(request: Request, table: MedalTable = Depends(get_medal_table)):
     """
     获取中国队奖牌数据
     用于首页快速展示
     """
-    supabase = get_supabase()
-    
     try:
-        # 获取中国队数据
-        result = supabase.table("medals").select("*").eq("iso", "CN").single().execute()
-        china = result.data
+        etag = make_etag("medals/china", table.fingerprint)
+        cached = not_modified(request, etag, config.CACHE_CONTROL_MEDALS)
+        if cached:
+            return with_medal_version(cached, table)
+        
+        china = table.get("CN")
         
         if not china:
-            return ChinaMedalResponse(
+            china_medals = ChinaMedalResponse(
                 rank=0,
                 gold=0,
                 silver=0,
@@ -110,22 +129,20 @@ async def get_china_medals():
                 total=0,
                 updated_at=datetime.now()
             )
+            return with_medal_version(
+                cached_json(request, china_medals, config.CACHE_CONTROL_MEDALS, etag=etag), table
+            )
         
-        # 计算排名
-        all_medals = supabase.table("medals").select("iso, gold").order("gold", desc=True).execute()
-        rank = 1
-        for idx, m in enumerate(all_medals.data, 1):
-            if m["iso"] == "CN":
-                rank = idx
-                break
-        
-        return ChinaMedalResponse(
-            rank=rank,
+        china_medals = ChinaMedalResponse(
+            rank=china["rank"],
             gold=china["gold"],
             silver=china["silver"],
             bronze=china["bronze"],
-            total=china["gold"] + china["silver"] + china["bronze"],
-            updated_at=china.get("updated_at", datetime.now())
+            total=china["total"],
+            updated_at=china.get("updated_at") or datetime.now()
+        )
+        return with_medal_version(
+            cached_json(request, china_medals, config.CACHE_CONTROL_MEDALS, etag=etag), table
         )
     
     except Exception as e:
@@ -134,64 +151,42 @@ async def get_china_medals():
         raise HTTPException(status_code=500, detail=f"获取中国队奖牌数据失败: {str(e)}")
 
 
+@router.get("/stream")
+async def stream_medals(table: MedalTable = Depends(get_medal_table)):
+    """
+    奖牌榜变化推送（SSE）
+    连接后先收到 hello（当前数据版本），之后每次奖牌榜变化收到一条 diff：
+    {"version", "fields": [iso, country, rank, gold, silver, bronze], "rows": [...], "removed": [...]}，
+    只包含名次或奖牌数有变化的国家。收到 resync 时应重新拉取 /api/medals
+    """
+    if medal_broadcaster.is_full:
+        raise HTTPException(status_code=503, detail="推送连接数已满，请改为轮询 /api/medals")
+    return sse_response(medal_broadcaster.stream())
+
+
 @router.get("/history", response_model=List[HistoricalEditionResponse])
-async def get_history_editions():
+async def get_history_editions(request: Request, supabase: Client = Depends(get_supabase)):
     """获取所有历史届次列表"""
-    supabase = get_supabase()
     try:
-        # 同时从两个表获取数据并进行合并
+        # 优先使用预先导出的静态数据集
+        dataset = get_history_dataset()
+        if dataset:
+            return cached_json(request, dataset.editions, config.CACHE_CONTROL_HISTORY,
+                               etag=make_etag("history", dataset.version))
+        
+        # 数据文件不存在时回退到数据库：同时从两个表获取数据并进行合并
         # history_medals_duplicate 包含完整的届次列表（从1924年开始）
         # history_events 包含部分届次（1960年以后）的国家数和项目数
+        medals_query = supabase.table("history_medals_duplicate").select("Year, City").order("Year", desc=True)
+        events_query = supabase.table("history_events").select("year, countries_count, events_count")
         
-        # 1. 获取完整的届次基础信息
-        medals_res = supabase.table("history_medals_duplicate").select("Year, City").order("Year", desc=True).execute()
-        
-        # 2. 获取统计数据
-        events_res = supabase.table("history_events").select("year, countries_count, events_count").execute()
-        
-        # 创建统计数据的字典方便查找
-        stats_map = {}
-        # 创建统计数据的字典方便查找
-        stats_map = {}
-        for item in events_res.data:
-            year = item["year"]
-            if year not in stats_map or (item.get("countries_count") and not stats_map[year]["countries"]):
-                stats_map[year] = {
-                    "countries": item.get("countries_count", 0),
-                    "events": item.get("events_count", 0)
-                }
-        
-        # 补充一些核心年份的兜底数据（特别是北京2022）
-        fallback_stats = {
-            2022: {"countries": 91, "events": 109},
-            2018: {"countries": 92, "events": 102},
-            2014: {"countries": 88, "events": 98},
-            2010: {"countries": 82, "events": 86},
-            2006: {"countries": 80, "events": 84},
-        }
-        
-        # 3. 去重合并
-        seen = set()
-        editions = []
-        for item in medals_res.data:
-            year = item["Year"]
-            if year not in seen:
-                # 优先使用数据库数据，如果没有则使用兜底数据
-                db_stats = stats_map.get(year, {"countries": 0, "events": 0})
-                fb_stats = fallback_stats.get(year, {"countries": 0, "events": 0})
-                
-                final_countries = db_stats["countries"] or fb_stats["countries"]
-                final_events = db_stats["events"] or fb_stats["events"]
-                
-                editions.append(HistoricalEditionResponse(
-                    year=year, 
-                    location=item["City"],
-                    countries_count=final_countries,
-                    events_count=final_events
-                ))
-                seen.add(year)
+        medals_res, events_res = await asyncio.gather(
+            execute_async(medals_query, "history_medals_duplicate"),
+            execute_async(events_query, "history_events"),
+        )
         
-        return editions
+        editions = build_editions(medals_res.data, events_res.data)
+        return cached_json(request, editions, config.CACHE_CONTROL_HISTORY)
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -199,29 +194,24 @@ async def get_history_editions():
 
 
 @router.get("/history/{year}/events", response_model=List[HistoricalEventResponse])
-async def get_history_events_by_year(year: int):
+async def get_history_events_by_year(year: int, request: Request, supabase: Client = Depends(get_supabase)):
     """获取指定年份的历史赛事列表（含奖牌获得国）"""
-    supabase = get_supabase()
     try:
+        dataset = get_history_dataset()
+        if dataset:
+            return cached_json(request, dataset.events_by_year.get(year, []), config.CACHE_CONTROL_HISTORY,
+                               etag=make_etag("history/events", dataset.version, year))
+        
         # 获取该年份的所有赛事
-        result = supabase.table("history_events").select("*").eq("year", year).execute()
+        result = await execute_async(
+            supabase.table("history_events").select("*").eq("year", year),
+            "history_events",
+        )
         
         if not result.data:
             return []
-            
-        return [
-            HistoricalEventResponse(
-                id=str(item["id"]),
-                sport_name=item["sport_name"],
-                event_name=item["event_name"],
-                gold_country=item.get("gold_country"),
-                gold_iso=get_iso(item["gold_country"]) if item.get("gold_country") else None,
-                silver_country=item.get("silver_country"),
-                silver_iso=get_iso(item["silver_country"]) if item.get("silver_country") else None,
-                bronze_country=item.get("bronze_country"),
-                bronze_iso=get_iso(item["bronze_country"]) if item.get("bronze_country") else None
-            ) for item in result.data
-        ]
+        
+        return cached_json(request, build_history_events(result.data), config.CACHE_CONTROL_HISTORY)
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -230,33 +220,29 @@ async def get_history_events_by_year(year: int):
 
 
 @router.get("/history/{year}", response_model=List[HistoricalMedalResponse])
-async def get_history_by_year(year: int):
+async def get_history_by_year(year: int, request: Request, supabase: Client = Depends(get_supabase)):
     """获取指定年份的历史奖牌榜"""
-    supabase = get_supabase()
     try:
+        dataset = get_history_dataset()
+        if dataset:
+            history_medals = dataset.medals_by_year.get(year)
+            if not history_medals:
+                raise HTTPException(status_code=404, detail=f"未找到 {year} 年的数据")
+            return cached_json(request, history_medals, config.CACHE_CONTROL_HISTORY,
+                               etag=make_etag("history/medals", dataset.version, year))
+        
         # 修正：根据截图列名为 Year, Rank, Country, gold, silver, bronze
-        result = supabase.table("history_medals_duplicate")\
+        query = supabase.table("history_medals_duplicate")\
             .select("*")\
             .eq("Year", year)\
-            .order("Rank", desc=False)\
-            .execute()
+            .order("Rank", desc=False)
+        result = await execute_async(query, "history_medals_duplicate")
         
         if not result.data:
             raise HTTPException(status_code=404, detail=f"未找到 {year} 年的数据")
-            
-        return [
-            HistoricalMedalResponse(
-                rank=m["Rank"],
-                country=m["Country"],
-                iso=get_iso(m["Country"]),  # 从国家名映射 ISO
-                gold=m["gold"],
-                silver=m["silver"],
-                bronze=m["bronze"],
-                total=m["gold"] + m["silver"] + m["bronze"]
-            ) for m in result.data
-        ]
+        
+        return cached_json(request, build_history_medals(result.data), config.CACHE_CONTROL_HISTORY)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取历史奖牌榜失败: {str(e)}")
-
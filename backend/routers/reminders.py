@@ -1,74 +1,202 @@
 """
 提醒API路由
 管理用户的赛事提醒设置
+
+设置和取消都是基于唯一键 (user_id, event_id) 的单条语句（upsert / delete），可安全重试，
+并发重复点击也不会产生重复行；单个赛事的接口与批量接口走同一路径
+设置前先核对赛事是否存在，不存在的赛事 ID 被跳过，不会因外键约束导致整批失败
 """
-from fastapi import APIRouter, HTTPException
-from supabase import create_client, Client
+import uuid
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException
+from supabase import Client
 
-from backend.config import SUPABASE_URL, SUPABASE_KEY
-from backend.models import ReminderCreate, ReminderResponse
+from backend import config
+from backend.db import get_supabase, execute_async
+from backend.event_store import EventStore, get_event_store
+from backend.models import ReminderCreate, ReminderResponse, ReminderBatchRequest, ReminderBatchResponse
+from backend.reminder_cache import reminder_cache
+from backend.reminder_dispatch import chunked, reminder_dispatcher
 
 router = APIRouter(prefix="/api/reminders", tags=["reminders"])
 
-def get_supabase() -> Client:
-    """获取Supabase客户端"""
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+
+def normalize_event_id(event_id: str) -> Optional[str]:
+    """规范化为小写 UUID 字符串，不是合法 UUID 时返回 None"""
+    try:
+        return str(uuid.UUID(str(event_id)))
+    except ValueError:
+        return None
+
+
+async def split_known_events(
+    supabase: Client, store: EventStore, event_ids: List[str]
+) -> Tuple[List[str], List[str]]:
+    """
+    拆分为存在的赛事 ID（已规范化）和未知的赛事 ID（原样返回）
+    先查赛事快照，快照中没有的（如刚插入、快照尚未刷新）再查一次数据库
+    """
+    normalized = {event_id: normalize_event_id(event_id) for event_id in event_ids}
+    missing = [value for value in normalized.values() if value and store.get(value) is None]
+    found = set()
+    for chunk in chunked(list(dict.fromkeys(missing))):
+        result = await execute_async(supabase.table("events").select("id").in_("id", chunk), "events")
+        found.update(str(row["id"]) for row in result.data)
+    known, unknown = [], []
+    for event_id, value in normalized.items():
+        if value and (store.get(value) is not None or value in found):
+            known.append(value)
+        else:
+            unknown.append(event_id)
+    return list(dict.fromkeys(known)), unknown
+
+
+async def set_reminders(supabase: Client, user_id: str, event_ids: List[str]) -> List[dict]:
+    """设置提醒（已存在的保持原行），返回全部对应的提醒行；event_ids 需已通过 split_known_events 核对"""
+    if not event_ids:
+        return []
+    result = await execute_async(
+        supabase.table("user_reminders").upsert(
+            [{"user_id": user_id, "event_id": event_id} for event_id in event_ids],
+            on_conflict="user_id,event_id",
+        ),
+        "user_reminders",
+    )
+    for reminder in result.data:
+        reminder_cache.add(user_id, reminder["event_id"])
+        # 本进程负责投递时直接排队，否则由投递进程增量加载
+        if reminder_dispatcher.active:
+            reminder_dispatcher.schedule(reminder)
+    return result.data
+
+
+async def clear_reminders(supabase: Client, user_id: str, event_ids: List[str]) -> List[str]:
+    """取消提醒（不存在的忽略），返回实际删除的赛事 ID"""
+    # 不是合法 UUID 的 ID 不可能有提醒，直接忽略，避免数据库报类型错误
+    event_ids = list(dict.fromkeys(filter(None, (normalize_event_id(event_id) for event_id in event_ids))))
+    if not event_ids:
+        return []
+    deleted = []
+    # 分批携带 ID，避免 URL 过长
+    for chunk in chunked(event_ids):
+        result = await execute_async(
+            supabase.table("user_reminders").delete().eq("user_id", user_id).in_("event_id", chunk),
+            "user_reminders",
+        )
+        deleted.extend(str(row["event_id"]) for row in result.data)
+    for event_id in event_ids:
+        reminder_cache.discard(user_id, event_id)
+        reminder_dispatcher.cancel(user_id, event_id)
+    return deleted
+
+
+def resolve_event_ids(request: ReminderBatchRequest, store: EventStore) -> List[str]:
+    """批量请求对应的赛事 ID（去重并保持顺序）"""
+    if request.event_ids is not None:
+        event_ids = list(dict.fromkeys(str(event_id) for event_id in request.event_ids))
+    elif request.event_date or request.team_china_only or request.finals_only:
+        events = store.query(
+            day=request.event_date,
+            team_china_only=request.team_china_only,
+            finals_only=request.finals_only,
+        )
+        event_ids = [str(event["id"]) for event in events]
+    else:
+        raise HTTPException(status_code=400, detail="请提供 event_ids 或筛选条件")
+    if len(event_ids) > config.REMINDER_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"单次最多操作 {config.REMINDER_BATCH_MAX} 个赛事")
+    return event_ids
 
 
 @router.post("", response_model=ReminderResponse)
-async def create_reminder(request: ReminderCreate):
+async def create_reminder(
+    request: ReminderCreate,
+    supabase: Client = Depends(get_supabase),
+    store: EventStore = Depends(get_event_store)
+):
     """
     添加赛事提醒
+    重复添加返回已有的提醒，赛事 ID 格式无效时返回 400，赛事不存在时返回 404
     """
-    supabase = get_supabase()
-    
+    if normalize_event_id(request.event_id) is None:
+        raise HTTPException(status_code=400, detail="赛事 ID 格式无效")
+    try:
+        event_ids, _ = await split_known_events(supabase, store, [request.event_id])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"创建提醒失败: {str(e)}")
+    if not event_ids:
+        raise HTTPException(status_code=404, detail="赛事不存在")
     try:
-        # 检查是否已存在提醒
-        existing = supabase.table("user_reminders").select("id").eq(
-            "user_id", request.user_id
-        ).eq("event_id", request.event_id).execute()
-        
-        if existing.data:
-            # 已存在，返回现有记录
-            return ReminderResponse(
-                id=existing.data[0]["id"],
-                event_id=request.event_id,
-                user_id=request.user_id
-            )
-        
-        # 创建新提醒
-        result = supabase.table("user_reminders").insert({
-            "user_id": request.user_id,
-            "event_id": request.event_id
-        }).execute()
-        
-        reminder = result.data[0]
+        reminders = await set_reminders(supabase, request.user_id, event_ids)
+        reminder = reminders[0]
         return ReminderResponse(
             id=reminder["id"],
             event_id=reminder["event_id"],
             user_id=reminder["user_id"]
         )
-    
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"创建提醒失败: {str(e)}")
 
 
+@router.post("/batch", response_model=ReminderBatchResponse)
+async def create_reminders_batch(
+    request: ReminderBatchRequest,
+    supabase: Client = Depends(get_supabase),
+    store: EventStore = Depends(get_event_store)
+):
+    """
+    批量添加赛事提醒
+    例如 {"event_date": "2026-02-10", "team_china_only": true, "finals_only": true} 提醒当天所有中国队决赛
+    不存在的赛事 ID 被跳过，在 skipped 中返回
+    """
+    event_ids = resolve_event_ids(request, store)
+    try:
+        event_ids, skipped = await split_known_events(supabase, store, event_ids)
+        reminders = await set_reminders(supabase, request.user_id, event_ids)
+        return ReminderBatchResponse(
+            success=True,
+            count=len(reminders),
+            event_ids=[str(r["event_id"]) for r in reminders],
+            skipped=skipped
+        )
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"批量创建提醒失败: {str(e)}")
+
+
+@router.delete("/batch", response_model=ReminderBatchResponse)
+async def delete_reminders_batch(
+    request: ReminderBatchRequest,
+    supabase: Client = Depends(get_supabase),
+    store: EventStore = Depends(get_event_store)
+):
+    """
+    批量取消赛事提醒，请求体与批量添加相同
+    """
+    event_ids = resolve_event_ids(request, store)
+    try:
+        deleted = await clear_reminders(supabase, request.user_id, event_ids)
+        return ReminderBatchResponse(success=True, count=len(deleted), event_ids=deleted)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"批量取消提醒失败: {str(e)}")
+
+
 @router.delete("/{event_id}")
 async def delete_reminder(
     event_id: str,
-    user_id: str = "default_user"
+    user_id: str = "default_user",
+    supabase: Client = Depends(get_supabase)
 ):
     """
     取消赛事提醒
     """
-    supabase = get_supabase()
-    
     try:
-        supabase.table("user_reminders").delete().eq(
-            "user_id", user_id
-        ).eq("event_id", event_id).execute()
-        
+        await clear_reminders(supabase, user_id, [event_id])
+
         return {"success": True, "message": "提醒已取消"}
-    
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"取消提醒失败: {str(e)}")
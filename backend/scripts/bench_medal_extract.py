@@ -0,0 +1,99 @@
+"""
+奖牌榜解析引擎基准测试
+对录制下来的百度体育奖牌榜页面逐个运行各解析引擎，输出平均耗时，
+并以 bs4（原实现）的结果为准校验其他引擎的输出是否一致
+
+用法:
+    # 录制当前奖牌榜页面和部分历届页面
+    python backend/scripts/bench_medal_extract.py --record backend/data/pages
+    # 对录制的页面跑基准
+    python backend/scripts/bench_medal_extract.py backend/data/pages/*.html -n 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# 将项目根目录添加到 python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.medal_extract import EXTRACTORS
+from backend.scripts.sync_medals import fetch_medal_page
+from backend.scripts.sync_history_medals import EDITIONS
+
+import httpx
+
+
+async def record_pages(directory: str, history_count: int = 3):
+    """保存当前奖牌榜页面和最近几届历史页面，供离线基准测试使用"""
+    os.makedirs(directory, exist_ok=True)
+    html = await fetch_medal_page()
+    if html:
+        path = os.path.join(directory, "medals_2026.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
+        print(f"已保存 {path}")
+
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+    }
+    async with httpx.AsyncClient(trust_env=False) as client:
+        for year, location in EDITIONS[:history_count]:
+            match_name = f"{year}年{location}冬奥会"
+            url = f"https://tiyu.baidu.com/al/major/home?page=home&match={match_name}&tab=%E5%A5%96%E7%89%8C%E6%A6%9C"
+            try:
+                response = await client.get(url, headers=headers, timeout=10)
+                response.raise_for_status()
+            except Exception as e:
+                print(f"抓取 {year} 页面失败: {e}")
+                continue
+            path = os.path.join(directory, f"medals_{year}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(response.text)
+            print(f"已保存 {path}")
+
+
+def benchmark(paths, iterations: int):
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        print(f"\n{os.path.basename(path)} ({len(html)} bytes)")
+
+        baseline = EXTRACTORS["bs4"](html)
+        baseline_ms = None
+        # 先跑 bs4 作为基准，便于计算其他引擎的加速比
+        for name in ["bs4"] + [name for name in EXTRACTORS if name != "bs4"]:
+            extractor = EXTRACTORS[name]
+            try:
+                result = extractor(html)
+            except Exception as e:
+                print(f"  {name:<7} 出错: {e}")
+                continue
+            if result is None:
+                print(f"  {name:<7} 不适用（未解析出数据或依赖未安装）")
+                continue
+
+            start = time.perf_counter()
+            for _ in range(iterations):
+                extractor(html)
+            elapsed_ms = (time.perf_counter() - start) * 1000 / iterations
+            if name == "bs4":
+                baseline_ms = elapsed_ms
+
+            status = "一致" if result == baseline else "与 bs4 结果不一致!"
+            speedup = f"{baseline_ms / elapsed_ms:5.1f}x" if baseline_ms else "   - "
+            print(f"  {name:<7} {elapsed_ms:8.2f} ms/次  {speedup}  {len(result)} 行  {status}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="奖牌榜解析引擎基准测试")
+    parser.add_argument("pages", nargs="*", help="录制的页面文件")
+    parser.add_argument("-n", "--iterations", type=int, default=20, help="每个引擎重复解析次数")
+    parser.add_argument("--record", metavar="DIR", help="录制页面到指定目录")
+    args = parser.parse_args()
+
+    if args.record:
+        asyncio.run(record_pages(args.record))
+    if args.pages:
+        benchmark(args.pages, args.iterations)
@@ -0,0 +1,45 @@
+"""
+历史数据导出脚本
+将 history_medals_duplicate 和 history_events 两张表导出为列式压缩数据文件，
+ISO 编码和兜底统计在导出时一次性算好，API 启动后直接加载，不再查询数据库
+（部署包中没有数据文件时，API 启动后也会自动导出一次，见 history_store.build_history_dataset）
+
+用法: python backend/scripts/export_history.py [--output PATH]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+# 将项目根目录添加到 python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend import config
+from backend.db import get_supabase
+from backend.history_store import build_artifact, fetch_all_rows, write_artifact
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+async def export_history(output: str):
+    supabase = await get_supabase()
+
+    medal_rows = await fetch_all_rows(supabase, "history_medals_duplicate")
+    event_rows = await fetch_all_rows(supabase, "history_events")
+    logger.info(f"读取到 {len(medal_rows)} 条奖牌记录，{len(event_rows)} 条赛事记录")
+
+    artifact = build_artifact(medal_rows, event_rows)
+    write_artifact(artifact, output)
+
+    logger.info(
+        f"✅ 已导出 {len(artifact['editions']['year'])} 届历史数据到 {output} "
+        f"(version={artifact['version']}, {os.path.getsize(output)} bytes)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="导出历届冬奥会静态数据文件")
+    parser.add_argument("--output", default=config.HISTORY_ARTIFACT_PATH, help="输出文件路径")
+    args = parser.parse_args()
+    asyncio.run(export_history(args.output))
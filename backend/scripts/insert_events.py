@@ -9,6 +9,7 @@ import os
 # 添加父目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import SUPABASE_URL, SUPABASE_KEY
+from scripts.notify_api import notify_events_refresh
 
 def insert_events():
     """插入赛事数据"""
@@ -189,6 +190,7 @@ def insert_events():
         print(f"   ✅ 成功插入 {len(result.data)} 条赛事记录")
 
         print("\n✅ 赛事数据插入完成！")
+        notify_events_refresh()
         return True
 
     except Exception as e:
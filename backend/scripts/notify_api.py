@@ -0,0 +1,34 @@
+"""
+通知 API 服务刷新赛事内存快照
+赛程脚本直接写数据库，写入后调用 POST /api/events/refresh 让新赛事立即可见；
+未配置 API_BASE_URL / ADMIN_TOKEN 或调用失败时，服务会在 EVENT_STORE_TTL 秒内自行刷新
+（多 worker 部署时该接口只刷新处理请求的那个进程，其余进程同样依靠 TTL）
+"""
+import os
+import sys
+
+import requests
+
+# 将项目根目录添加到 python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend import config
+
+
+def notify_events_refresh() -> bool:
+    """请求 API 服务刷新赛事快照，返回是否成功"""
+    if not config.API_BASE_URL or not config.ADMIN_TOKEN:
+        print(f"未配置 API_BASE_URL/ADMIN_TOKEN，API 服务将在 {config.EVENT_STORE_TTL:.0f} 秒内自动刷新赛事快照")
+        return False
+    try:
+        response = requests.post(
+            f"{config.API_BASE_URL.rstrip('/')}/api/events/refresh",
+            headers={"X-Admin-Token": config.ADMIN_TOKEN},
+            timeout=10,
+        )
+        response.raise_for_status()
+        print(f"已通知 API 服务刷新赛事快照: {response.json().get('count')} 条")
+        return True
+    except Exception as e:
+        print(f"通知 API 服务刷新失败（将依靠 TTL 自动刷新）: {e}")
+        return False
@@ -1,190 +1,369 @@
+"""
+赛程抓取脚本
+并发抓取 olympics.com 上整届冬奥会每个比赛日的赛程页面，解析后写入 events 表
+
+- 每个赛事的日期取自它所在的赛程页面（/schedule/DD-mon）
+- 通过有界并发池同时抓取多个比赛日，单日失败自动重试
+- 按自然键 (sport, title, event_time, location) 合并：新赛事批量插入，有变化的批量更新
+- 已完成的比赛日记录在进度文件中，部分失败后重新运行只会抓取未完成的日期；
+  整个赛期的比赛日全部完成后删除进度文件，下次运行重新全量刷新
+
+用法: python backend/scripts/scrape_schedule.py [--days 04-feb,05-feb] [--concurrency 6] [--fresh]
+写入完成后调用 POST /api/events/refresh 让运行中的服务重新加载赛事快照
+"""
+import argparse
+import asyncio
+import json
 import os
 import sys
-from datetime import datetime
-import time
-import requests
-from bs4 import BeautifulSoup
-from dotenv import load_dotenv
-from supabase import create_client, Client
-
-# Add parent directory to path to import config
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-import config
-
-# Initialize Supabase client
-supabase: Client = create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
-
-TARGET_URL = "https://www.olympics.com/zh/milano-cortina-2026/schedule/04-feb"
-DATE_STR = "2026-02-04"  # Hardcoded for this specific URL context, can be dynamic later
-
-def scrape_and_update():
-    print(f"Starting scrape for {TARGET_URL}...")
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    }
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from bs4 import BeautifulSoup, SoupStrainer
+
+# 将项目根目录添加到 python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.db import get_supabase, execute_async
+from backend.event_store import parse_event_time
+from backend.scripts.notify_api import notify_events_refresh
+
+SCHEDULE_BASE_URL = "https://www.olympics.com/zh/milano-cortina-2026/schedule"
+# 比赛日范围（含首尾）：2月4日首批预赛到2月22日闭幕
+GAMES_FIRST_DAY = date(2026, 2, 4)
+GAMES_LAST_DAY = date(2026, 2, 22)
+MONTH_SLUGS = {2: "feb", 3: "mar"}
+
+DEFAULT_STATE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "schedule_progress.json"
+)
+FETCH_RETRIES = 3
+PAGE_SIZE = 1000
+WRITE_BATCH_SIZE = 500
+
+EVENT_FIELDS = ("sport", "discipline", "title", "event_time", "location", "is_team_china", "type")
+# 自然键以外、需要比较是否变化的字段
+MERGE_FIELDS = ("discipline", "is_team_china", "type")
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+
+
+def competition_days() -> List[date]:
+    days = []
+    day = GAMES_FIRST_DAY
+    while day <= GAMES_LAST_DAY:
+        days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def day_slug(day: date) -> str:
+    """date(2026, 2, 4) -> "04-feb"（赛程页面 URL 中的日期）"""
+    return f"{day.day:02d}-{MONTH_SLUGS[day.month]}"
+
+
+def parse_day_slug(slug: str) -> date:
+    day_part, month_part = slug.split("-")
+    month = next(month for month, name in MONTH_SLUGS.items() if name == month_part)
+    return date(GAMES_FIRST_DAY.year, month, int(day_part))
+
+
+def schedule_url(day: date) -> str:
+    return f"{SCHEDULE_BASE_URL}/{day_slug(day)}"
+
 
+# ========== 页面解析 ==========
+
+def parse_card(card, sport_name: str, day: date) -> dict:
+    """Parse one article[data-cy=Event-Card] into an events row."""
+    # 1. Extract Time
+    time_span = card.find('span', {'data-cy': lambda x: x and 'time-container' in x})
+    if not time_span:
+        # Fallback to fuzzy text match if selector fails
+        for span in card.find_all('span'):
+            if ':' in span.text and len(span.text) <= 5: # HH:MM
+                time_span = span
+                break
+
+    start_time_str = time_span.get_text(strip=True) if time_span else "00:00"
+
+    # 2. Extract Title and Location
+    # span[data-cy="text-module"] inside the article, usually: [Time, Title, Location] or [Title, Location]
+    text_modules = card.find_all('span', {'data-cy': 'text-module'})
+
+    event_title = "Unknown Event"
+    location = "Unknown Location"
+
+    potential_texts = [t.get_text(strip=True) for t in text_modules if t.get_text(strip=True) != start_time_str]
+
+    if len(potential_texts) > 0:
+        event_title = potential_texts[0]
+    if len(potential_texts) > 1:
+        location = potential_texts[1]
+
+    # Refine location using finding 'venues' link if possible
+    venue_link = card.find('a', href=lambda x: x and '/venues/' in x)
+    if venue_link:
+        location = venue_link.get_text(strip=True)
+
+    # 3. Check for Medal Event
+    # Look for medal icon SVG
+    is_medal = False
+    if card.find('svg', {'aria-label': lambda x: x and 'Medal' in str(x)}) or \
+       card.find(class_=lambda x: x and 'medal' in str(x).lower()):
+        is_medal = True
+
+    type_val = "medal" if is_medal else "preliminary"
+    # "final" is hard to distinguish from "medal" without text parsing,
+    # but usually medal events ARE finals.
+    if "决赛" in event_title:
+        type_val = "final"
+
+    # 4. Construct timestamp from the day of the page the card came from
     try:
-        response = requests.get(TARGET_URL, headers=headers, timeout=15)
-        response.raise_for_status()
-    except Exception as e:
-        print(f"Failed to fetch page: {e}")
-        return
-
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
-    # The schedule is comprised of multiple sections or groups.
-    # Based on analysis, we look for the main schedule container.
-    # If the specific container ID changes, we might default to listing all 'article' cards.
-    
-    events_found = 0
-    events_inserted = 0
-    
-    # Attempt to find all event cards directly
-    event_cards = soup.find_all('article', {'data-cy': 'Event-Card'})
-    print(f"Found {len(event_cards)} event cards.")
-
-    for card in event_cards:
-        try:
-            # 1. Extract Sport
-            # The sport is usually in a header preceding the card, but sometimes inside.
-            # Let's look for a preceding header if not inside.
-            # DOM analysis showed h2 headers for sports.
-            # We can traverse up to find the closest previous h2 or section header.
-            # However, simpler if we find the grouping container.
-            
-            # Strategy: The structure often is:
-            # Section -> H2 (Sport) -> Div (Grid) -> Articles (Events)
-            # OR
-            # List -> Item -> H2 (Sport) + Wrapper -> Articles
-            
-            # Let's try to infer sport from the card's context or content if possible.
-            # If the card doesn't have sport info, we need the section header.
-            
-            sport_name = "Unknown Sport"
-            # Traverse parents to find a container with a sport title?
-            # Or simplified: The analysis showed h2[data-cy="text-module"] for Sport Name
-            
-            # Let's try finding the preceding h2
-            parent_section = card.find_parent('div', class_=lambda x: x and 'styles__SportWrapper' in x) # Hypothetical, relying on structure analysis
-            if not parent_section:
-                 # Fallback: find any previous h2 in the DOM flow
-                 curr = card
-                 while curr:
-                     curr = curr.previous_element
-                     if curr and curr.name == 'h2':
-                         sport_name = curr.get_text(strip=True)
-                         break
-            
-            # 2. Extract Time
-            time_span = card.find('span', {'data-cy': lambda x: x and 'time-container' in x})
-            if not time_span:
-                # Fallback to fuzzy text match if selector fails
-                for span in card.find_all('span'):
-                    if ':' in span.text and len(span.text) <= 5: # HH:MM
-                        time_span = span
-                        break
-            
-            start_time_str = time_span.get_text(strip=True) if time_span else "00:00"
-            
-            # 3. Extract Title
-            # Usually the main bold text
-            title_el = card.find('span', {'data-cy': 'text-module'})
-            # If there are multiple, the first might be status or time, so be careful.
-            # The title is usually the longest text or has a specific class.
-            
-            # Analysis says: span[data-cy="text-module"] inside the article.
-            # Let's get all text modules
-            text_modules = card.find_all('span', {'data-cy': 'text-module'})
-            # Usually: [Time, Title, Location] or [Title, Location]
-            
-            event_title = "Unknown Event"
-            location = "Unknown Location"
-            
-            potential_texts = [t.get_text(strip=True) for t in text_modules if t.get_text(strip=True) != start_time_str]
-            
-            if len(potential_texts) > 0:
-                event_title = potential_texts[0]
-            if len(potential_texts) > 1:
-                location = potential_texts[1]
-                
-            # Refine location using finding 'venues' link if possible
-            venue_link = card.find('a', href=lambda x: x and '/venues/' in x)
-            if venue_link:
-                location = venue_link.get_text(strip=True)
-
-            # 4. Check for Medal Event
-            # Look for medal icon SVG
-            is_medal = False
-            if card.find('svg', {'aria-label': lambda x: x and 'Medal' in str(x)}) or \
-               card.find(class_=lambda x: x and 'medal' in str(x).lower()):
-                is_medal = True
-            
-            type_val = "medal" if is_medal else "preliminary"
-            # "final" is hard to distinguish from "medal" without text parsing, 
-            # but usually medal events ARE finals.
-            if "决赛" in event_title:
-                type_val = "final"
-
-            # 5. Construct timestamp
-            # Combine DATE_STR and start_time_str
-            # start_time_str might be "19:05"
-            try:
-                dt_str = f"{DATE_STR} {start_time_str}"
-                event_dt = datetime.strptime(dt_str, "%Y-%m-%d %H:%M")
-                # Add timezone? Assuming local time (CET is UTC+1/UTC+2).
-                # For simplicity, we store naive or assume UTC for now, or add offset.
-                # Project uses 'TIMESTAMP WITH TIME ZONE', so let's add minimal TZ info or leave naive (defaults to UTC usually in some drivers)
-                # But let's use isoformat
-                event_time_iso = event_dt.isoformat()
-            except ValueError:
-                event_time_iso = datetime.now().isoformat() # Fallback
-
-            # 6. Team China Logic
-            # Simple keyword match
-            is_team_china = "中国" in event_title or "CHN" in event_title
-
-            print(f"Processing: [{start_time_str}] {sport_name} - {event_title} ({type_val})")
-
-            # 7. Insert into Supabase
-            data = {
-                "sport": sport_name,
-                "discipline": sport_name, # Often same as sport in this scraping level
-                "title": event_title,
-                "event_time": event_time_iso,
-                "location": location,
-                "is_team_china": is_team_china,
-                "type": type_val
-            }
-            
-            # We want to avoid duplicates.
-            # We can check if exists, or use upsert if we have a unique constraint.
-            # The table has ID as PK.
-            # Let's check first.
-            
-            # Simple check: same title and approximate time?
-            # For this scraper, let's just insert.
-            # Or better: select by title and sport and day.
-            
-            existing = supabase.table("events").select("id").eq("title", event_title).eq("sport", sport_name).execute()
-            
-            if existing.data:
-                # Update?
-                print(f"  -> Event already exists: {existing.data[0]['id']}")
-                # Optional: update
-            else:
-                res = supabase.table("events").insert(data).execute()
-                if res.data:
-                    events_inserted += 1
-                    print(f"  -> Inserted: {res.data[0]['id']}")
-            
-            events_found += 1
+        event_dt = datetime.strptime(f"{day.isoformat()} {start_time_str}", "%Y-%m-%d %H:%M")
+        event_time_iso = event_dt.isoformat()
+    except ValueError:
+        # 时间无法解析时退回当天零点，保证赛事仍归在正确的日期
+        event_time_iso = datetime.combine(day, datetime.min.time()).isoformat()
+
+    # 5. Team China Logic
+    # Simple keyword match
+    is_team_china = "中国" in event_title or "CHN" in event_title
+
+    return {
+        "sport": sport_name,
+        "discipline": sport_name, # Often same as sport in this scraping level
+        "title": event_title,
+        "event_time": event_time_iso,
+        "location": location,
+        "is_team_china": is_team_china,
+        "type": type_val
+    }
 
+
+def is_event_card(tag) -> bool:
+    return tag.name == 'article' and tag.get('data-cy') == 'Event-Card'
+
+
+def parse_schedule_page(html: str, day: date) -> List[dict]:
+    """
+    解析一个比赛日的赛程页面
+    只为 h2 标题和 article 卡片建树（SoupStrainer），页面其余部分在解析时直接丢弃；
+    项目名为卡片之前最近的 h2 标题，按文档顺序单次遍历时随时记录当前 h2，
+    不必为每张卡片向前回溯整个文档，整体耗时与页面大小成线性关系
+    """
+    soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer(['h2', 'article']))
+    sport_name = "Unknown Sport"
+    events = []
+    # find_all 按文档顺序返回 h2 和 article，只遍历一次文档
+    for tag in soup.find_all(['h2', 'article']):
+        if tag.name == 'h2':
+            sport_name = tag.get_text(strip=True)
+            continue
+        if not is_event_card(tag):
+            continue
+        try:
+            events.append(parse_card(tag, sport_name, day))
         except Exception as e:
             print(f"Error processing card: {e}")
             continue
+    return events
+
+
+# ========== 写入 ==========
+
+def natural_key(event: dict) -> Tuple[str, str, str, str]:
+    """
+    赛事的自然键 (sport, title, event_time, location)
+    event_time 统一为 naive UTC 的 ISO 字符串，数据库返回的带时区格式与抓取结果可以直接比较
+    """
+    event_time = parse_event_time(event.get("event_time"))
+    return (
+        event.get("sport") or "",
+        event.get("title") or "",
+        event_time.isoformat() if event_time else "",
+        event.get("location") or "",
+    )
+
+
+async def fetch_existing_events(supabase, events: List[dict]) -> Dict[Tuple[str, str, str, str], dict]:
+    """一次查询取出这批赛事时间范围内的已有赛事，按自然键索引"""
+    times = [parse_event_time(event["event_time"]) for event in events]
+    start, end = min(times), max(times)
+    existing = {}
+    offset = 0
+    while True:
+        result = await execute_async(
+            supabase.table("events")
+            .select("id," + ",".join(EVENT_FIELDS))
+            .gte("event_time", start.isoformat())
+            .lte("event_time", end.isoformat())
+            .order("event_time")
+            .range(offset, offset + PAGE_SIZE - 1),
+            "events",
+        )
+        for row in result.data:
+            existing.setdefault(natural_key(row), row)
+        if len(result.data) < PAGE_SIZE:
+            return existing
+        offset += PAGE_SIZE
+
+
+async def merge_events(events: List[dict]) -> Dict[str, int]:
+    """
+    按自然键把抓取结果合并进 events 表
+    一次查询取出已有赛事，新赛事批量插入，其余字段有变化的赛事按 id 批量 upsert
+
+    Returns:
+        {"inserted", "updated", "unchanged"}
+    """
+    stats = {"inserted": 0, "updated": 0, "unchanged": 0}
+    # 同一页面中重复的卡片只保留第一张
+    scraped = {}
+    for event in events:
+        scraped.setdefault(natural_key(event), event)
+    if not scraped:
+        return stats
+
+    supabase = await get_supabase()
+    existing = await fetch_existing_events(supabase, list(scraped.values()))
+
+    to_insert = []
+    to_update = []
+    for key, event in scraped.items():
+        current = existing.get(key)
+        if current is None:
+            to_insert.append(event)
+        elif any(current.get(field) != event[field] for field in MERGE_FIELDS):
+            to_update.append({"id": current["id"], **event})
+        else:
+            stats["unchanged"] += 1
+
+    for offset in range(0, len(to_insert), WRITE_BATCH_SIZE):
+        batch = to_insert[offset:offset + WRITE_BATCH_SIZE]
+        await execute_async(supabase.table("events").insert(batch), "events")
+        stats["inserted"] += len(batch)
+    for offset in range(0, len(to_update), WRITE_BATCH_SIZE):
+        batch = to_update[offset:offset + WRITE_BATCH_SIZE]
+        await execute_async(supabase.table("events").upsert(batch, on_conflict="id"), "events")
+        stats["updated"] += len(batch)
+    return stats
+
+
+# ========== 进度 ==========
+
+def load_progress(state_path: str) -> set:
+    if not os.path.exists(state_path):
+        return set()
+    with open(state_path, encoding="utf-8") as f:
+        return set(json.load(f).get("completed", []))
+
+
+def save_progress(state_path: str, completed: set):
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"completed": sorted(completed)}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, state_path)
+
+
+# ========== 抓取 ==========
+
+async def fetch_day(client: httpx.AsyncClient, day: date) -> str:
+    """抓取一个比赛日的赛程页面，失败时指数退避重试"""
+    url = schedule_url(day)
+    for attempt in range(1, FETCH_RETRIES + 1):
+        try:
+            response = await client.get(url, headers=HEADERS, timeout=15)
+            response.raise_for_status()
+            return response.text
+        except Exception as e:
+            if attempt == FETCH_RETRIES:
+                raise
+            print(f"Fetch {url} failed ({e}), retrying...")
+            await asyncio.sleep(2 ** attempt)
+
+
+async def scrape_day(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, day: date) -> dict:
+    """抓取、解析并写入一个比赛日"""
+    async with semaphore:
+        html = await fetch_day(client, day)
+    # 解析是 CPU 密集操作，放到线程中执行，其他比赛日的下载可以继续进行
+    events = await asyncio.to_thread(parse_schedule_page, html, day)
+    stats = await merge_events(events)
+    print(
+        f"[{day_slug(day)}] Found {len(events)} events. "
+        f"Inserted {stats['inserted']}, updated {stats['updated']}, unchanged {stats['unchanged']}."
+    )
+    return {"found": len(events), **stats}
+
+
+async def scrape_schedule(
+    days: Optional[List[date]] = None,
+    concurrency: int = 6,
+    state_path: str = DEFAULT_STATE_PATH,
+    fresh: bool = False,
+) -> dict:
+    """
+    并发抓取多个比赛日
+
+    Returns:
+        {"found", "inserted", "updated", "unchanged", "failed": [失败的日期]}
+    """
+    days = days or competition_days()
+    completed = load_progress(state_path)
+    if fresh:
+        # 只重新抓取本次指定的日期，保留其他日期的进度
+        completed -= {day.isoformat() for day in days}
+    pending = [day for day in days if day.isoformat() not in completed]
+    if len(pending) < len(days):
+        print(f"Resuming: {len(days) - len(pending)} days already done, {len(pending)} remaining.")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    totals = {"found": 0, "inserted": 0, "updated": 0, "unchanged": 0, "failed": []}
+
+    async def run(day: date):
+        try:
+            result = await scrape_day(client, semaphore, day)
+        except Exception as e:
+            print(f"[{day_slug(day)}] Failed: {e}")
+            totals["failed"].append(day.isoformat())
+            return
+        for field in ("found", "inserted", "updated", "unchanged"):
+            totals[field] += result[field]
+        completed.add(day.isoformat())
+        save_progress(state_path, completed)
+
+    async with httpx.AsyncClient(trust_env=False, follow_redirects=True) as client:
+        await asyncio.gather(*(run(day) for day in pending))
+
+    if totals["failed"]:
+        print(f"\n{len(totals['failed'])} days failed, re-run to resume: {', '.join(sorted(totals['failed']))}")
+    elif os.path.exists(state_path) and all(day.isoformat() in completed for day in competition_days()):
+        # 整个赛期都已完成，下次运行重新全量抓取；只抓了部分日期（--days）时保留进度
+        os.remove(state_path)
+
+    print(
+        f"\nScrape complete. Found {totals['found']} events. "
+        f"Inserted {totals['inserted']}, updated {totals['updated']}, unchanged {totals['unchanged']}."
+    )
+    if totals["inserted"] or totals["updated"]:
+        # 有新增或更新的赛事时通知 API 服务刷新快照（同步 HTTP 请求，放到线程中执行）
+        await asyncio.to_thread(notify_events_refresh)
+    return totals
 
-    print(f"\nScrape complete. Found {events_found} events. Inserted {events_inserted} new events.")
 
 if __name__ == "__main__":
-    scrape_and_update()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="抓取米兰冬奥会全部比赛日赛程")
+    parser.add_argument("--days", help="只抓取指定日期，如 04-feb,05-feb")
+    parser.add_argument("--concurrency", type=int, default=6, help="同时抓取的页面数")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help="进度文件路径")
+    parser.add_argument("--fresh", action="store_true", help="忽略所选日期（默认全部）的已完成进度，重新抓取")
+    args = parser.parse_args()
+
+    selected = [parse_day_slug(slug.strip()) for slug in args.days.split(",")] if args.days else None
+    asyncio.run(scrape_schedule(selected, args.concurrency, args.state, args.fresh))
@@ -102,7 +102,76 @@ CREATE POLICY "Allow public insert access on historical_medals" ON historical_me
   FOR INSERT WITH CHECK (true);
 
 -- ========================================
--- 5. Insert Sample Data
+-- 5. Job Leases Table (定时任务租约，多 worker 部署时选主)
+-- ========================================
+CREATE TABLE IF NOT EXISTS job_leases (
+  name VARCHAR(100) PRIMARY KEY,
+  holder VARCHAR(200),
+  expires_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- Enable Row Level Security
+ALTER TABLE job_leases ENABLE ROW LEVEL SECURITY;
+
+-- Only backend workers (service role key) may read and renew leases
+DROP POLICY IF EXISTS "Allow public access on job_leases" ON job_leases;
+CREATE POLICY "Service role access on job_leases" ON job_leases
+  FOR ALL TO service_role USING (true) WITH CHECK (true);
+
+-- 获取或续约租约：租约已过期或本进程已持有时成功，返回是否持有
+-- 过期判断和新的到期时间都使用数据库时钟 NOW()，不受各 worker 本地时钟偏差影响
+CREATE OR REPLACE FUNCTION acquire_job_lease(p_name TEXT, p_holder TEXT, p_ttl_seconds DOUBLE PRECISION)
+RETURNS BOOLEAN
+LANGUAGE sql
+AS $$
+  WITH acquired AS (
+    INSERT INTO job_leases (name, holder, expires_at)
+    VALUES (p_name, p_holder, NOW() + make_interval(secs => p_ttl_seconds))
+    ON CONFLICT (name) DO UPDATE
+      SET holder = EXCLUDED.holder, expires_at = EXCLUDED.expires_at
+      WHERE job_leases.expires_at < NOW() OR job_leases.holder = EXCLUDED.holder
+    RETURNING 1
+  )
+  SELECT EXISTS (SELECT 1 FROM acquired);
+$$;
+
+-- 主动让出租约（立即过期），只对当前持有者生效
+CREATE OR REPLACE FUNCTION release_job_lease(p_name TEXT, p_holder TEXT)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+  UPDATE job_leases SET holder = NULL, expires_at = NOW()
+  WHERE name = p_name AND holder = p_holder;
+$$;
+
+REVOKE EXECUTE ON FUNCTION acquire_job_lease(TEXT, TEXT, DOUBLE PRECISION) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION release_job_lease(TEXT, TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION acquire_job_lease(TEXT, TEXT, DOUBLE PRECISION) TO service_role;
+GRANT EXECUTE ON FUNCTION release_job_lease(TEXT, TEXT) TO service_role;
+
+-- ========================================
+-- 6. Reminder Deliveries Table (提醒投递记录，防止重启或多进程重复投递)
+-- ========================================
+CREATE TABLE IF NOT EXISTS reminder_deliveries (
+  reminder_id UUID NOT NULL,
+  lead_minutes INTEGER NOT NULL,
+  delivered_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  PRIMARY KEY (reminder_id, lead_minutes)
+);
+
+-- Enable Row Level Security
+ALTER TABLE reminder_deliveries ENABLE ROW LEVEL SECURITY;
+
+-- Only the backend dispatcher (service role key) may record deliveries
+DROP POLICY IF EXISTS "Allow public access on reminder_deliveries" ON reminder_deliveries;
+CREATE POLICY "Service role access on reminder_deliveries" ON reminder_deliveries
+  FOR ALL TO service_role USING (true) WITH CHECK (true);
+
+-- 按创建时间增量加载提醒
+CREATE INDEX IF NOT EXISTS idx_user_reminders_created_at ON user_reminders(created_at);
+
+-- ========================================
+-- 7. Insert Sample Data
 -- ========================================
 
 -- Insert sample events
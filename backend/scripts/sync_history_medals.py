@@ -1,14 +1,20 @@
 """
 历史奖牌数据同步脚本
 从百度体育爬取历届冬奥会奖牌数据并同步到 Supabase
+
+用法: python backend/scripts/sync_history_medals.py [--years 2022,2018] [--concurrency 4] [--rate 2] [--force]
 """
 import httpx
-from bs4 import BeautifulSoup
-from supabase import create_client, Client
+from supabase import Client
+import argparse
 import asyncio
+import hashlib
+import json
 import logging
+import random
 import sys
 import os
+import time
 
 # 禁用全局代理以避免 SSL 错误
 os.environ["HTTP_PROXY"] = ""
@@ -20,8 +26,9 @@ os.environ["NO_PROXY"] = "*"
 # 将项目根目录添加到 python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from backend.config import SUPABASE_URL, SUPABASE_KEY
+from backend.db import get_supabase, execute_async
 from backend.scripts.sync_medals import get_iso
+from backend.medal_extract import extract_medal_rows
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -55,74 +62,207 @@ EDITIONS = [
     (1924, "夏慕尼")
 ]
 
-async def scrape_historical_medals(year, location):
-    """抓取指定届次的奖牌数据"""
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+FETCH_RETRIES = 3
+PAGE_SIZE = 1000
+CHECKSUM_FIELDS = ("iso", "country", "gold", "silver", "bronze", "rank")
+
+# 每届已成功回填的行数和校验和，数据库中该届数据与之一致时跳过抓取
+DEFAULT_MANIFEST_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "history_backfill.json"
+)
+
+
+class TokenBucket:
+    """令牌桶限流：平均每秒 rate 个请求，最多允许 capacity 个突发请求"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def edition_url(year, location) -> str:
     match_name = f"{year}年{location}冬奥会"
-    url = f"https://tiyu.baidu.com/al/major/home?page=home&match={match_name}&tab=%E5%A5%96%E7%89%8C%E6%A6%9C"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-    
-    try:
-        async with httpx.AsyncClient(trust_env=False) as client:
-            response = await client.get(url, headers=headers, timeout=10)
+    return f"https://tiyu.baidu.com/al/major/home?page=home&match={match_name}&tab=%E5%A5%96%E7%89%8C%E6%A6%9C"
+
+
+def checksum(rows) -> dict:
+    """一届数据的行数和校验和（与行顺序无关）"""
+    normalized = sorted(tuple(row.get(field) for field in CHECKSUM_FIELDS) for row in rows)
+    digest = hashlib.sha1(json.dumps(normalized, ensure_ascii=False).encode("utf-8")).hexdigest()
+    return {"count": len(normalized), "checksum": digest}
+
+
+async def scrape_historical_medals(year, location, client: httpx.AsyncClient, bucket: TokenBucket):
+    """抓取指定届次的奖牌数据，请求失败时按令牌桶限流重试"""
+    for attempt in range(1, FETCH_RETRIES + 1):
+        await bucket.acquire()
+        try:
+            response = await client.get(edition_url(year, location), headers=HEADERS, timeout=10)
             response.raise_for_status()
-            
-        soup = BeautifulSoup(response.text, 'html.parser')
-        rows = soup.select('.rankContainer.rankTable')
-        
-        if not rows:
-            logger.warning(f"未找到 {year} {location} 的数据。")
-            return []
-            
-        medal_data = []
-        for row in rows:
-            try:
-                rank_span = row.select_one('.rankHeaderRanking span')
-                rank = int(rank_span.text.strip()) if rank_span else 0
-                
-                country_name = row.select_one('.rankHeaderAreaName').text.strip()
-                gold = int(row.select_one('.medalImg.gold').text.strip())
-                silver = int(row.select_one('.medalImg.silver').text.strip())
-                bronze = int(row.select_one('.medalImg.copper').text.strip())
-                
-                medal_data.append({
-                    "year": year,
-                    "location": location,
-                    "country": country_name,
-                    "iso": get_iso(country_name),
-                    "gold": gold,
-                    "silver": silver,
-                    "bronze": bronze,
-                    "rank": rank
-                })
-            except Exception as e:
-                continue
-                
-        return medal_data
+            break
+        except Exception as e:
+            if attempt == FETCH_RETRIES:
+                raise
+            logger.warning(f"抓取 {year} 数据失败（第 {attempt} 次），稍后重试: {e}")
+            await asyncio.sleep(2 ** attempt + random.random())
         
-    except Exception as e:
-        logger.error(f"抓取 {year} 数据失败: {e}")
-        return []
-
-async def sync_history():
-    """全量同步历史数据"""
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    rows = await asyncio.to_thread(extract_medal_rows, response.text)
     
-    for year, location in EDITIONS:
-        logger.info(f"正在处理 {year} {location}...")
-        data = await scrape_historical_medals(year, location)
+    if not rows:
+        logger.warning(f"未找到 {year} {location} 的数据。")
+        return []
         
-        if data:
+    medal_data = []
+    for row in rows:
+        medal_data.append({
+            "year": year,
+            "location": location,
+            "country": row["country"],
+            "iso": get_iso(row["country"]),
+            "gold": row["gold"],
+            "silver": row["silver"],
+            "bronze": row["bronze"],
+            "rank": row["rank"]
+        })
+            
+    return medal_data
+
+async def load_stored_checksums(supabase, years) -> dict:
+    """一次（分页）查询取出所选届次的已有数据，按年份计算行数和校验和"""
+    rows_by_year = {year: [] for year in years}
+    offset = 0
+    while True:
+        result = await execute_async(
+            supabase.table("historical_medals")
+            .select(",".join(("year",) + CHECKSUM_FIELDS))
+            .in_("year", list(years))
+            .order("year")
+            .range(offset, offset + PAGE_SIZE - 1),
+            "historical_medals",
+        )
+        for row in result.data:
+            rows_by_year.setdefault(row["year"], []).append(row)
+        if len(result.data) < PAGE_SIZE:
+            break
+        offset += PAGE_SIZE
+    return {year: checksum(rows) for year, rows in rows_by_year.items()}
+
+def load_manifest(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(path: str, manifest: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+async def sync_history(
+    years=None,
+    concurrency: int = 4,
+    rate: float = 2.0,
+    force: bool = False,
+    manifest_path: str = DEFAULT_MANIFEST_PATH,
+):
+    """
+    并发回填历史数据
+
+    - 所有请求共享一个令牌桶（每秒 rate 个），同时最多 concurrency 届在处理中
+    - 数据库中某届的行数和校验和与上次回填记录一致时跳过抓取（--force 强制重新抓取）
+    - 抓取结果与数据库已有数据一致时不写库
+    - 抓取行数少于数据库已有行数时视为解析不完整，该届记为失败，不写库也不更新回填记录
+
+    Returns:
+        {"written": [...], "unchanged": [...], "skipped": [...], "failed": [...]}
+    """
+    editions = [(year, location) for year, location in EDITIONS if not years or year in years]
+    unknown = sorted(set(years or ()) - {year for year, _ in EDITIONS})
+    if unknown:
+        logger.warning(f"以下年份不在届次列表中，已忽略: {unknown}")
+    supabase: Client = await get_supabase()
+    stored = await load_stored_checksums(supabase, [year for year, _ in editions])
+    manifest = {} if force else load_manifest(manifest_path)
+
+    bucket = TokenBucket(rate=rate, capacity=max(1, concurrency))
+    semaphore = asyncio.Semaphore(concurrency)
+    summary = {"written": [], "unchanged": [], "skipped": [], "failed": []}
+
+    async def backfill(client, year, location):
+        if manifest.get(str(year)) == stored[year] and stored[year]["count"] > 0:
+            summary["skipped"].append(year)
+            return
+        async with semaphore:
+            logger.info(f"正在处理 {year} {location}...")
             try:
-                # 尝试批量写入，如果失败则尝试单条回退（处理冲突）
-                res = supabase.table("historical_medals").upsert(data, on_conflict="year,iso").execute()
-                logger.info(f"   ✅ 成功同步了 {len(data)} 条记录")
+                data = await scrape_historical_medals(year, location, client, bucket)
             except Exception as e:
-                logger.error(f"   ❌ 同步 {year} 数据到数据库失败: {e}")
-        
-        # 避免请求过快
-        await asyncio.sleep(1)
+                logger.error(f"抓取 {year} 数据失败: {e}")
+                summary["failed"].append(year)
+                return
+            if not data:
+                summary["failed"].append(year)
+                return
+
+            scraped = checksum(data)
+            if scraped["count"] < stored[year]["count"]:
+                # 页面结构变化等导致只解析出部分行，不写库也不记录，下次重新抓取
+                logger.error(
+                    f"   ❌ {year} 只解析出 {scraped['count']} 条记录，少于数据库已有的 {stored[year]['count']} 条，跳过"
+                )
+                summary["failed"].append(year)
+                return
+            if scraped == stored[year]:
+                summary["unchanged"].append(year)
+            else:
+                try:
+                    await execute_async(
+                        supabase.table("historical_medals").upsert(data, on_conflict="year,iso"), "historical_medals"
+                    )
+                    logger.info(f"   ✅ {year} 成功同步了 {len(data)} 条记录")
+                    summary["written"].append(year)
+                except Exception as e:
+                    logger.error(f"   ❌ 同步 {year} 数据到数据库失败: {e}")
+                    summary["failed"].append(year)
+                    return
+            manifest[str(year)] = scraped
+            save_manifest(manifest_path, manifest)
+
+    async with httpx.AsyncClient(trust_env=False) as client:
+        await asyncio.gather(*(backfill(client, year, location) for year, location in editions))
+
+    logger.info(
+        f"历史数据回填完成: 写入 {len(summary['written'])} 届, 无变化 {len(summary['unchanged'])} 届, "
+        f"跳过 {len(summary['skipped'])} 届, 失败 {len(summary['failed'])} 届 {sorted(summary['failed'])}"
+    )
+    return summary
 
 if __name__ == "__main__":
-    asyncio.run(sync_history())
+    parser = argparse.ArgumentParser(description="回填历届冬奥会奖牌数据")
+    parser.add_argument("--years", help="只处理指定年份，逗号分隔，如 2022,2018")
+    parser.add_argument("--concurrency", type=int, default=4, help="同时处理的届数")
+    parser.add_argument("--rate", type=float, default=2.0, help="每秒最多请求数")
+    parser.add_argument("--force", action="store_true", help="忽略回填记录，全部重新抓取")
+    args = parser.parse_args()
+
+    selected = {int(year) for year in args.years.split(",")} if args.years else None
+    asyncio.run(sync_history(selected, args.concurrency, args.rate, args.force))
@@ -3,11 +3,13 @@
 从百度体育爬取冬奥会奖牌数据并同步到 Supabase
 """
 import httpx
-from bs4 import BeautifulSoup
-from supabase import create_client, Client
+from supabase import Client
 import asyncio
+import hashlib
 import logging
 import traceback
+from datetime import datetime, timezone
+from typing import Optional
 import sys
 import os
 
@@ -21,7 +23,9 @@ os.environ["NO_PROXY"] = "*"
 # 将项目根目录添加到 python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from backend.config import SUPABASE_URL, SUPABASE_KEY
+from backend.db import get_supabase, execute_async
+from backend.medal_table import medal_table
+from backend.medal_extract import extract_medal_rows
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -82,95 +86,178 @@ def get_iso(country_name: str) -> str:
     """获取国家的 ISO 编码，如果不在映射中则生成一个临时的"""
     return COUNTRY_MAP.get(country_name, country_name[:2].upper())
 
-async def scrape_medals():
-    """从百度体育爬取奖牌数据"""
-    url = "https://tiyu.baidu.com/al/major/home?page=home&match=2026%E5%B9%B4%E7%B1%B3%E5%85%B0%E5%86%AC%E5%A5%A5%E4%BC%9A&tab=%E5%A5%96%E7%89%8C%E6%A6%9C"
+MEDAL_PAGE_URL = "https://tiyu.baidu.com/al/major/home?page=home&match=2026%E5%B9%B4%E7%B1%B3%E5%85%B0%E5%86%AC%E5%A5%A5%E4%BC%9A&tab=%E5%A5%96%E7%89%8C%E6%A6%9C"
+
+# 上一次成功同步的页面摘要，页面未变化时跳过解析和写库
+_last_page_hash: Optional[str] = None
+
+async def fetch_medal_page() -> Optional[str]:
+    """抓取百度体育奖牌榜页面，失败返回 None"""
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
     
     try:
         async with httpx.AsyncClient(trust_env=False) as client:
-            response = await client.get(url, headers=headers, timeout=10)
+            response = await client.get(MEDAL_PAGE_URL, headers=headers, timeout=10)
             response.raise_for_status()
-            
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return response.text
+    except Exception as e:
+        logger.error(f"同步奖牌数据时出错: {e}")
+        traceback.print_exc()
+        return None
+
+def parse_medal_page(html: str):
+    """从页面中解析奖牌数据行（解析引擎见 medal_extract）"""
+    rows = extract_medal_rows(html)
+    if not rows:
+        logger.warning("未能在页面中找到奖牌数据行。")
+        return []
         
-        # 查找所有奖牌行
-        rows = soup.select('.rankContainer.rankTable')
-        if not rows:
-            logger.warning("未能在页面中找到奖牌数据行。")
-            return []
+    medal_data = []
+    for row in rows:
+        country_name = row["country"]
+        medal_data.append({
+            "country": country_name,
+            "iso": get_iso(country_name),
+            "gold": row["gold"],
+            "silver": row["silver"],
+            "bronze": row["bronze"]
+        })
+        logger.info(f"Captured: {country_name} ({get_iso(country_name)}): {row['gold']}-{row['silver']}-{row['bronze']}")
             
-        medal_data = []
-        for row in rows:
-            try:
-                country_name = row.select_one('.rankHeaderAreaName').text.strip()
-                gold = int(row.select_one('.medalImg.gold').text.strip())
-                silver = int(row.select_one('.medalImg.silver').text.strip())
-                bronze = int(row.select_one('.medalImg.copper').text.strip())
-                
-                medal_data.append({
-                    "country": country_name,
-                    "iso": get_iso(country_name),
-                    "gold": gold,
-                    "silver": silver,
-                    "bronze": bronze
-                })
-                logger.info(f"Captured: {country_name} ({get_iso(country_name)}): {gold}-{silver}-{bronze}")
-            except Exception as row_e:
-                logger.error(f"解析这一行时出错: {row_e}")
-                continue
-                
-        return medal_data
-        
+    return medal_data
+
+async def scrape_medals():
+    """从百度体育爬取奖牌数据"""
+    html = await fetch_medal_page()
+    if html is None:
+        return []
+    try:
+        return parse_medal_page(html)
     except Exception as e:
-        logger.error(f"同步奖牌数据时出错: {e}")
+        logger.error(f"解析奖牌数据时出错: {e}")
         traceback.print_exc()
         return []
 
-async def sync_to_supabase(data):
-    """同步数据到 Supabase"""
+def page_hash(html: str) -> str:
+    return hashlib.sha1(html.encode("utf-8")).hexdigest()
+
+def to_medal_row(item, updated_at: str) -> dict:
+    """抓取结果 -> medals 表行"""
+    return {
+        "iso": item["iso"],
+        "country": item["country"],
+        "gold": item["gold"],
+        "silver": item["silver"],
+        "bronze": item["bronze"],
+        "updated_at": updated_at,
+    }
+
+async def sync_to_supabase(data, updated_at: Optional[str] = None):
+    """
+    同步数据到 Supabase
+    整张奖牌榜通过一次批量 upsert（基于唯一的 iso 字段）写入；
+    批量写入失败时逐行重试，找出具体失败的国家
+
+    Returns:
+        每个国家的写入结果 {iso: "upserted" | "failed: 错误信息"}
+    """
     if not data:
-        return
-        
+        return {}
+
+    updated_at = updated_at or datetime.now(timezone.utc).isoformat()
+    # 同一 ISO 只保留第一行，避免同一条 upsert 语句中重复更新同一行
+    rows = {}
+    for item in data:
+        rows.setdefault(item["iso"], to_medal_row(item, updated_at))
+
+    outcomes = {}
     try:
-        supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-        
-        # 使用 upsert，基于 iso 字段
-        # 批量更新
-        for item in data:
-            try:
-                # 首先检查是否存在
-                res = supabase.table("medals").select("id").eq("iso", item["iso"]).execute()
-                if res.data:
-                    # 更新
-                    supabase.table("medals").update({
-                        "country": item["country"],
-                        "gold": item["gold"],
-                        "silver": item["silver"],
-                        "bronze": item["bronze"],
-                        "updated_at": "now()"
-                    }).eq("iso", item["iso"]).execute()
-                else:
-                    # 插入
-                    supabase.table("medals").insert(item).execute()
-            except Exception as item_e:
-                logger.error(f"更新国家 {item['country']} 数据时出错: {item_e}")
-        
-        logger.info(f"成功同步了 {len(data)} 个国家的奖牌数据。")
-        
+        supabase: Client = await get_supabase()
+        try:
+            await execute_async(
+                supabase.table("medals").upsert(list(rows.values()), on_conflict="iso"), "medals"
+            )
+            outcomes = {iso: "upserted" for iso in rows}
+        except Exception as batch_e:
+            # 批量语句是原子的，失败时无法得知是哪一行出错，逐行重试
+            logger.warning(f"批量写入奖牌数据失败，改为逐行写入: {batch_e}")
+            for iso, row in rows.items():
+                try:
+                    await execute_async(supabase.table("medals").upsert(row, on_conflict="iso"), "medals")
+                    outcomes[iso] = "upserted"
+                except Exception as item_e:
+                    logger.error(f"更新国家 {row['country']} 数据时出错: {item_e}")
+                    outcomes[iso] = f"failed: {item_e}"
+
+        failed = [iso for iso, outcome in outcomes.items() if outcome != "upserted"]
+        logger.info(f"成功同步了 {len(outcomes) - len(failed)} 个国家的奖牌数据，失败 {len(failed)} 个。")
+
     except Exception as e:
         logger.error(f"连接 Supabase 同步数据时出错: {e}")
+        outcomes = {iso: f"failed: {e}" for iso in rows}
+
+    return outcomes
+
+async def changed_rows(data):
+    """
+    与当前奖牌榜逐行比较（国家名 + 金银铜数量），只返回有变化或新增的国家
+    独立运行脚本时先从数据库加载一次奖牌榜作为比较基准
+    """
+    if not medal_table.is_loaded:
+        await medal_table.refresh(await get_supabase())
+    return medal_table.diff(data)
+
+async def update_medal_table(changed):
+    """将已写入数据库的变化行应用到进程内的奖牌榜快照"""
+    if not changed:
+        return
+    if not medal_table.patch(changed):
+        # 出现新国家，需要数据库生成的 id，整表重新加载
+        await medal_table.refresh(await get_supabase())
 
 async def run_sync():
-    """导出给 main.py 调用的主函数"""
+    """
+    导出给 main.py 调用的主函数
+    页面内容未变化时跳过解析；否则只写入奖牌数有变化的国家
+
+    Returns:
+        本次写入的国家及结果 {iso: outcome}，无变化时为空
+    """
+    global _last_page_hash
     logger.info("开始执行奖牌同步...")
-    data = await scrape_medals()
-    if data:
-        await sync_to_supabase(data)
-    else:
+    html = await fetch_medal_page()
+    if html is None:
+        logger.warning("未抓取到任何奖牌数据。")
+        return {}
+
+    current_hash = page_hash(html)
+    if current_hash == _last_page_hash:
+        logger.info("奖牌榜页面未变化，跳过解析。")
+        return {}
+
+    # 解析是 CPU 密集操作，放到线程中执行，不阻塞同进程的 API 请求
+    data = await asyncio.to_thread(parse_medal_page, html)
+    if not data:
         logger.warning("未抓取到任何奖牌数据。")
+        return {}
+
+    changed = await changed_rows(data)
+    if not changed:
+        logger.info("奖牌数据无变化，无需写入。")
+        _last_page_hash = current_hash
+        return {}
+
+    updated_at = datetime.now(timezone.utc).isoformat()
+    outcomes = await sync_to_supabase(changed, updated_at)
+    written = [{**item, "updated_at": updated_at} for item in changed if outcomes.get(item["iso"]) == "upserted"]
+    await update_medal_table(written)
+    # 全部写入成功才记录页面摘要，否则下次同步时重试失败的行
+    if len(written) == len(changed):
+        _last_page_hash = current_hash
+    logger.info(f"奖牌数据版本: {medal_table.data_version}")
+    return outcomes
 
 if __name__ == "__main__":
     asyncio.run(run_sync())
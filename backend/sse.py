@@ -0,0 +1,28 @@
+"""
+Server-Sent Events 工具
+AI 流式输出与奖牌榜推送共用
+"""
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi.responses import StreamingResponse
+
+
+def sse_event(data, event: Optional[str] = None) -> str:
+    """编码一条 SSE 消息"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+
+def sse_comment(text: str = "") -> str:
+    """SSE 注释行，客户端会忽略，用作心跳"""
+    return f": {text}\n\n"
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    # X-Accel-Buffering 关闭反向代理缓冲，保证增量内容立即下发
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
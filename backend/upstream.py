@@ -0,0 +1,133 @@
+"""
+AI 上游共享 HTTP 客户端
+博查搜索和智谱 GLM 各使用一个进程级长连接客户端（HTTP/2 多路复用 + keep-alive），
+由 main.py 在启动时创建并预热连接、关闭时释放，避免每次调用重新进行 DNS/TCP/TLS 握手；
+同时按上游主机统计请求次数、失败次数和响应耗时（到收到响应头为止）
+"""
+import asyncio
+import logging
+import time
+from typing import Dict
+
+import httpx
+
+from backend import config
+
+logger = logging.getLogger(__name__)
+
+# 上游名称 -> 主机地址（预热时请求该地址建立连接）
+UPSTREAM_HOSTS = {
+    "bocha": "https://api.bochaai.com",
+    "zhipu": "https://open.bigmodel.cn",
+}
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+_stats: Dict[str, dict] = {}
+
+
+def _new_stats() -> dict:
+    return {"requests": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0}
+
+
+class TimedTransport(httpx.AsyncBaseTransport):
+    """包装连接池传输层，记录每个请求到收到响应头的耗时"""
+
+    def __init__(self, name: str, transport: httpx.AsyncBaseTransport):
+        self.name = name
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        stats = _stats.setdefault(self.name, _new_stats())
+        start = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception:
+            stats["errors"] += 1
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            stats["requests"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["last_ms"] = elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        if response.status_code >= 500:
+            stats["errors"] += 1
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _build_client(name: str) -> httpx.AsyncClient:
+    """创建带连接池的异步客户端（单次调用的超时由调用方按上游分别指定）"""
+    limits = httpx.Limits(
+        max_connections=config.AI_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=config.AI_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=config.AI_HTTP_KEEPALIVE_EXPIRY,
+    )
+    transport = httpx.AsyncHTTPTransport(http2=True, limits=limits)
+    return httpx.AsyncClient(
+        transport=TimedTransport(name, transport),
+        timeout=httpx.Timeout(60.0, connect=config.AI_HTTP_CONNECT_TIMEOUT),
+    )
+
+
+def init_upstream_clients() -> None:
+    """初始化所有上游客户端（重复调用直接复用已有实例）"""
+    for name in UPSTREAM_HOSTS:
+        if name not in _clients:
+            _clients[name] = _build_client(name)
+    logger.info(
+        "AI 上游连接池已创建: %s (max_connections=%s)",
+        ", ".join(UPSTREAM_HOSTS),
+        config.AI_HTTP_MAX_CONNECTIONS,
+    )
+
+
+def get_upstream_client(name: str) -> httpx.AsyncClient:
+    """
+    获取指定上游的共享客户端
+    未经过 startup（如 Serverless 冷启动）时惰性创建
+    """
+    client = _clients.get(name)
+    if client is None:
+        client = _clients[name] = _build_client(name)
+    return client
+
+
+async def prewarm_upstream_clients() -> None:
+    """预先与各上游建立连接（完成 DNS/TCP/TLS 握手），失败只记录日志"""
+
+    async def warm(name: str, url: str):
+        try:
+            await get_upstream_client(name).head(url, timeout=config.AI_HTTP_PREWARM_TIMEOUT)
+            logger.info("AI 上游 %s 连接已预热", name)
+        except Exception as e:
+            logger.warning(f"AI 上游 {name} 预热失败: {e}")
+
+    await asyncio.gather(*(warm(name, url) for name, url in UPSTREAM_HOSTS.items()))
+
+
+async def close_upstream_clients() -> None:
+    """关闭所有上游客户端，释放长连接"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+    if clients:
+        logger.info("AI 上游连接池已关闭")
+
+
+def upstream_stats() -> Dict[str, dict]:
+    """按上游主机返回请求统计（耗时单位为毫秒）"""
+    result = {}
+    for name, stats in _stats.items():
+        requests = stats["requests"]
+        result[name] = {
+            "requests": requests,
+            "errors": stats["errors"],
+            "avg_ms": round(stats["total_ms"] / requests, 1) if requests else 0.0,
+            "max_ms": round(stats["max_ms"], 1),
+            "last_ms": round(stats["last_ms"], 1),
+        }
+    return result
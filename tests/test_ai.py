@@ -0,0 +1,350 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend import config
+from backend.async_cache import AsyncTTLCache
+from backend.event_store import EventStore, get_event_store
+from backend.routers import ai
+
+
+def build_prompt(subject, context):
+    return f"{subject}|{context}"
+
+
+def parse_events(messages):
+    """把 SSE 消息解析为 [(event, data), ...]，没有 event 行的消息记为 "message" """
+    events = []
+    for message in messages:
+        event = "message"
+        for line in message.strip().split("\n"):
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                events.append((event, json.loads(line[len("data: "):])))
+    return events
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(ai, "search_cache", AsyncTTLCache("search", max_size=100, ttl=60))
+    monkeypatch.setattr(ai, "insight_cache", AsyncTTLCache("insight", max_size=100, ttl=60))
+    monkeypatch.setattr(config, "AI_DEADLINE", 0.5)
+    monkeypatch.setattr(config, "AI_SEARCH_BUDGET_RATIO", 0.2)
+    monkeypatch.setattr(config, "AI_SPECULATIVE_GENERATION", False)
+
+
+def stub_search(monkeypatch, result="背景", delay=0.0):
+    calls = []
+
+    async def call_bocha_search(query, timeout=20.0):
+        calls.append((query, timeout))
+        await asyncio.sleep(delay)
+        return result
+
+    monkeypatch.setattr(ai, "call_bocha_search", call_bocha_search)
+    return calls
+
+
+def stub_glm(monkeypatch, respond):
+    """respond(prompt) -> (delay, result)"""
+    prompts = []
+
+    async def call_glm_api(prompt, timeout=60.0):
+        prompts.append((prompt, timeout))
+        delay, result = respond(prompt)
+        await asyncio.sleep(delay)
+        return result
+
+    monkeypatch.setattr(ai, "call_glm_api", call_glm_api)
+    return prompts
+
+
+def run_pipeline():
+    started = time.monotonic()
+    result = asyncio.run(ai.run_insight_pipeline("q", build_prompt, "谷爱凌"))
+    return result, time.monotonic() - started
+
+
+# ---------- run_insight_pipeline ----------
+
+def test_search_context_is_used_for_generation(monkeypatch):
+    searches = stub_search(monkeypatch, "背景")
+    prompts = stub_glm(monkeypatch, lambda prompt: (0, f"答:{prompt}"))
+    result, _ = run_pipeline()
+    assert result == "答:谷爱凌|背景"
+    # 搜索预算 = AI_DEADLINE * AI_SEARCH_BUDGET_RATIO，生成只能用剩余时间
+    assert searches == [("q", pytest.approx(0.1))]
+    assert 0.3 < prompts[0][1] <= 0.5
+
+
+def test_slow_search_is_abandoned_after_its_slice(monkeypatch):
+    stub_search(monkeypatch, "背景", delay=5)
+    prompts = stub_glm(monkeypatch, lambda prompt: (0, f"答:{prompt}"))
+    result, elapsed = run_pipeline()
+    assert result == "答:谷爱凌|"
+    assert elapsed < 0.4
+    assert [prompt for prompt, _ in prompts] == ["谷爱凌|"]
+
+
+def test_speculative_generation_wins_while_search_runs(monkeypatch):
+    monkeypatch.setattr(config, "AI_SPECULATIVE_GENERATION", True)
+    stub_search(monkeypatch, "背景", delay=0.05)
+    # 带上下文的生成较慢，不带上下文的推测性生成先返回
+    prompts = stub_glm(monkeypatch, lambda prompt: (0.3, "带上下文") if prompt.endswith("背景") else (0.01, "推测"))
+    result, elapsed = run_pipeline()
+    assert result == "推测"
+    assert elapsed < 0.2
+    assert [prompt for prompt, _ in prompts] == ["谷爱凌|"]
+
+
+def test_contextual_generation_wins_when_speculation_fails(monkeypatch):
+    monkeypatch.setattr(config, "AI_SPECULATIVE_GENERATION", True)
+    stub_search(monkeypatch, "背景", delay=0.02)
+    prompts = stub_glm(monkeypatch, lambda prompt: (0.05, "带上下文") if prompt.endswith("背景") else (0, None))
+    result, _ = run_pipeline()
+    assert result == "带上下文"
+    assert sorted(prompt for prompt, _ in prompts) == ["谷爱凌|", "谷爱凌|背景"]
+
+
+def test_speculation_is_not_repeated_when_search_is_empty(monkeypatch):
+    monkeypatch.setattr(config, "AI_SPECULATIVE_GENERATION", True)
+    stub_search(monkeypatch, "", delay=0)
+    prompts = stub_glm(monkeypatch, lambda prompt: (0.05, "推测"))
+    result, _ = run_pipeline()
+    assert result == "推测"
+    assert len(prompts) == 1
+
+
+def test_deadline_expiry_returns_none(monkeypatch):
+    stub_search(monkeypatch, "背景")
+    stub_glm(monkeypatch, lambda prompt: (5, "太晚"))
+    result, elapsed = run_pipeline()
+    assert result is None
+    assert 0.45 < elapsed < 0.8
+
+
+# ---------- stream_insight ----------
+
+def collect(generator):
+    async def main():
+        return [message async for message in generator]
+
+    return asyncio.run(main())
+
+
+def stub_stream(monkeypatch, deltas, delay_after=None):
+    calls = []
+
+    async def stream_glm_api(prompt, timeout=60.0):
+        calls.append((prompt, timeout))
+        for delta in deltas:
+            yield delta
+        if delay_after is not None:
+            await asyncio.sleep(delay_after)
+            yield "太晚"
+
+    monkeypatch.setattr(ai, "stream_glm_api", stream_glm_api)
+    return calls
+
+
+def test_stream_emits_status_then_deltas_and_caches(monkeypatch):
+    stub_search(monkeypatch, "背景")
+    calls = stub_stream(monkeypatch, ["第一段", "第二段"])
+    events = parse_events(collect(ai.stream_insight("k", "q", build_prompt, "谷爱凌")))
+    assert events == [
+        ("status", {"stage": "searching"}),
+        ("status", {"stage": "generating"}),
+        ("message", {"delta": "第一段"}),
+        ("message", {"delta": "第二段"}),
+        ("done", {"success": True, "cached": False}),
+    ]
+    assert calls[0][0] == "谷爱凌|背景" and calls[0][1] <= 0.5
+    assert ai.insight_cache.get("k") == "第一段第二段"
+
+    events = parse_events(collect(ai.stream_insight("k", "q", build_prompt, "谷爱凌")))
+    assert events == [("message", {"delta": "第一段第二段"}), ("done", {"success": True, "cached": True})]
+
+
+def test_stream_enforces_total_deadline(monkeypatch):
+    stub_search(monkeypatch, "背景", delay=5)
+    stub_stream(monkeypatch, ["第一段"], delay_after=5)
+    started = time.monotonic()
+    events = parse_events(collect(ai.stream_insight("k", "q", build_prompt, "谷爱凌")))
+    assert time.monotonic() - started < 0.8
+    assert events[:3] == [
+        ("status", {"stage": "searching"}),
+        ("status", {"stage": "generating"}),
+        ("message", {"delta": "第一段"}),
+    ]
+    assert events[3][0] == "error" and "超时" in events[3][1]["message"]
+    # 部分内容不写入缓存
+    assert ai.insight_cache.get("k") is None
+
+
+# ---------- stream_glm_api ----------
+
+class ChunkStream(httpx.AsyncByteStream):
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def sse_lines(*payloads):
+    return "".join(f"data: {payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)}\n\n" for payload in payloads)
+
+
+def delta(**fields):
+    return {"choices": [{"delta": fields}]}
+
+
+def stub_upstream(monkeypatch, body, status_code=200, chunk_size=7):
+    """按固定字节数切分响应体，使 SSE 行（以及多字节的中文字符）跨越多个网络分块"""
+    data = body.encode("utf-8")
+    chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+    requests = []
+
+    def handler(request):
+        requests.append(json.loads(request.content))
+        return httpx.Response(status_code, stream=ChunkStream(chunks))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(ai, "ZHIPU_API_KEY", "test-key")
+    monkeypatch.setattr(ai, "get_upstream_client", lambda name: client)
+    return requests
+
+
+def stream_glm(prompt="提示"):
+    async def main():
+        return [chunk async for chunk in ai.stream_glm_api(prompt)]
+
+    return asyncio.run(main())
+
+
+def test_stream_glm_parses_partial_lines_until_done(monkeypatch):
+    body = (
+        ": keep-alive\n\n"
+        + sse_lines(delta(role="assistant"), delta(content="你好"), {"choices": []}, delta(content="，世界"))
+        + "data: [DONE]\n\n"
+        + sse_lines(delta(content="不应出现"))
+    )
+    requests = stub_upstream(monkeypatch, body)
+    assert stream_glm() == ["你好", "，世界"]
+    assert requests[0]["stream"] is True
+
+
+def test_stream_glm_falls_back_to_reasoning(monkeypatch):
+    stub_upstream(monkeypatch, sse_lines(delta(reasoning_content="思考"), delta(reasoning_content="结果 ")) + "data: [DONE]\n\n")
+    assert stream_glm() == ["思考结果"]
+
+
+def test_stream_glm_raises_on_error_status_and_mid_stream_error(monkeypatch):
+    stub_upstream(monkeypatch, '{"error": "rate limited"}', status_code=429)
+    with pytest.raises(RuntimeError, match="429"):
+        stream_glm()
+
+    stub_upstream(monkeypatch, sse_lines(delta(content="前半"), {"error": {"code": "1301", "message": "敏感内容"}}))
+    with pytest.raises(RuntimeError, match="1301"):
+        stream_glm()
+
+
+def test_stream_insight_event_sequence_with_mid_stream_error(monkeypatch):
+    stub_search(monkeypatch, "背景")
+    stub_upstream(monkeypatch, sse_lines(delta(content="前半"), {"error": {"message": "敏感内容"}}))
+    events = parse_events(collect(ai.stream_insight("k", "q", build_prompt, "谷爱凌")))
+    assert events == [
+        ("status", {"stage": "searching"}),
+        ("status", {"stage": "generating"}),
+        ("message", {"delta": "前半"}),
+        ("error", {"success": False, "message": "AI 助手服务异常，请稍后再试。"}),
+    ]
+    assert ai.insight_cache.get("k") is None
+
+
+def test_stream_insight_end_to_end_through_upstream(monkeypatch):
+    stub_search(monkeypatch, "")
+    stub_upstream(monkeypatch, sse_lines(delta(content="完整"), delta(content="回答")) + "data: [DONE]\n\n")
+    events = parse_events(collect(ai.stream_insight("k", "q", build_prompt, "谷爱凌")))
+    assert [event for event, _ in events] == ["status", "status", "message", "message", "done"]
+    assert ai.insight_cache.get("k") == "完整回答"
+
+
+# ---------- 搜索缓存预热 ----------
+
+ADMIN = {"X-Admin-Token": "secret"}
+
+
+@pytest.fixture
+def store():
+    store = EventStore()
+    store.load([
+        {"id": "e1", "title": "女子大跳台决赛", "event_time": "2026-02-10T12:00:00"},
+        {"id": "e2", "title": "男子速降", "event_time": "2026-02-11T12:00:00"},
+    ])
+    return store
+
+
+@pytest.fixture
+def client(monkeypatch, store):
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(config, "AI_PREWARM_ATHLETES", ["谷爱凌"])
+    monkeypatch.setattr(ai, "_prewarm_task", None)
+    app = FastAPI()
+    app.include_router(ai.router)
+    app.dependency_overrides[get_event_store] = lambda: store
+    with TestClient(app) as client:
+        yield client
+
+
+def test_prewarm_then_cached_searches_hit(monkeypatch, store):
+    monkeypatch.setattr(config, "AI_PREWARM_ATHLETES", ["谷爱凌"])
+    calls = stub_search(monkeypatch, "背景")
+    summary = asyncio.run(ai.prewarm_search_cache(store))
+    assert summary == {"total": 3, "skipped": 0, "loaded": 3, "failed": 0}
+    assert len(calls) == 3
+
+    query = ai.event_search_query(ai.sanitize_input("女子大跳台决赛"))
+    assert asyncio.run(ai.cached_bocha_search(query)) == "背景"
+    assert len(calls) == 3
+    assert ai.search_cache.stats["hits"] == 1
+
+    # 再次预热时已缓存的搜索词全部跳过
+    assert asyncio.run(ai.prewarm_search_cache(store))["skipped"] == 3
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize("path, method", [("/api/ai/stats", "get"), ("/api/ai/search-cache/prewarm", "post")])
+def test_admin_endpoints_require_token(client, monkeypatch, path, method):
+    request = getattr(client, method)
+    assert request(path).status_code == 401
+    assert request(path, headers={"X-Admin-Token": "wrong"}).status_code == 401
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "")
+    assert request(path, headers=ADMIN).status_code == 403
+
+
+def test_prewarm_route_rejects_concurrent_runs(client, monkeypatch):
+    calls = stub_search(monkeypatch, "背景", delay=0.2)
+    response = client.post("/api/ai/search-cache/prewarm", headers=ADMIN)
+    assert response.status_code == 200
+    response = client.post("/api/ai/search-cache/prewarm", headers=ADMIN)
+    assert response.status_code == 409
+    assert response.json()["detail"] == "搜索缓存预热正在进行中"
+
+    deadline = time.monotonic() + 5
+    while not ai._prewarm_task.done() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert len(calls) == 3
+
+    stats = client.get("/api/ai/stats", headers=ADMIN).json()
+    assert stats["search_cache"]["size"] == 3
+    # 上一次预热结束后可以再次启动，已缓存的搜索词不再请求
+    assert client.post("/api/ai/search-cache/prewarm", headers=ADMIN).status_code == 200
+    assert len(calls) == 3
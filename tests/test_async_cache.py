@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from backend.async_cache import AsyncTTLCache, normalize_key
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_normalize_key():
+    assert normalize_key("  Gu   Ailing ") == normalize_key("gu ailing")
+
+
+def test_concurrent_misses_share_one_load():
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def main():
+        cache = AsyncTTLCache("t", max_size=10, ttl=60)
+        results = await asyncio.gather(*(cache.get_or_load("k", loader) for _ in range(5)))
+        return cache, results
+
+    cache, results = run(main())
+    assert results == ["value"] * 5
+    assert calls == 1
+    assert cache.stats["coalesced"] == 4
+    assert cache.get("k") == "value"
+
+
+def test_stale_value_served_while_refreshing(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("backend.async_cache.time.monotonic", lambda: clock[0])
+    values = iter(["old", "new"])
+
+    async def loader():
+        return next(values)
+
+    async def main():
+        cache = AsyncTTLCache("t", max_size=10, ttl=10, stale_ttl=100)
+        assert await cache.get_or_load("k", loader) == "old"
+        clock[0] += 50
+        # 过期但仍在 stale 窗口内：立即返回旧值并在后台刷新
+        assert await cache.get_or_load("k", loader) == "old"
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert await cache.get_or_load("k", loader) == "new"
+        return cache
+
+    cache = run(main())
+    assert cache.stats["stale_hits"] == 1
+
+
+def test_expired_beyond_stale_window_reloads(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("backend.async_cache.time.monotonic", lambda: clock[0])
+    values = iter(["old", "new"])
+
+    async def loader():
+        return next(values)
+
+    async def main():
+        cache = AsyncTTLCache("t", max_size=10, ttl=10, stale_ttl=5)
+        await cache.get_or_load("k", loader)
+        clock[0] += 20
+        return await cache.get_or_load("k", loader)
+
+    assert run(main()) == "new"
+
+
+def test_failures_are_not_cached_and_propagate():
+    attempts = 0
+
+    async def failing():
+        nonlocal attempts
+        attempts += 1
+        raise RuntimeError("upstream down")
+
+    async def returns_none():
+        return None
+
+    async def main():
+        cache = AsyncTTLCache("t", max_size=10, ttl=60)
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load("k", failing)
+        assert await cache.get_or_load("n", returns_none) is None
+        return cache
+
+    cache = run(main())
+    assert len(cache) == 0
+    assert cache.stats["errors"] == 1
+
+
+def test_lru_eviction():
+    cache = AsyncTTLCache("t", max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+    assert cache.get("a") is None
+    assert cache.get("c") == 3
@@ -0,0 +1,50 @@
+from datetime import date, datetime
+
+from backend.event_store import EventStore, beijing_day, parse_event_time
+
+
+def make_event(event_id, event_time, **fields):
+    return {"id": event_id, "title": f"赛事{event_id}", "event_time": event_time, **fields}
+
+
+def make_store(*events):
+    store = EventStore()
+    store.load(events)
+    return store
+
+
+def test_parse_event_time_normalizes_to_naive_utc():
+    assert parse_event_time("2026-02-10T08:00:00+08:00") == datetime(2026, 2, 10, 0, 0)
+    assert parse_event_time("2026-02-10T00:00:00Z") == datetime(2026, 2, 10, 0, 0)
+    assert parse_event_time(None) is None
+
+
+def test_beijing_day_boundary():
+    # event_time + 7h 跨过零点即属于下一个北京时间日期
+    assert beijing_day(datetime(2026, 2, 10, 16, 59)) == date(2026, 2, 10)
+    assert beijing_day(datetime(2026, 2, 10, 17, 0)) == date(2026, 2, 11)
+
+
+def test_query_by_day_sorted_and_filtered():
+    store = make_store(
+        make_event("b", "2026-02-10T12:00:00", is_team_china=True, type="final"),
+        make_event("a", "2026-02-10T03:00:00", is_team_china=False, type="preliminary"),
+        make_event("c", "2026-02-10T18:00:00", is_team_china=True, type="preliminary"),
+    )
+    day = store.query(day=date(2026, 2, 10))
+    assert [e["id"] for e in day] == ["a", "b"]
+    assert [e["id"] for e in store.query(day=date(2026, 2, 11))] == ["c"]
+    assert [e["id"] for e in store.query(team_china_only=True, finals_only=True)] == ["b"]
+    assert store.query(day=date(2026, 3, 1)) == []
+
+
+def test_query_since_and_limit_and_untimed_last():
+    store = make_store(
+        make_event("late", "2026-02-12T00:00:00"),
+        make_event("none", None),
+        make_event("early", "2026-02-08T00:00:00"),
+    )
+    assert [e["id"] for e in store.query()] == ["early", "late", "none"]
+    assert [e["id"] for e in store.query(since=datetime(2026, 2, 9))] == ["late"]
+    assert [e["id"] for e in store.query(limit=1)] == ["early"]
+    assert store.get("none")["id"] == "none"
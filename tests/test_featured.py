@@ -0,0 +1,89 @@
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from backend.event_store import EventStore
+from backend.featured import FeaturedPolicy, FeaturedRanker
+
+NOW = datetime(2026, 2, 10, 0, 0)
+
+
+def make_store(*events):
+    store = EventStore()
+    store.load(events)
+    return store
+
+
+def event(event_id, event_time, china=False, final=False):
+    return {
+        "id": event_id,
+        "title": f"赛事{event_id}",
+        "event_time": event_time,
+        "is_team_china": china,
+        "type": "final" if final else "preliminary",
+    }
+
+
+def test_highlights_outrank_nearby_ordinary_events():
+    store = make_store(
+        event("plain-soon", "2026-02-10T01:00:00"),
+        event("china-final", "2026-02-11T12:00:00", china=True, final=True),
+        event("final", "2026-02-10T20:00:00", final=True),
+    )
+    top = FeaturedRanker().rank(store, 2, now=NOW)
+    # 结果按时间升序返回
+    assert [e["id"] for e in top] == ["final", "china-final"]
+
+
+def test_past_events_excluded_without_day():
+    store = make_store(
+        event("past", "2026-02-09T12:00:00", china=True, final=True),
+        event("future", "2026-02-10T12:00:00"),
+    )
+    assert [e["id"] for e in FeaturedRanker().rank(store, 5, now=NOW)] == ["future"]
+
+
+@pytest.fixture
+def beijing_tz(monkeypatch):
+    """把进程时区切到 UTC+8，本地时间与 UTC 相差 8 小时"""
+    monkeypatch.setenv("TZ", "Asia/Shanghai")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_default_now_is_utc_on_non_utc_hosts(beijing_tz):
+    # event_time 为 naive UTC；若按本地时间比较，1 小时后开始的赛事会被当成已过去
+    utc_now = datetime.now(timezone.utc).replace(tzinfo=None)
+    store = make_store(
+        event("past", (utc_now - timedelta(hours=1)).isoformat()),
+        event("future", (utc_now + timedelta(hours=1)).isoformat()),
+    )
+    assert [e["id"] for e in FeaturedRanker().rank(store, 5)] == ["future"]
+
+
+def test_day_shows_only_highlights_when_any_exist():
+    store = make_store(
+        event("plain", "2026-02-10T02:00:00"),
+        event("china", "2026-02-10T05:00:00", china=True),
+    )
+    ranker = FeaturedRanker()
+    assert [e["id"] for e in ranker.rank(store, 5, day=date(2026, 2, 10), now=NOW)] == ["china"]
+    relaxed = FeaturedRanker(FeaturedPolicy(date_highlights_only=False))
+    assert [e["id"] for e in relaxed.rank(store, 5, day=date(2026, 2, 10), now=NOW)] == ["plain", "china"]
+
+
+def test_ties_are_stable_by_time_then_id():
+    store = make_store(
+        event("b", "2026-02-10T06:00:00", china=True),
+        event("a", "2026-02-10T06:00:00", china=True),
+        event("c", "2026-02-10T07:00:00", china=True),
+    )
+    assert [e["id"] for e in FeaturedRanker().rank(store, 2, now=NOW)] == ["a", "b"]
+
+
+def test_proximity_halves_every_half_life():
+    ranker = FeaturedRanker(FeaturedPolicy(proximity_weight=8, proximity_half_life_hours=1))
+    assert ranker.proximity_score(datetime(2026, 2, 10, 2), NOW) == 2
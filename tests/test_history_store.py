@@ -0,0 +1,42 @@
+import os
+
+from backend import config, history_store
+from backend.history_store import HistoryDataset, build_artifact, write_artifact
+
+MEDAL_ROWS = [
+    {"Year": 2022, "City": "北京", "Rank": 2, "Country": "德国", "gold": 12, "silver": 10, "bronze": 5},
+    {"Year": 2022, "City": "北京", "Rank": 1, "Country": "挪威", "gold": 16, "silver": 8, "bronze": 13},
+]
+EVENT_ROWS = [
+    {"id": 7, "year": 2022, "sport_name": "冬季两项", "event_name": "男子接力", "gold_country": "挪威",
+     "countries_count": 91, "events_count": 109},
+]
+
+
+def test_artifact_round_trip():
+    dataset = HistoryDataset(build_artifact(MEDAL_ROWS, EVENT_ROWS))
+    assert dataset.editions == [{"year": 2022, "location": "北京", "countries_count": 91, "events_count": 109}]
+    assert [m["country"] for m in dataset.medals_by_year[2022]] == ["挪威", "德国"]
+    assert dataset.medals_by_year[2022][0]["total"] == 37
+    assert dataset.events_by_year[2022][0]["id"] == "7"
+
+
+def test_dataset_picks_up_new_export(tmp_path, monkeypatch):
+    path = str(tmp_path / "history.json.gz")
+    monkeypatch.setattr(config, "HISTORY_ARTIFACT_PATH", path)
+    monkeypatch.setattr(config, "HISTORY_RECHECK_INTERVAL", 0)
+    monkeypatch.setattr(history_store, "_dataset", None)
+    monkeypatch.setattr(history_store, "_loaded_mtime", None)
+    monkeypatch.setattr(history_store, "_checked_at", None)
+
+    # 文件缺失不会被永久缓存
+    assert history_store.get_history_dataset() is None
+    write_artifact(build_artifact(MEDAL_ROWS[:1], EVENT_ROWS), path)
+    first = history_store.get_history_dataset()
+    assert len(first.medals_by_year[2022]) == 1
+
+    write_artifact(build_artifact(MEDAL_ROWS, EVENT_ROWS), path)
+    os.utime(path, (os.path.getmtime(path) + 10,) * 2)
+    second = history_store.get_history_dataset()
+    assert second.version != first.version
+    assert len(second.medals_by_year[2022]) == 2
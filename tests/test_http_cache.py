@@ -0,0 +1,33 @@
+from starlette.requests import Request
+
+from backend.http_cache import cached_json, etag_matches, make_etag
+
+
+def request_with(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match is not None else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": b""})
+
+
+def test_etag_matches_variants():
+    etag = make_etag("medals", "abc")
+    assert not etag_matches(request_with(), etag)
+    assert etag_matches(request_with(etag), etag)
+    assert etag_matches(request_with(f'"other", W/{etag}'), etag)
+    assert etag_matches(request_with("*"), etag)
+    assert not etag_matches(request_with('"other"'), etag)
+
+
+def test_make_etag_depends_on_every_part():
+    assert make_etag("medals", "v1", None) == make_etag("medals", "v1", None)
+    assert make_etag("medals", "v1", "欧洲") != make_etag("medals", "v1", None)
+
+
+def test_cached_json_returns_304_on_match():
+    response = cached_json(request_with(), {"a": 1}, "no-cache")
+    etag = response.headers["etag"]
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+
+    again = cached_json(request_with(etag), {"a": 1}, "no-cache")
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
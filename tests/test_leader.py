@@ -0,0 +1,63 @@
+import asyncio
+from types import SimpleNamespace
+
+from backend import leader
+from backend.leader import LeaderElector, SupabaseLease
+
+
+class FakeRpcClient:
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=self.result))
+
+
+def test_supabase_lease_uses_database_functions(monkeypatch):
+    client = FakeRpcClient(True)
+
+    async def get_supabase():
+        return client
+
+    monkeypatch.setattr(leader, "get_supabase", get_supabase)
+    lease = SupabaseLease("medal_sync", ttl=60, holder="host:1")
+
+    assert asyncio.run(lease.acquire()) is True
+    asyncio.run(lease.release())
+    assert client.calls == [
+        ("acquire_job_lease", {"p_name": "medal_sync", "p_holder": "host:1", "p_ttl_seconds": 60}),
+        ("release_job_lease", {"p_name": "medal_sync", "p_holder": "host:1"}),
+    ]
+
+    client.result = False
+    assert asyncio.run(lease.acquire()) is False
+
+
+class FlakyLease:
+    def __init__(self):
+        self.outcomes = []
+
+    async def acquire(self):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def test_elector_keeps_leadership_until_lease_expires_on_errors(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(leader.time, "monotonic", lambda: clock[0])
+    lease = FlakyLease()
+    elector = LeaderElector("job", lease, ttl=60)
+
+    lease.outcomes = [True, RuntimeError("db down"), RuntimeError("db down"), False]
+    assert asyncio.run(elector.try_acquire())
+    clock[0] = 130.0
+    # 续约失败，但上次获得的租约尚未到期
+    assert asyncio.run(elector.try_acquire())
+    clock[0] = 161.0
+    assert not asyncio.run(elector.try_acquire())
+    assert not asyncio.run(elector.try_acquire())
+    assert LeaderElector("solo").is_leader
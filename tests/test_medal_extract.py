@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from backend import medal_extract
+from backend.medal_extract import EXTRACTORS, count_medal_rows, extract_medal_rows
+
+ROWS = [("1", "挪威", 5, 3, 2), ("2", "中国", 4, 2, 1), ("3", "美国", 3, 3, 3), ("4", "德国", 1, 0, 0)]
+
+
+def medal_row_html(rank, country, gold, silver, bronze, broken=False):
+    # broken: 行内一个 <p> 缺少结束标签
+    note = "<p>备注" if broken else "<p>备注</p>"
+    return (
+        '<div class="rankContainer rankTable">'
+        f'<div class="rankHeaderRanking"><span>{rank}</span></div>'
+        f'<div class="rankHeaderAreaName">{country}</div>'
+        f"{note}"
+        f'<div class="medalImg gold">{gold}</div>'
+        f'<div class="medalImg silver">{silver}</div>'
+        f'<div class="medalImg copper">{bronze}</div>'
+        "</div>"
+    )
+
+
+def page(broken_index=None):
+    rows = "".join(medal_row_html(*row, broken=(i == broken_index)) for i, row in enumerate(ROWS))
+    return f"<html><body><div class='medalList'>{rows}</div></body></html>"
+
+
+def expected():
+    return [
+        {"country": country, "gold": gold, "silver": silver, "bronze": bronze, "rank": int(rank)}
+        for rank, country, gold, silver, bronze in ROWS
+    ]
+
+
+@pytest.mark.parametrize("broken_index", [None, 1])
+def test_stream_matches_bs4(broken_index):
+    html = page(broken_index)
+    assert EXTRACTORS["bs4"](html) == expected()
+    assert EXTRACTORS["stream"](html) == expected()
+
+
+def test_stream_survives_unclosed_row_element():
+    # 第二行的行元素没有闭合，下一个奖牌行开始时结束上一行
+    html = page().replace("</div><div class=\"rankContainer rankTable\">", "<div class=\"rankContainer rankTable\">", 1)
+    assert count_medal_rows(html) == 4
+    assert EXTRACTORS["stream"](html) == expected()
+
+
+def test_extract_medal_rows_falls_back_on_short_result(monkeypatch):
+    html = page()
+    monkeypatch.setitem(EXTRACTORS, "stream", lambda html: expected()[:1])
+    assert extract_medal_rows(html, ["stream", "bs4"]) == expected()
+
+
+def test_extract_medal_rows_returns_longest_partial_result(monkeypatch):
+    html = page()
+    monkeypatch.setitem(EXTRACTORS, "stream", lambda html: expected()[:2])
+    monkeypatch.setitem(EXTRACTORS, "bs4", lambda html: expected()[:3])
+    assert extract_medal_rows(html, ["stream", "bs4"]) == expected()[:3]
+
+
+def embedded(rows):
+    items = [{"countryName": c, "gold": g, "silver": sv, "bronze": b, "rank": int(r)} for r, c, g, sv, b in rows]
+    return f"<script>window.__INITIAL_STATE__ = {json.dumps({'top3': items[:1], 'list': items}, ensure_ascii=False)};</script>"
+
+
+def test_short_embedded_json_falls_back_to_dom():
+    # 内嵌数据只有一个国家的卡片，少于页面中的 4 行
+    html = embedded(ROWS[:1]) + page()
+    assert EXTRACTORS["json"](html) == expected()[:1]
+    assert extract_medal_rows(html, ["json", "bs4"]) == expected()
+
+
+def test_embedded_json_prefers_longest_list():
+    # 前三名等较短的列表在完整榜单之前出现
+    html = embedded(ROWS) + page()
+    assert EXTRACTORS["json"](html) == expected()
+    assert extract_medal_rows(html, ["json", "bs4"]) == expected()
+
+
+def test_unknown_and_empty_engines():
+    assert extract_medal_rows("<html></html>", ["missing", "stream", "bs4"]) == []
+    assert medal_extract.count_medal_rows("<div class='rankTable'></div>") == 0
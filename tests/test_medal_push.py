@@ -0,0 +1,87 @@
+import asyncio
+import json
+
+from backend.medal_push import HEARTBEAT, RESYNC, MedalBroadcaster
+from backend.medal_table import DIFF_FIELDS, MedalTable
+
+
+def row(iso, gold, silver=0, bronze=0):
+    return {"id": iso.lower(), "iso": iso, "country": iso, "gold": gold, "silver": silver, "bronze": bronze}
+
+
+def make_table():
+    table = MedalTable()
+    table.load([row("NO", 5), row("CN", 3), row("US", 2)])
+    return table
+
+
+def changed(item):
+    return {"iso": item["iso"], "country": item["country"], "gold": item["gold"], "silver": item["silver"], "bronze": item["bronze"]}
+
+
+def test_changes_include_rank_shifts_and_removed_rows():
+    table = make_table()
+    previous = {iso: dict(table.get(iso)) for iso in ("NO", "CN", "US")}
+    previous["FI"] = {**row("FI", 0, 0, 1), "rank": 4}
+    table.patch([changed(row("US", 4))])
+
+    diff = table.changes(previous)
+    assert diff["fields"] == DIFF_FIELDS
+    # 美国名次上升，中国因此下降；挪威不变
+    assert diff["rows"] == [["US", "US", 2, 4, 0, 0], ["CN", "CN", 3, 3, 0, 0]]
+    assert diff["removed"] == ["FI"]
+    assert diff["version"] == table.data_version
+
+
+def test_listeners_only_notified_on_changes():
+    table = MedalTable()
+    received = []
+    table.add_listener(received.append)
+    # 首次加载不通知
+    table.load([row("NO", 5), row("CN", 3)])
+    table.patch([changed(row("NO", 5))])
+    assert received == []
+    table.patch([changed(row("CN", 6))])
+    assert [r["rows"] for r in received] == [[["CN", "CN", 1, 6, 0, 0], ["NO", "NO", 2, 5, 0, 0]]]
+
+
+def test_broadcast_serializes_once_and_bounds_queues():
+    async def scenario():
+        table = make_table()
+        broadcaster = MedalBroadcaster(table, queue_size=2, heartbeat=3600)
+        fast, slow = broadcaster.subscribe(), broadcaster.subscribe()
+
+        table.patch([changed(row("US", 9))])
+        message = fast.get_nowait()
+        assert message.startswith("event: diff\n")
+        payload = json.loads(message.split("data: ", 1)[1])
+        assert payload["rows"][0] == ["US", "US", 1, 9, 0, 0]
+        # 所有连接共享同一个已编码的字符串
+        assert slow.get_nowait() is message
+
+        for gold in (10, 11, 12):
+            table.patch([changed(row("US", gold))])
+        # 慢连接积压超过上限：丢弃积压，只保留 resync
+        assert slow.qsize() == 1 and slow.get_nowait() == RESYNC
+        assert broadcaster.stats() == {"subscribers": 2, "published": 4, "dropped": 2}
+        await broadcaster.close()
+
+    asyncio.run(scenario())
+
+
+def test_stream_sends_hello_and_unsubscribes_on_close():
+    async def scenario():
+        table = make_table()
+        broadcaster = MedalBroadcaster(table, heartbeat=3600)
+        stream = broadcaster.stream()
+        hello = await stream.__anext__()
+        assert hello == f'event: hello\ndata: {{"version":{table.data_version}}}\n\n'
+        assert broadcaster.subscriber_count == 1
+
+        broadcaster.publish(HEARTBEAT)
+        assert await stream.__anext__() == HEARTBEAT
+        await stream.aclose()
+        assert broadcaster.subscriber_count == 0
+        await broadcaster.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+from backend.event_store import EventStore
+from backend.medal_schedule import MedalPollPolicy, MedalPollScheduler
+
+NOW = datetime(2026, 2, 10, 12, 0)
+
+
+def make_store(*events):
+    store = EventStore()
+    store.load(events)
+    return store
+
+
+def final(event_id, event_time):
+    return {"id": event_id, "title": event_id, "event_time": event_time.isoformat(), "type": "final"}
+
+
+def make_scheduler(**overrides):
+    policy = dict(
+        fast_interval=30, slow_interval=600, min_interval=10,
+        event_duration=3600, lead=900, trail=1800, jitter=0,
+    )
+    policy.update(overrides)
+    return MedalPollScheduler(MedalPollPolicy(**policy))
+
+
+def test_windows_surround_expected_end():
+    scheduler = make_scheduler()
+    store = make_store(
+        final("later", NOW + timedelta(hours=3)),
+        final("soon", NOW),
+        # 窗口早已结束的奖牌赛不再返回
+        final("done", NOW - timedelta(hours=3)),
+        {"id": "heat", "title": "heat", "event_time": NOW.isoformat(), "type": "preliminary"},
+    )
+    windows = scheduler.windows(store, NOW)
+    assert windows == [
+        (NOW + timedelta(minutes=45), NOW + timedelta(minutes=90)),
+        (NOW + timedelta(hours=3, minutes=45), NOW + timedelta(hours=3, minutes=90)),
+    ]
+
+
+def test_fast_interval_inside_window():
+    scheduler = make_scheduler()
+    store = make_store(final("live", NOW - timedelta(minutes=50)))
+    assert scheduler.is_live(store, NOW)
+    assert scheduler.next_interval(store, NOW) == 30
+
+
+def test_slow_interval_capped_by_next_window():
+    scheduler = make_scheduler()
+    # 窗口在 5 分钟后开始
+    store = make_store(final("next", NOW - timedelta(minutes=40)))
+    assert not scheduler.is_live(store, NOW)
+    assert scheduler.next_interval(store, NOW) == 300
+    assert scheduler.next_interval(make_store(), NOW) == 600
+
+
+def test_min_interval_and_jitter_bounds():
+    scheduler = make_scheduler()
+    # 窗口 1 秒后开始，间隔不小于 min_interval
+    store = make_store(final("next", NOW - timedelta(minutes=45) + timedelta(seconds=1)))
+    assert scheduler.next_interval(store, NOW) == 10
+
+    jittered = make_scheduler(jitter=0.2)
+    for _ in range(50):
+        assert 480 <= jittered.next_interval(make_store(), NOW) <= 720
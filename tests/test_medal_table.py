@@ -0,0 +1,52 @@
+from backend.medal_table import MedalTable
+
+
+def row(iso, gold, silver=0, bronze=0, **fields):
+    return {"id": iso.lower(), "iso": iso, "country": iso, "gold": gold, "silver": silver, "bronze": bronze, **fields}
+
+
+def make_table(*rows):
+    table = MedalTable()
+    table.load(rows)
+    return table
+
+
+def test_olympic_tie_ranking():
+    table = make_table(row("NO", 5), row("US", 3, 1), row("DE", 3, 1), row("CN", 2, 4), row("JP", 0, 0, 1))
+    assert [(e["iso"], e["rank"]) for e in table.standings()] == [
+        ("NO", 1), ("DE", 2), ("US", 2), ("CN", 4), ("JP", 5),
+    ]
+    assert table.rank_of("US") == 2
+    assert table.get("CN")["total"] == 6
+
+
+def test_silver_and_bronze_break_gold_ties():
+    table = make_table(row("A", 1, 0, 5), row("B", 1, 1, 0), row("C", 1, 0, 6))
+    assert [e["iso"] for e in table.standings()] == ["B", "C", "A"]
+
+
+def test_diff_reports_only_changed_rows():
+    table = make_table(row("NO", 5), row("CN", 2))
+    scraped = [
+        {"iso": "NO", "country": "NO", "gold": 5, "silver": 0, "bronze": 0},
+        {"iso": "CN", "country": "CN", "gold": 3, "silver": 0, "bronze": 0},
+        {"iso": "KR", "country": "KR", "gold": 1, "silver": 0, "bronze": 0},
+    ]
+    assert [item["iso"] for item in table.diff(scraped)] == ["CN", "KR"]
+
+
+def test_patch_reranks_and_bumps_versions():
+    table = make_table(row("NO", 5, updated_at="2026-02-10T00:00:00+00:00"), row("CN", 2))
+    version, fingerprint = table.version, table.fingerprint
+    assert table.patch([{"iso": "CN", "country": "CN", "gold": 6, "silver": 0, "bronze": 0,
+                         "updated_at": "2026-02-11T00:00:00+00:00"}])
+    assert [e["iso"] for e in table.standings()] == ["CN", "NO"]
+    assert table.version == version + 1
+    assert table.fingerprint != fingerprint
+    assert table.data_version == 1770768000000
+
+
+def test_patch_with_new_country_requires_reload():
+    table = make_table(row("NO", 5))
+    assert not table.patch([{"iso": "KR", "country": "KR", "gold": 1, "silver": 0, "bronze": 0}])
+    assert table.get("KR") is None
@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from backend import reminder_cache as module
+from backend.reminder_cache import ReminderCache
+
+
+class FakeQuery:
+    def __init__(self):
+        self.user_id = None
+
+    def select(self, *args):
+        return self
+
+    def eq(self, column, value):
+        self.user_id = value
+        return self
+
+
+class FakeDB:
+    """user_reminders 按用户保存的赛事 ID；gate 不为空时加载会等待它被 set"""
+
+    def __init__(self):
+        self.rows = {}
+        self.loads = []
+        self.gate = None
+
+    def table(self, name):
+        return FakeQuery()
+
+    async def execute(self, query, table):
+        self.loads.append(query.user_id)
+        # 在等待之前取快照，模拟查询先读到了旧数据
+        data = [{"event_id": event_id} for event_id in sorted(self.rows.get(query.user_id, ()))]
+        if self.gate is not None:
+            await self.gate.wait()
+        return type("Result", (), {"data": data})()
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDB()
+    monkeypatch.setattr(module, "execute_async", db.execute)
+    return db
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_hit_after_load_and_write_through(db, clock):
+    cache = ReminderCache(max_users=10, ttl=60)
+    db.rows["u1"] = {"e1"}
+
+    assert asyncio.run(cache.get(db, "u1")) == {"e1"}
+    cache.add("u1", "e2")
+    cache.discard("u1", "e1")
+    assert asyncio.run(cache.get(db, "u1")) == {"e2"}
+    assert db.loads == ["u1"]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_ttl_expiry_reloads(db, clock):
+    cache = ReminderCache(max_users=10, ttl=60)
+    db.rows["u1"] = {"e1"}
+    asyncio.run(cache.get(db, "u1"))
+    # 其他进程写入的提醒在 TTL 过期后可见
+    db.rows["u1"] = {"e1", "e9"}
+    clock[0] += 60
+    assert asyncio.run(cache.get(db, "u1")) == {"e1"}
+    clock[0] += 1
+    assert asyncio.run(cache.get(db, "u1")) == {"e1", "e9"}
+    assert db.loads == ["u1", "u1"]
+
+
+def test_lru_eviction_at_capacity(db, clock):
+    cache = ReminderCache(max_users=2, ttl=60)
+    for user_id in ("u1", "u2"):
+        asyncio.run(cache.get(db, user_id))
+    # 访问 u1 后 u2 成为最久未使用
+    asyncio.run(cache.get(db, "u1"))
+    asyncio.run(cache.get(db, "u3"))
+    assert len(cache) == 2
+    asyncio.run(cache.get(db, "u1"))
+    asyncio.run(cache.get(db, "u2"))
+    assert db.loads == ["u1", "u2", "u3", "u2"]
+
+
+def test_write_during_slow_load_is_not_overwritten(db, clock):
+    cache = ReminderCache(max_users=10, ttl=60)
+
+    async def scenario():
+        db.gate = asyncio.Event()
+        load = asyncio.create_task(cache.get(db, "u1"))
+        await asyncio.sleep(0)
+        # 加载读到旧数据后、返回前，用户新增了提醒
+        db.rows["u1"] = {"e1"}
+        cache.add("u1", "e1")
+        db.gate.set()
+        stale = await load
+        db.gate = None
+        return stale, await cache.get(db, "u1")
+
+    stale, fresh = asyncio.run(scenario())
+    assert stale == frozenset()
+    # 过时的加载结果没有写入缓存，下一次重新加载得到最新数据
+    assert fresh == {"e1"}
+    assert db.loads == ["u1", "u1"]
+
+
+def test_write_sequence_is_dropped_after_loads_finish(db, clock):
+    cache = ReminderCache(max_users=10, ttl=60)
+    cache.add("u1", "e1")  # 没有进行中的加载，不记录写入序号
+    assert cache._write_seq == {}
+    asyncio.run(cache.get(db, "u1"))
+    assert cache._loaders == {} and cache._write_seq == {}
+    assert len(cache) == 1
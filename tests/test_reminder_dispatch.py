@@ -0,0 +1,227 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend import reminder_dispatch
+from backend.event_store import EventStore
+from backend.reminder_dispatch import IN_FILTER_CHUNK, ReminderDispatcher, TimerHeap, fire_plan
+
+
+class FakeQuery:
+    def __init__(self, table):
+        self.table = table
+        self.action = "select"
+        self.rows = None
+        self.filters = []
+
+    def select(self, *args):
+        return self
+
+    def upsert(self, rows, **kwargs):
+        self.action, self.rows = "upsert", rows
+        return self
+
+    def delete(self):
+        self.action = "delete"
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, [value]))
+        return self
+
+    def in_(self, column, values):
+        self.filters.append((column, list(values)))
+        return self
+
+    def matches(self, row):
+        return all(row[column] in values for column, values in self.filters)
+
+
+class FakeDB:
+    """只实现投递流程用到的 user_reminders / reminder_deliveries 查询"""
+
+    def __init__(self, reminder_ids):
+        self.reminders = [{"id": reminder_id} for reminder_id in reminder_ids]
+        self.deliveries = []
+        self.queries = []
+
+    def table(self, name):
+        return FakeQuery(name)
+
+    async def execute(self, query, table):
+        self.queries.append(query)
+        if query.table == "user_reminders":
+            data = [row for row in self.reminders if query.matches(row)]
+        elif query.action == "upsert":
+            keys = {(row["reminder_id"], row["lead_minutes"]) for row in self.deliveries}
+            data = [row for row in query.rows if (row["reminder_id"], row["lead_minutes"]) not in keys]
+            self.deliveries.extend(data)
+        else:
+            data = [row for row in self.deliveries if query.matches(row)]
+            self.deliveries = [row for row in self.deliveries if not query.matches(row)]
+        return type("Result", (), {"data": data})()
+
+
+class RecordingSink:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.sent = []
+
+    async def send(self, notifications):
+        if self.fail:
+            raise RuntimeError("sink down")
+        self.sent.extend(notifications)
+
+
+def utc_in(**delta):
+    return (datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(**delta)).isoformat()
+
+
+def make_store(**event_times):
+    store = EventStore()
+    store.load([{"id": event_id, "title": event_id, "event_time": event_time} for event_id, event_time in event_times.items()])
+    return store
+
+
+def make_dispatcher(store, sink=None, leads=(30, 5)):
+    return ReminderDispatcher(store, sink=sink or RecordingSink(), lead_minutes=list(leads), retry_delay=60)
+
+
+def reminder(reminder_id, event_id, user_id="u1"):
+    return {"id": reminder_id, "user_id": user_id, "event_id": event_id}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDB([])
+    monkeypatch.setattr(reminder_dispatch, "execute_async", db.execute)
+    return db
+
+
+# ---------- TimerHeap ----------
+
+def test_timer_heap_cancel_reschedule_and_rebuild():
+    timers = TimerHeap()
+    timers.push(("a", 30), 10)
+    timers.push(("b", 30), 20)
+    timers.push(("a", 30), 30)  # 改期，旧条目失效
+    assert timers.next_time() == 20
+    assert timers.cancel(("b", 30)) and not timers.cancel(("b", 30))
+    assert timers.pop_due(25, 10) == []
+    assert timers.pop_due(30, 10) == [("a", 30)]
+    assert len(timers) == 0
+
+    for i in range(200):
+        timers.push((str(i), 5), i)
+    for i in range(150):
+        timers.cancel((str(i), 5))
+    # 失效条目过多时重建堆
+    assert len(timers._heap) <= 2 * len(timers) + 64
+    assert timers.pop_due(1000, 3) == [("150", 5), ("151", 5), ("152", 5)]
+
+
+def test_fire_plan_keeps_only_latest_overdue_lead():
+    now = 1000.0
+    event_ts = now + 10 * 60
+    assert fire_plan(event_ts, [30, 15, 5], now) == [(5, event_ts - 300), (15, event_ts - 900)]
+    assert fire_plan(event_ts, [5], now) == [(5, event_ts - 300)]
+
+
+# ---------- 改期 ----------
+
+def test_event_moved_earlier_is_rescheduled():
+    store = make_store(e1=utc_in(hours=2))
+    dispatcher = make_dispatcher(store)
+    assert dispatcher.schedule(reminder("r1", "e1")) == 2
+    assert dispatcher.timers.next_time() > time.time() + 3600
+
+    store.load([{"id": "e1", "title": "e1", "event_time": utc_in(minutes=20)}])
+    assert dispatcher.reschedule() == 1
+    # 提前 30 分钟的提醒已错过，立即补发；提前 5 分钟的按新时间排队
+    due = dispatcher.timers.pop_due(time.time(), 10)
+    assert due == [("r1", 30)]
+    assert 14 * 60 < dispatcher.timers.next_time() - time.time() <= 15 * 60
+    assert dispatcher.reschedule() == 0
+
+
+def test_event_moved_later_or_removed():
+    store = make_store(e1=utc_in(hours=1), e2=utc_in(hours=1))
+    dispatcher = make_dispatcher(store, leads=(30,))
+    dispatcher.schedule(reminder("r1", "e1"))
+    dispatcher.schedule(reminder("r2", "e2", user_id="u2"))
+
+    store.load([{"id": "e1", "title": "e1", "event_time": utc_in(hours=3)}])
+    assert dispatcher.reschedule() == 1
+    assert 2.4 * 3600 < dispatcher.timers.next_time() - time.time() <= 2.5 * 3600
+    # e2 已从赛程中删除，其提醒被取消
+    assert dispatcher.stats()["reminders"] == 1
+    assert not dispatcher.cancel("u2", "e2")
+
+
+# ---------- 投递 ----------
+
+def test_dispatch_claims_and_sends(db):
+    store = make_store(e1=utc_in(minutes=10))
+    sink = RecordingSink()
+    dispatcher = make_dispatcher(store, sink)
+    db.reminders = [{"id": "r1"}]
+    dispatcher.schedule(reminder("r1", "e1"))
+
+    asyncio.run(dispatcher._dispatch(db, dispatcher.timers.pop_due(time.time(), 10)))
+    assert [(n["reminder_id"], n["lead_minutes"]) for n in sink.sent] == [("r1", 30)]
+    assert db.deliveries == [{"reminder_id": "r1", "lead_minutes": 30}]
+
+    # 已由其他进程占位的提醒不再投递
+    dispatcher.schedule(reminder("r1", "e1"))
+    asyncio.run(dispatcher._dispatch(db, [("r1", 30)]))
+    assert len(sink.sent) == 1 and dispatcher.duplicates == 1
+
+
+def test_sink_failure_releases_claims_and_retries(db):
+    store = make_store(e1=utc_in(minutes=20))
+    sink = RecordingSink(fail=True)
+    dispatcher = make_dispatcher(store, sink, leads=(30,))
+    db.reminders = [{"id": "r1"}]
+    dispatcher.schedule(reminder("r1", "e1"))
+    key = ("r1", 30)
+
+    asyncio.run(dispatcher._dispatch(db, dispatcher.timers.pop_due(time.time(), 10)))
+    assert db.deliveries == []
+    assert key in dispatcher.timers and dispatcher.stats()["retried"] == 1
+    assert 55 < dispatcher.timers.next_time() - time.time() <= 60
+
+    sink.fail = False
+    asyncio.run(dispatcher._dispatch(db, dispatcher.timers.pop_due(dispatcher.timers.next_time(), 10)))
+    assert [n["reminder_id"] for n in sink.sent] == ["r1"]
+    assert db.deliveries == [{"reminder_id": "r1", "lead_minutes": 30}]
+    assert len(dispatcher.timers) == 0
+
+
+def test_existence_check_is_chunked(db):
+    count = IN_FILTER_CHUNK * 2 + 5
+    store = make_store(e1=utc_in(minutes=10))
+    dispatcher = make_dispatcher(store, leads=(30,))
+    ids = [f"r{i}" for i in range(count)]
+    db.reminders = [{"id": reminder_id} for reminder_id in ids[1:]]
+    for i, reminder_id in enumerate(ids):
+        dispatcher.schedule(reminder(reminder_id, "e1", user_id=f"u{i}"))
+
+    asyncio.run(dispatcher._dispatch(db, dispatcher.timers.pop_due(time.time(), count)))
+    lookups = [q for q in db.queries if q.table == "user_reminders"]
+    assert len(lookups) == 3
+    assert all(len(q.filters[0][1]) <= IN_FILTER_CHUNK for q in lookups)
+    # 已被取消（数据库中不存在）的提醒不投递
+    assert len(dispatcher.sink.sent) == count - 1
+
+
+def test_sink_is_created_on_first_use():
+    dispatcher = ReminderDispatcher(EventStore(), sink_name="no_such_sink")
+    assert dispatcher.sink is None
+    with pytest.raises(ValueError):
+        dispatcher.open_sink()
+
+    dispatcher = ReminderDispatcher(EventStore(), sink_name="log")
+    assert isinstance(dispatcher.open_sink(), reminder_dispatch.LogSink)
+    assert dispatcher.open_sink() is dispatcher.sink
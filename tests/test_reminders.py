@@ -0,0 +1,131 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.db import get_supabase
+from backend.event_store import EventStore, get_event_store
+from backend.reminder_dispatch import IN_FILTER_CHUNK
+from backend.routers import reminders
+
+IN_STORE = str(uuid.uuid4())
+IN_DB_ONLY = str(uuid.uuid4())
+UNKNOWN = str(uuid.uuid4())
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.action = "select"
+        self.rows = None
+        self.filters = {}
+
+    def select(self, *args):
+        return self
+
+    def upsert(self, rows, **kwargs):
+        self.action, self.rows = "upsert", rows
+        return self
+
+    def delete(self):
+        self.action = "delete"
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = [value]
+        return self
+
+    def in_(self, column, values):
+        self.filters[column] = list(values)
+        return self
+
+
+class FakeDB:
+    """events 表只有 IN_STORE 和 IN_DB_ONLY；user_reminders 按 event_id 外键校验"""
+
+    def __init__(self):
+        self.event_ids = {IN_STORE, IN_DB_ONLY}
+        self.reminders = []
+        self.queries = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    async def execute(self, query, table):
+        self.queries.append(query)
+        if query.table == "events":
+            data = [{"id": event_id} for event_id in query.filters["id"] if event_id in self.event_ids]
+        elif query.action == "upsert":
+            if any(row["event_id"] not in self.event_ids for row in query.rows):
+                raise RuntimeError("violates foreign key constraint")
+            data = [{"id": f"r-{row['event_id']}", **row} for row in query.rows]
+            self.reminders.extend(data)
+        else:
+            data = [row for row in self.reminders if all(row[c] in v for c, v in query.filters.items())]
+            self.reminders = [row for row in self.reminders if row not in data]
+        return type("Result", (), {"data": data})()
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDB()
+    monkeypatch.setattr(reminders, "execute_async", db.execute)
+    return db
+
+
+@pytest.fixture
+def store():
+    store = EventStore()
+    store.load([{"id": IN_STORE, "title": "决赛", "event_time": "2026-02-10T12:00:00"}])
+    return store
+
+
+@pytest.fixture
+def client(db, store):
+    app = FastAPI()
+    app.include_router(reminders.router)
+    app.dependency_overrides[get_supabase] = lambda: db
+    app.dependency_overrides[get_event_store] = lambda: store
+    return TestClient(app)
+
+
+def test_split_known_events_checks_store_then_database(db, store):
+    known, unknown = asyncio.run(reminders.split_known_events(
+        db, store, [IN_STORE.upper(), IN_DB_ONLY, UNKNOWN, "not-a-uuid", IN_STORE],
+    ))
+    assert known == [IN_STORE, IN_DB_ONLY]
+    assert unknown == [UNKNOWN, "not-a-uuid"]
+    # 快照中已有的赛事不查数据库，非 UUID 不进入查询
+    assert [q.filters["id"] for q in db.queries] == [[IN_DB_ONLY, UNKNOWN]]
+
+
+def test_create_reminder_rejects_unknown_events(client, db):
+    assert client.post("/api/reminders", json={"event_id": "not-a-uuid"}).status_code == 400
+    assert client.post("/api/reminders", json={"event_id": UNKNOWN}).status_code == 404
+    response = client.post("/api/reminders", json={"event_id": IN_DB_ONLY})
+    assert response.status_code == 200
+    assert response.json()["event_id"] == IN_DB_ONLY
+
+
+def test_batch_skips_unknown_events(client, db):
+    response = client.post(
+        "/api/reminders/batch", json={"event_ids": [IN_STORE, UNKNOWN, "bogus", IN_DB_ONLY]},
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "success": True, "count": 2, "event_ids": [IN_STORE, IN_DB_ONLY], "skipped": [UNKNOWN, "bogus"],
+    }
+
+
+def test_clear_ignores_invalid_ids_and_chunks(client, db):
+    client.post("/api/reminders/batch", json={"event_ids": [IN_STORE]})
+    assert client.delete("/api/reminders/not-a-uuid").status_code == 200
+
+    event_ids = [IN_STORE] + [str(uuid.uuid4()) for _ in range(IN_FILTER_CHUNK)]
+    response = client.request("DELETE", "/api/reminders/batch", json={"event_ids": event_ids})
+    assert response.json()["event_ids"] == [IN_STORE]
+    deletes = [q for q in db.queries if q.action == "delete" and q.table == "user_reminders"]
+    assert [len(q.filters["event_id"]) for q in deletes] == [IN_FILTER_CHUNK, 1]
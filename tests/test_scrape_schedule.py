@@ -0,0 +1,187 @@
+import asyncio
+import json
+
+from backend.scripts import scrape_schedule
+from backend.scripts.scrape_schedule import competition_days
+
+
+def run_scrape(monkeypatch, state_path, days=None, fail=(), fresh=False, stats=None, notified=None):
+    scraped = []
+    stats = stats or {"found": 1, "inserted": 1, "updated": 0, "unchanged": 0}
+    notified = [] if notified is None else notified
+
+    async def scrape_day(client, semaphore, day):
+        if day in fail:
+            raise RuntimeError("boom")
+        scraped.append(day)
+        return dict(stats)
+
+    monkeypatch.setattr(scrape_schedule, "scrape_day", scrape_day)
+    monkeypatch.setattr(scrape_schedule, "notify_events_refresh", lambda: notified.append(True))
+    totals = asyncio.run(scrape_schedule.scrape_schedule(days, state_path=str(state_path), fresh=fresh))
+    return scraped, totals
+
+
+def completed(state_path):
+    return json.loads(state_path.read_text(encoding="utf-8"))["completed"]
+
+
+def test_subset_run_keeps_progress_file(monkeypatch, tmp_path):
+    state_path = tmp_path / "progress.json"
+    first, second = competition_days()[:2]
+    scraped, totals = run_scrape(monkeypatch, state_path, days=[first, second])
+    assert scraped == [first, second] and totals["failed"] == []
+    # 只完成了部分比赛日，进度文件保留
+    assert completed(state_path) == [first.isoformat(), second.isoformat()]
+
+    # 再抓全部时跳过已完成的日期，全部完成后删除进度文件
+    scraped, _ = run_scrape(monkeypatch, state_path)
+    assert first not in scraped and len(scraped) == len(competition_days()) - 2
+    assert not state_path.exists()
+
+
+def test_failed_day_is_resumed(monkeypatch, tmp_path):
+    state_path = tmp_path / "progress.json"
+    days = competition_days()
+    _, totals = run_scrape(monkeypatch, state_path, fail={days[3]})
+    assert totals["failed"] == [days[3].isoformat()]
+    assert days[3].isoformat() not in completed(state_path)
+
+    scraped, _ = run_scrape(monkeypatch, state_path)
+    assert scraped == [days[3]]
+    assert not state_path.exists()
+
+
+def test_fresh_subset_only_resets_selected_days(monkeypatch, tmp_path):
+    state_path = tmp_path / "progress.json"
+    first, second = competition_days()[:2]
+    run_scrape(monkeypatch, state_path, days=[first, second])
+    scraped, _ = run_scrape(monkeypatch, state_path, days=[first], fresh=True)
+    assert scraped == [first]
+    assert completed(state_path) == [first.isoformat(), second.isoformat()]
+
+
+def card(time, title, venue, medal=False):
+    icon = '<svg aria-label="Medal event"></svg>' if medal else ""
+    return (
+        '<div class="row"><article data-cy="Event-Card">'
+        f'<span data-cy="time-container">{time}</span>'
+        f'<span data-cy="text-module">{title}</span>'
+        f'<a href="/zh/venues/{venue}">{venue}</a>{icon}'
+        "</article></div>"
+    )
+
+
+def test_api_is_notified_only_when_events_changed(monkeypatch, tmp_path):
+    days = competition_days()[:2]
+    notified = []
+    run_scrape(monkeypatch, tmp_path / "a.json", days=days, notified=notified)
+    assert notified == [True]
+
+    unchanged = {"found": 3, "inserted": 0, "updated": 0, "unchanged": 3}
+    run_scrape(monkeypatch, tmp_path / "b.json", days=days, stats=unchanged, notified=notified)
+    assert notified == [True]
+
+
+def test_parse_schedule_page_assigns_preceding_heading():
+    html = (
+        "<html><head><title>赛程</title></head><body><nav><a href='/'>首页</a></nav>"
+        "<section><h2>冰球</h2>" + card("12:10", "男子小组赛 中国 vs 美国", "Arena") + "</section>"
+        "<section><div><h2>花样滑冰</h2></div>"
+        + card("19:00", "女子单人滑决赛", "Forum", medal=True)
+        + "<article data-cy='Other'>广告</article>"
+        + card("bad", "冰舞", "Forum")
+        + "</section></body></html>"
+    )
+    day = competition_days()[0]
+    events = scrape_schedule.parse_schedule_page(html, day)
+    assert [(e["sport"], e["title"], e["location"], e["type"], e["is_team_china"]) for e in events] == [
+        ("冰球", "男子小组赛 中国 vs 美国", "Arena", "preliminary", True),
+        ("花样滑冰", "女子单人滑决赛", "Forum", "final", False),
+        ("花样滑冰", "冰舞", "Forum", "preliminary", False),
+    ]
+    assert events[0]["event_time"] == f"{day.isoformat()}T12:10:00"
+    # 时间无法解析时退回当天零点
+    assert events[2]["event_time"] == f"{day.isoformat()}T00:00:00"
+
+
+class FakeEvents:
+    def __init__(self, writes):
+        self.writes = writes
+
+    def insert(self, rows):
+        self.writes.append(("insert", rows))
+        return rows
+
+    def upsert(self, rows, on_conflict=None):
+        self.writes.append(("upsert", rows))
+        return rows
+
+
+class FakeClient:
+    def __init__(self):
+        self.writes = []
+
+    def table(self, name):
+        return FakeEvents(self.writes)
+
+
+def scraped_event(title, event_time, **fields):
+    event = {
+        "sport": "冰球", "discipline": "冰球", "title": title, "event_time": event_time,
+        "location": "Arena", "is_team_china": False, "type": "preliminary",
+    }
+    event.update(fields)
+    return event
+
+
+def test_natural_key_normalizes_event_time():
+    scraped = scraped_event("男子小组赛", "2026-02-10T12:10:00")
+    # 数据库返回带时区的时间
+    stored = {**scraped, "id": "e1", "event_time": "2026-02-10T20:10:00+08:00"}
+    assert scrape_schedule.natural_key(scraped) == scrape_schedule.natural_key(stored)
+    assert scrape_schedule.natural_key({"title": "x"}) == ("", "x", "", "")
+
+
+def test_merge_events_inserts_updates_and_skips(monkeypatch):
+    existing_rows = [
+        {**scraped_event("男子小组赛", "2026-02-10T12:10:00Z"), "id": "same"},
+        {**scraped_event("女子小组赛", "2026-02-10T15:00:00+00:00"), "id": "changed"},
+    ]
+    client = FakeClient()
+
+    async def fetch_existing_events(supabase, events):
+        return {scrape_schedule.natural_key(row): row for row in existing_rows}
+
+    async def execute(query, table):
+        return query
+
+    async def get_supabase():
+        return client
+
+    monkeypatch.setattr(scrape_schedule, "get_supabase", get_supabase)
+    monkeypatch.setattr(scrape_schedule, "fetch_existing_events", fetch_existing_events)
+    monkeypatch.setattr(scrape_schedule, "execute_async", execute)
+
+    events = [
+        scraped_event("男子小组赛", "2026-02-10T12:10:00"),
+        scraped_event("女子小组赛", "2026-02-10T15:00:00", is_team_china=True),
+        scraped_event("男子决赛", "2026-02-10T19:00:00", type="final"),
+        # 同一页面重复的卡片只保留第一张
+        scraped_event("男子决赛", "2026-02-10T19:00:00", type="medal"),
+    ]
+    stats = asyncio.run(scrape_schedule.merge_events(events))
+
+    assert stats == {"inserted": 1, "updated": 1, "unchanged": 1}
+    assert client.writes == [
+        ("insert", [events[2]]),
+        ("upsert", [{"id": "changed", **events[1]}]),
+    ]
+
+
+def test_merge_events_empty_skips_database(monkeypatch):
+    async def get_supabase():
+        return None
+
+    monkeypatch.setattr(scrape_schedule, "get_supabase", get_supabase)
+    assert asyncio.run(scrape_schedule.merge_events([])) == {"inserted": 0, "updated": 0, "unchanged": 0}
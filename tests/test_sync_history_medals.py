@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+import pytest
+
+from backend.scripts import sync_history_medals as history
+from backend.scripts.sync_history_medals import checksum
+
+
+def medal(year, iso, gold, rank):
+    return {"year": year, "location": "北京", "country": iso, "iso": iso, "gold": gold, "silver": 0, "bronze": 0, "rank": rank}
+
+
+STORED = [medal(2022, "NO", 16, 1), medal(2022, "DE", 12, 2), medal(2022, "CN", 9, 3)]
+
+
+class FakeTable:
+    def __init__(self, writes):
+        self.writes = writes
+
+    def upsert(self, rows, on_conflict=None):
+        self.writes.append(rows)
+        return rows
+
+
+class FakeClient:
+    def __init__(self):
+        self.writes = []
+
+    def table(self, name):
+        return FakeTable(self.writes)
+
+
+@pytest.fixture
+def backfill(monkeypatch, tmp_path):
+    client = FakeClient()
+    manifest_path = tmp_path / "manifest.json"
+
+    async def load_stored_checksums(supabase, years):
+        return {year: checksum(STORED if year == 2022 else []) for year in years}
+
+    async def execute(query, table):
+        return query
+
+    async def get_supabase():
+        return client
+
+    monkeypatch.setattr(history, "get_supabase", get_supabase)
+    monkeypatch.setattr(history, "load_stored_checksums", load_stored_checksums)
+    monkeypatch.setattr(history, "execute_async", execute)
+
+    def run(scraped_rows, years=(2022,)):
+        async def scrape(year, location, http_client, bucket):
+            return scraped_rows
+
+        monkeypatch.setattr(history, "scrape_historical_medals", scrape)
+        summary = asyncio.run(history.sync_history(set(years), rate=1000, manifest_path=str(manifest_path)))
+        manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+        return summary, manifest, client.writes
+
+    return run
+
+
+def test_partial_parse_is_not_written_or_recorded(backfill):
+    summary, manifest, writes = backfill(STORED[:1])
+    assert summary["failed"] == [2022]
+    assert manifest == {}
+    assert writes == []
+
+
+def test_changed_rows_are_written_and_recorded(backfill):
+    scraped = STORED[:2] + [medal(2022, "CN", 10, 3)]
+    summary, manifest, writes = backfill(scraped)
+    assert summary["written"] == [2022]
+    assert manifest == {"2022": checksum(scraped)}
+    assert writes == [scraped]
+
+
+def test_unchanged_edition_only_records_checksum(backfill):
+    summary, manifest, writes = backfill(list(STORED))
+    assert summary["unchanged"] == [2022]
+    assert manifest == {"2022": checksum(STORED)}
+    assert writes == []
+
+
+def test_unknown_years_are_ignored(backfill, caplog):
+    summary, _, _ = backfill(list(STORED), years=(2022, 1999))
+    assert summary["unchanged"] == [2022]
+    assert "1999" in caplog.text
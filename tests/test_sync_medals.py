@@ -0,0 +1,159 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from backend.medal_table import MedalTable
+from backend.scripts import sync_medals
+
+
+class FakeTable:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def upsert(self, payload, on_conflict=None):
+        self.calls.append((payload, on_conflict))
+        return payload
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = []
+
+    def table(self, name):
+        return FakeTable(self.calls)
+
+
+def item(iso, gold, silver=0, bronze=0):
+    return {"iso": iso, "country": iso, "gold": gold, "silver": silver, "bronze": bronze}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = FakeClient()
+
+    async def get_supabase():
+        return client
+
+    monkeypatch.setattr(sync_medals, "get_supabase", get_supabase)
+    return client
+
+
+def test_single_batched_upsert(client, monkeypatch):
+    async def execute(query, table):
+        return query
+
+    monkeypatch.setattr(sync_medals, "execute_async", execute)
+    outcomes = asyncio.run(sync_medals.sync_to_supabase(
+        [item("NO", 5), item("CN", 2), item("NO", 9)], updated_at="2026-02-10T00:00:00+00:00",
+    ))
+
+    assert outcomes == {"NO": "upserted", "CN": "upserted"}
+    assert len(client.calls) == 1
+    payload, on_conflict = client.calls[0]
+    assert on_conflict == "iso"
+    # 同一 ISO 只保留第一行
+    assert [(row["iso"], row["gold"]) for row in payload] == [("NO", 5), ("CN", 2)]
+    assert all(row["updated_at"] == "2026-02-10T00:00:00+00:00" for row in payload)
+
+
+def test_falls_back_to_row_by_row_on_batch_failure(client, monkeypatch):
+    async def execute(query, table):
+        if isinstance(query, list):
+            raise RuntimeError("batch rejected")
+        if query["iso"] == "CN":
+            raise RuntimeError("bad row")
+        return query
+
+    monkeypatch.setattr(sync_medals, "execute_async", execute)
+    outcomes = asyncio.run(sync_medals.sync_to_supabase([item("NO", 5), item("CN", 2), item("US", 1)]))
+
+    assert len(client.calls) == 4
+    assert outcomes["NO"] == "upserted"
+    assert outcomes["US"] == "upserted"
+    assert outcomes["CN"].startswith("failed: bad row")
+
+
+def test_empty_input_skips_database(client):
+    assert asyncio.run(sync_medals.sync_to_supabase([])) == {}
+    assert client.calls == []
+
+
+# ---------- run_sync ----------
+
+@pytest.fixture
+def sync(monkeypatch, client):
+    table = MedalTable()
+    table.load([{"id": iso.lower(), **item(iso, gold)} for iso, gold in (("NO", 5), ("CN", 2))])
+    monkeypatch.setattr(sync_medals, "medal_table", table)
+    monkeypatch.setattr(sync_medals, "_last_page_hash", None)
+    pages = {"html": None}
+    failing = set()
+
+    async def fetch_medal_page():
+        return pages["html"]
+
+    async def execute(query, table):
+        rows = query if isinstance(query, list) else [query]
+        if any(row["iso"] in failing for row in rows):
+            raise RuntimeError("write failed")
+        return query
+
+    # 页面内容即奖牌行的 JSON，解析次数用于判断是否跳过了解析
+    parsed = []
+
+    def parse_medal_page(html):
+        parsed.append(html)
+        return json.loads(html)
+
+    monkeypatch.setattr(sync_medals, "fetch_medal_page", fetch_medal_page)
+    monkeypatch.setattr(sync_medals, "parse_medal_page", parse_medal_page)
+    monkeypatch.setattr(sync_medals, "execute_async", execute)
+
+    def run(rows, fail=()):
+        pages["html"] = json.dumps(rows)
+        failing.clear()
+        failing.update(fail)
+        client.calls.clear()
+        outcomes = asyncio.run(sync_medals.run_sync())
+        written = []
+        for payload, _ in client.calls:
+            written.extend(row["iso"] for row in (payload if isinstance(payload, list) else [payload]))
+        return outcomes, written
+
+    return SimpleNamespace(run=run, table=table, parsed=parsed)
+
+
+def test_run_sync_writes_only_changed_rows_and_skips_unchanged_page(sync):
+    page = [item("NO", 5), item("CN", 3)]
+    outcomes, written = sync.run(page)
+    assert outcomes == {"CN": "upserted"}
+    assert written == ["CN"]
+    assert sync.table.get("CN")["gold"] == 3
+
+    # 页面未变化：不解析也不写库
+    outcomes, written = sync.run(page)
+    assert outcomes == {} and written == []
+    assert len(sync.parsed) == 1
+
+
+def test_run_sync_unchanged_counts_do_not_write(sync):
+    outcomes, written = sync.run([item("NO", 5), item("CN", 2)])
+    assert outcomes == {} and written == []
+    assert sync_medals._last_page_hash is not None
+
+
+def test_run_sync_retries_page_after_failed_write(sync):
+    page = [item("NO", 6), item("CN", 3)]
+    outcomes, _ = sync.run(page, fail={"CN"})
+    assert outcomes["NO"] == "upserted" and outcomes["CN"].startswith("failed")
+    assert sync_medals._last_page_hash is None
+    # 写入成功的行已更新到奖牌榜，失败的没有
+    assert sync.table.get("NO")["gold"] == 6 and sync.table.get("CN")["gold"] == 2
+
+    # 同一页面下次重新处理，只写入上次失败的行
+    outcomes, written = sync.run(page)
+    assert outcomes == {"CN": "upserted"} and written == ["CN"]
+    assert len(sync.parsed) == 2
+    assert sync_medals._last_page_hash is not None
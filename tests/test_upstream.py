@@ -0,0 +1,96 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend import upstream
+from backend.upstream import TimedTransport
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(upstream, "_clients", {})
+    monkeypatch.setattr(upstream, "_stats", {})
+
+
+def mock_client(name, handler):
+    return httpx.AsyncClient(transport=TimedTransport(name, httpx.MockTransport(handler)))
+
+
+def use_mock_clients(monkeypatch, handler):
+    built = []
+
+    def build_client(name):
+        built.append(name)
+        return mock_client(name, handler)
+
+    monkeypatch.setattr(upstream, "_build_client", build_client)
+    return built
+
+
+def test_timed_transport_records_per_host_stats():
+    async def slow(request):
+        await asyncio.sleep(0.02)
+        return httpx.Response(200 if request.url.path == "/ok" else 503)
+
+    def broken(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    async def scenario():
+        bocha = mock_client("bocha", slow)
+        zhipu = mock_client("zhipu", broken)
+        await bocha.get("https://api.bochaai.com/ok")
+        await bocha.get("https://api.bochaai.com/fail")
+        with pytest.raises(httpx.ConnectError):
+            await zhipu.get("https://open.bigmodel.cn/")
+        await bocha.aclose()
+        await zhipu.aclose()
+
+    asyncio.run(scenario())
+    stats = upstream.upstream_stats()
+    assert stats["bocha"]["requests"] == 2
+    # 5xx 也计为失败
+    assert stats["bocha"]["errors"] == 1
+    assert 20 <= stats["bocha"]["avg_ms"] <= stats["bocha"]["max_ms"]
+    assert stats["bocha"]["last_ms"] >= 20
+    assert stats["zhipu"]["requests"] == 1 and stats["zhipu"]["errors"] == 1
+
+
+def test_one_client_per_host(monkeypatch):
+    built = use_mock_clients(monkeypatch, lambda request: httpx.Response(200))
+    bocha = upstream.get_upstream_client("bocha")
+    assert upstream.get_upstream_client("bocha") is bocha
+    assert upstream.get_upstream_client("zhipu") is not bocha
+    # startup 时已有的客户端直接复用
+    upstream.init_upstream_clients()
+    assert built == ["bocha", "zhipu"]
+
+
+def test_prewarm_failures_are_swallowed(monkeypatch):
+    def handler(request):
+        if request.url.host == "open.bigmodel.cn":
+            raise httpx.ConnectTimeout("timed out", request=request)
+        assert request.method == "HEAD"
+        return httpx.Response(200)
+
+    use_mock_clients(monkeypatch, handler)
+    asyncio.run(upstream.prewarm_upstream_clients())
+    stats = upstream.upstream_stats()
+    assert stats["bocha"] == {**stats["bocha"], "requests": 1, "errors": 0}
+    assert stats["zhipu"]["errors"] == 1
+
+
+def test_close_releases_all_clients(monkeypatch):
+    use_mock_clients(monkeypatch, lambda request: httpx.Response(200))
+
+    async def scenario():
+        upstream.init_upstream_clients()
+        clients = list(upstream._clients.values())
+        await upstream.close_upstream_clients()
+        return clients
+
+    clients = asyncio.run(scenario())
+    assert len(clients) == 2 and all(client.is_closed for client in clients)
+    assert upstream._clients == {}
+    # 关闭后再次获取时重新创建
+    assert not upstream.get_upstream_client("bocha").is_closed